@@ -0,0 +1,248 @@
+import json
+import re
+from typing import Any, Callable, List, Optional, Tuple
+
+Path = Tuple[Any, ...]
+
+# Characters that can appear in a bare JSON scalar (numbers, true/false/null)
+_SCALAR_CHARS = frozenset("-+.0123456789eEtruefalsn")
+_SCALAR_RUN = re.compile(r"[-+.0-9a-zA-Z]*")
+_STRING_SPECIAL = re.compile(r'["\\]')
+_WHITESPACE = frozenset(" \t\r\n")
+
+
+class _Frame:
+    __slots__ = ("is_object", "start", "key", "index", "expect")
+
+    def __init__(self, is_object: bool, start: int):
+        self.is_object = is_object
+        self.start = start
+        self.key: Any = None
+        self.index = 0
+        self.expect = "key" if is_object else "value"
+
+    @property
+    def path_item(self) -> Any:
+        return self.key if self.is_object else self.index
+
+
+class IncrementalJSONParser:
+    """
+    Single-pass JSON parser for model output that arrives in chunks.
+
+    Text before the first "{" (prose, markdown fences) and after the root
+    object closes is ignored. Trailing commas and // comments, which models
+    tend to copy from prompt examples, are dropped as the text is scanned.
+    Whenever a value whose path matches `emit` finishes, it is returned from
+    `feed` as (path, value), e.g. (("categories", 0), {...}).
+    """
+
+    def __init__(self, emit: Optional[Callable[[Path], bool]] = None):
+        self._emit = emit or (lambda path: len(path) == 1)
+        self._stack: List[_Frame] = []
+        self._parts: List[str] = []  # cleaned JSON text
+        self._length = 0
+        self._joined = ""
+        self._started = False
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._key_parts: Optional[List[str]] = None
+        self._string_start = 0
+        self._scalar_start: Optional[int] = None
+        self._pending_comma = False
+        self._comment = False
+        self._slash = False
+
+    @property
+    def done(self) -> bool:
+        """True once the root object has closed"""
+        return self._done
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        """Consume the next chunk and return the values it completed"""
+        out: List[str] = []
+        written = 0
+        spans: List[Tuple[Path, int, int]] = []
+        i, n = 0, len(chunk)
+
+        def write(text: str) -> None:
+            nonlocal written
+            out.append(text)
+            written += len(text)
+
+        def offset() -> int:
+            return self._length + written
+
+        def flush_comma() -> None:
+            if self._pending_comma:
+                write(",")
+                self._pending_comma = False
+
+        def value_done(start: int) -> None:
+            path = tuple(frame.path_item for frame in self._stack)
+            if self._stack:
+                self._stack[-1].expect = "comma"
+                if self._emit(path):
+                    spans.append((path, start, offset()))
+            else:
+                self._done = True
+
+        while i < n and not self._done:
+            if self._in_string:
+                if self._escape:
+                    write(chunk[i])
+                    if self._key_parts is not None:
+                        self._key_parts.append(chunk[i])
+                    self._escape = False
+                    i += 1
+                    continue
+                match = _STRING_SPECIAL.search(chunk, i)
+                end = match.end() if match else n
+                segment = chunk[i:end]
+                write(segment)
+                if self._key_parts is not None:
+                    self._key_parts.append(segment)
+                i = end
+                if match is None:
+                    continue
+                if match.group() == "\\":
+                    self._escape = True
+                    continue
+                self._in_string = False
+                if self._key_parts is not None:
+                    frame = self._stack[-1]
+                    frame.key = json.loads('"' + "".join(self._key_parts), strict=False)
+                    frame.expect = "colon"
+                    self._key_parts = None
+                else:
+                    value_done(self._string_start)
+                continue
+
+            if self._comment:
+                newline = chunk.find("\n", i)
+                if newline < 0:
+                    break
+                self._comment = False
+                i = newline + 1
+                continue
+
+            if not self._started:
+                brace = chunk.find("{", i)
+                if brace < 0:
+                    break
+                self._started = True
+                i = brace
+
+            char = chunk[i]
+
+            if self._slash:
+                self._slash = False
+                if char != "/":
+                    raise ValueError("Unexpected '/' in JSON")
+                self._comment = True
+                i += 1
+                continue
+
+            if self._scalar_start is not None:
+                run = _SCALAR_RUN.match(chunk, i)
+                if run.end() > i:
+                    write(run.group())
+                    i = run.end()
+                    continue
+                start, self._scalar_start = self._scalar_start, None
+                value_done(start)
+                continue
+
+            if char in _WHITESPACE:
+                i += 1
+            elif char == ",":
+                frame = self._stack[-1]
+                if frame.is_object:
+                    frame.expect = "key"
+                else:
+                    frame.index += 1
+                    frame.expect = "value"
+                self._pending_comma = True
+                i += 1
+            elif char in "}]":
+                # Dropping the pending comma is what repairs trailing commas
+                self._pending_comma = False
+                if not self._stack or self._stack[-1].is_object != (char == "}"):
+                    raise ValueError(f"Unexpected {char!r} in JSON")
+                write(char)
+                frame = self._stack.pop()
+                value_done(frame.start)
+                i += 1
+            elif char == ":":
+                write(char)
+                self._stack[-1].expect = "value"
+                i += 1
+            elif char == '"':
+                flush_comma()
+                self._in_string = True
+                self._string_start = offset()
+                if self._stack and self._stack[-1].is_object and self._stack[-1].expect == "key":
+                    self._key_parts = []
+                write(char)
+                i += 1
+            elif char in "{[":
+                flush_comma()
+                self._stack.append(_Frame(char == "{", offset()))
+                write(char)
+                i += 1
+            elif char == "/":
+                if i + 1 < n:
+                    if chunk[i + 1] != "/":
+                        raise ValueError("Unexpected '/' in JSON")
+                    self._comment = True
+                    i += 2
+                else:
+                    self._slash = True
+                    i += 1
+            elif char in _SCALAR_CHARS:
+                flush_comma()
+                self._scalar_start = offset()
+            else:
+                raise ValueError(f"Unexpected character {char!r} in JSON")
+
+        if out:
+            self._parts.append("".join(out))
+            self._length += written
+        return [(path, self._decode(start, end)) for path, start, end in spans]
+
+    def result(self) -> Any:
+        """
+        The complete root value.
+
+        Raises:
+            ValueError: If no JSON object was found or it never closed
+        """
+        if not self._done:
+            if not self._started:
+                raise ValueError("No JSON object found in model response")
+            raise ValueError("Model response ended before the JSON object was complete")
+        return self._decode(0, self._length)
+
+    def _decode(self, start: int, end: int) -> Any:
+        if len(self._joined) != self._length:
+            self._joined = "".join(self._parts)
+            self._parts = [self._joined]
+        try:
+            return json.loads(self._joined[start:end], strict=False)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Failed to parse model JSON: {exc}") from exc
+
+
+def parse_json_response(text: str) -> Any:
+    """
+    Parse the JSON object in a complete model response.
+
+    Raises:
+        ValueError: If the response holds no complete, valid JSON object
+    """
+    if not text:
+        raise ValueError("Model returned an empty response.")
+    parser = IncrementalJSONParser(emit=lambda path: False)
+    parser.feed(text)
+    return parser.result()
@@ -0,0 +1,31 @@
+import os
+import sqlite3
+import threading
+
+
+class ThreadLocalSQLite:
+    """
+    One SQLite file in WAL mode, opened once per thread.
+
+    sqlite3 connections can't be shared across threads, so each thread gets
+    its own on first use. WAL lets every process on the host read while one
+    writes; autocommit mode (isolation_level=None) leaves transactions to
+    the caller.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    from .local_sqlite import ThreadLocalSQLite
+except ImportError:  # run as a script from agent/ (server.py)
+    from local_sqlite import ThreadLocalSQLite
+
+logger = logging.getLogger(__name__)
+
+FRESH = "hit"
+STALE = "stale"
+MISS = "miss"
+
+_NON_WORD = re.compile(r"[^\w\s]")
+
+
+def canonicalize_subject(subject: str) -> str:
+    """Fold case, accents and punctuation: "The Golden-State  Warriors!" -> "the golden state warriors"."""
+    text = unicodedata.normalize("NFKD", subject)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = text.replace("&", " and ").replace("-", " ").replace("_", " ")
+    return " ".join(_NON_WORD.sub("", text.casefold()).split())
+
+
+class ProfileCache:
+    """
+    SQLite store of research profiles keyed by canonical subject and prompt version.
+
+    Each entry has its own TTL. Past it the entry is stale but still served
+    (for up to `max_stale` seconds) while a refresh runs. Aliases ("gsw",
+    "warriors") map onto one canonical subject and are kept in the same
+    database and looked up there, so every process on the host shares them.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 86400, max_stale: float = 30 * 86400):
+        self.path = path
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._db = ThreadLocalSQLite(path)
+        self._connection().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS profiles (
+                subject_key TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                profile TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (subject_key, prompt_version)
+            );
+            CREATE TABLE IF NOT EXISTS aliases (
+                alias TEXT PRIMARY KEY,
+                subject_key TEXT NOT NULL
+            );
+            """
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._db.connection()
+
+    def subject_key(self, subject: str) -> str:
+        """Canonical subject with aliases resolved"""
+        key = canonicalize_subject(subject)
+        row = self._connection().execute("SELECT subject_key FROM aliases WHERE alias = ?", (key,)).fetchone()
+        return row[0] if row else key
+
+    def add_aliases(self, aliases: Dict[str, str]) -> None:
+        """Map each alias onto a subject, e.g. {"GSW": "Golden State Warriors"}."""
+        rows = [(canonicalize_subject(alias), canonicalize_subject(subject)) for alias, subject in aliases.items()]
+        self._connection().executemany(
+            "INSERT OR REPLACE INTO aliases (alias, subject_key) VALUES (?, ?)", rows
+        )
+
+    def get(self, subject: str, prompt_version: str) -> Optional[Tuple[Dict[str, Any], str, float]]:
+        """
+        Returns:
+            (profile, FRESH or STALE, age in seconds), or None if missing or
+            too stale to serve
+        """
+        row = self._connection().execute(
+            "SELECT profile, created_at, expires_at FROM profiles WHERE subject_key = ? AND prompt_version = ?",
+            (self.subject_key(subject), prompt_version),
+        ).fetchone()
+        if row is None:
+            return None
+        profile, created_at, expires_at = row
+        now = time.time()
+        if now > expires_at + self.max_stale:
+            return None
+        return json.loads(profile), (FRESH if now <= expires_at else STALE), now - created_at
+
+    def put(self, subject: str, prompt_version: str, profile: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO profiles "
+            "(subject_key, prompt_version, subject, profile, created_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.subject_key(subject), prompt_version, subject, json.dumps(profile), now,
+             now + (self.ttl if ttl is None else ttl)),
+        )
+
+    def entity_type(self, subject: str) -> Optional[str]:
+        """`entity_type` of the newest profile stored for the subject under any prompt version"""
+        row = self._connection().execute(
+            "SELECT profile FROM profiles WHERE subject_key = ? ORDER BY created_at DESC LIMIT 1",
+            (self.subject_key(subject),),
+        ).fetchone()
+        if row is None:
+            return None
+        entity_type = json.loads(row[0]).get("entity_type")
+        return entity_type if isinstance(entity_type, str) else None
+
+    def stats(self) -> Dict[str, int]:
+        now = time.time()
+        conn = self._connection()
+        total, fresh = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(expires_at >= ?), 0) FROM profiles", (now,)
+        ).fetchone()
+        aliases = conn.execute("SELECT COUNT(*) FROM aliases").fetchone()[0]
+        return {"entries": total, "fresh": fresh, "stale": total - fresh, "aliases": aliases}
+
+
+class CachedResearch:
+    """
+    Serves research profiles from a ProfileCache in front of `research`.
+
+    Fresh entries are returned directly. Stale entries are returned at once,
+    and a refresh is started in the background (one per subject at a time).
+    Misses run `research` in the caller's thread, or `stream` (an agent's
+    event stream, see SportsPartnerResearchAgent.stream) for `stream()`.
+    """
+
+    def __init__(
+        self,
+        research: Callable[[str], Dict[str, Any]],
+        cache: Optional[ProfileCache],
+        prompt_version: str,
+        refresh_workers: int = 2,
+        stream: Optional[Callable[[str], Iterator[Tuple[str, Dict[str, Any]]]]] = None,
+    ):
+        self._research = research
+        self._stream = stream
+        self.cache = cache
+        self.prompt_version = prompt_version
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="research-refresh")
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def subject_key(self, subject: str) -> str:
+        """Canonical subject (aliases resolved when the cache is on)"""
+        return self.cache.subject_key(subject) if self.cache is not None else canonicalize_subject(subject)
+
+    def research(self, subject: str, refresh: bool = False) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Returns:
+            (profile, cache info) where cache info is
+            {"status": "hit" | "stale" | "miss", "age_seconds": float, "subject_key": str}
+        """
+        if self.cache is None:
+            return self._research(subject), {"status": MISS, "age_seconds": 0.0, "subject_key": None}
+
+        key = self.cache.subject_key(subject)
+        cached = None if refresh else self.cache.get(subject, self.prompt_version)
+        if cached is not None:
+            profile, status, age = cached
+            if status == STALE:
+                self._refresh_in_background(subject, key)
+            return profile, {"status": status, "age_seconds": round(age, 1), "subject_key": key}
+
+        profile = self._research(subject)
+        self.cache.put(subject, self.prompt_version, profile)
+        return profile, {"status": MISS, "age_seconds": 0.0, "subject_key": key}
+
+    def stream(self, subject: str, refresh: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streamed `research`: yields ("section", {"name", "value"}) per
+        top-level profile field, then ("complete", {"profile", "cache", ...}).
+        Cached profiles are replayed at once; misses pass the agent's events
+        through (including "classified") and cache the finished profile.
+        """
+        key = self.subject_key(subject)
+        cached = None if refresh or self.cache is None else self.cache.get(subject, self.prompt_version)
+        if cached is not None:
+            profile, status, age = cached
+            if status == STALE:
+                self._refresh_in_background(subject, key)
+            info = {"status": status, "age_seconds": round(age, 1), "subject_key": key}
+            for event, payload in _replay(profile):
+                yield event, ({**payload, "cache": info} if event == "complete" else payload)
+            return
+
+        info = {"status": MISS, "age_seconds": 0.0, "subject_key": key if self.cache is not None else None}
+        events = self._stream(subject) if self._stream is not None else _replay(self._research(subject))
+        for event, payload in events:
+            if event == "complete":
+                if self.cache is not None:
+                    self.cache.put(subject, self.prompt_version, payload["profile"])
+                payload = {**payload, "cache": info}
+            yield event, payload
+
+    def _refresh_in_background(self, subject: str, key: str) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._refresh, subject, key)
+
+    def _refresh(self, subject: str, key: str) -> None:
+        try:
+            self.cache.put(subject, self.prompt_version, self._research(subject))
+        except Exception:
+            # The stale profile keeps being served; the next request retries
+            logger.exception("Background research refresh failed for %s", subject)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+def _replay(profile: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """A finished profile as the events of a streamed one"""
+    for name, value in profile.items():
+        yield "section", {"name": name, "value": value}
+    yield "complete", {"profile": profile}
+
+
+def create_profile_cache() -> Optional[ProfileCache]:
+    """
+    Cache configured from RESEARCH_CACHE_PATH (empty disables it),
+    RESEARCH_CACHE_TTL, RESEARCH_CACHE_MAX_STALE and RESEARCH_ALIASES_PATH
+    (a JSON object of alias -> subject loaded into the alias table).
+    """
+    path = os.getenv("RESEARCH_CACHE_PATH", ".cache/research.sqlite3")
+    if not path:
+        return None
+    cache = ProfileCache(
+        path,
+        ttl=float(os.getenv("RESEARCH_CACHE_TTL", str(7 * 86400))),
+        max_stale=float(os.getenv("RESEARCH_CACHE_MAX_STALE", str(30 * 86400))),
+    )
+    aliases_path = os.getenv("RESEARCH_ALIASES_PATH")
+    if aliases_path:
+        with open(aliases_path, encoding="utf-8") as f:
+            cache.add_aliases(json.load(f))
+    return cache
@@ -1,22 +1,241 @@
+import hashlib
 import json
+import logging
 import os
 import re
 import textwrap
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional, Tuple
 
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+try:
+    from .json_stream import IncrementalJSONParser, parse_json_response
+    from .profile_cache import canonicalize_subject
+except ImportError:  # run as a script from agent/ (server.py)
+    from json_stream import IncrementalJSONParser, parse_json_response
+    from profile_cache import canonicalize_subject
+
+logger = logging.getLogger(__name__)
+
+# Type-specific schemas used to enforce consistent JSON outputs
+PROFILE_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "sports_team": {
+        "entity_name": "",
+        "entity_type": "sports_team",
+        "overview": "",
+        "founded_year": None,
+        "home_city_or_region": "",
+        "league_or_competition": "",
+        "key_personnel": [
+            {"name": "", "title": ""},
+        ],
+        "recent_performance": {
+            "last_season_result": "",
+            "current_form": "",
+            "star_players": [
+                {"name": "", "position": "", "note": ""},
+            ],
+        },
+        "home_venue": {
+            "name": "",
+            "capacity": "",
+            "attendance_trend": "",
+        },
+        "audience": {
+            "demographics": [
+                {"group": "", "percentage": "", "notes": ""},
+            ],
+            "top_markets": [],
+            "social_following": [
+                {"platform": "", "followers": "", "engagement_notes": ""},
+            ],
+            "brand_sentiment": "",
+        },
+        "commercial_profile": {
+            "primary_sponsors": [],
+            "recent_deals": [],
+            "media_rights_notes": "",
+        },
+        "partnership_opportunities": {
+            "ideal_categories": [],
+            "activation_ideas": [],
+            "past_partnerships": [],
+        },
+        "risks": [
+            {"type": "", "detail": "", "mitigation": ""},
+        ],
+        "data_confidence": {"overall": "medium", "reasoning": ""},
+        "sources": [],
+    },
+    "company": {
+        "entity_name": "",
+        "entity_type": "company",
+        "overview": "",
+        "founded_year": None,
+        "headquarters": "",
+        "industry": "",
+        "key_personnel": [
+            {"name": "", "title": ""},
+        ],
+        "products_or_services": [],
+        "target_customers": [],
+        "market_position": {
+            "market_share": "",
+            "competitive_advantages": [],
+            "notable_competitors": [],
+        },
+        "financial_highlights": {
+            "revenue": "",
+            "valuation_or_market_cap": "",
+            "funding_or_investors": "",
+            "recent_growth_notes": "",
+        },
+        "go_to_market": {
+            "sales_motion": "",
+            "marketing_channels": [],
+            "partnerships_or_sponsorships": [],
+        },
+        "partnership_opportunities": {
+            "ideal_assets": [],
+            "potential_initiatives": [],
+            "proof_points": [],
+        },
+        "risks": [
+            {"type": "", "detail": "", "mitigation": ""},
+        ],
+        "data_confidence": {"overall": "medium", "reasoning": ""},
+        "sources": [],
+    },
+}
+
+
+_PROMPT_TEMPLATE = textwrap.dedent(
+    """
+    You are a senior strategist building a partnership dossier for {kind}.
+    Research subject: "{subject}".
+
+    - Research recent, verifiable information (use data up to 2024).
+    - Populate every field of the schema below with concise facts; use null or empty strings when unknown.
+    - Keep `entity_type` as "{entity_type}".
+    - For lists, include 3-5 strong, non-generic items.
+    - Return ONE JSON object matching the schema.
+
+    Schema:
+    {schema_json}
+    """
+).strip()
+
+_ENTITY_KINDS = {
+    "sports_team": "a sports team (club, franchise or collegiate program)",
+    "company": "a company or brand",
+}
+
+CLASSIFIER_PROMPT = (
+    'Is "{subject}" a sports team (club, franchise or collegiate program) or a company/brand? '
+    "Answer with exactly one word: sports_team or company."
+)
+
+
+def _compile_prompts() -> Dict[str, Tuple[str, str]]:
+    """Render one research prompt per entity type once; only the subject changes per call."""
+    prompts = {}
+    for entity_type, schema in PROFILE_SCHEMAS.items():
+        template = _PROMPT_TEMPLATE.replace("{kind}", _ENTITY_KINDS[entity_type]).replace(
+            "{entity_type}", entity_type
+        ).replace("{schema_json}", json.dumps(schema))
+        head, tail = template.split("{subject}")
+        prompts[entity_type] = (head, tail)
+    return prompts
+
+
+_PROMPTS = _compile_prompts()
+
+# Stable hash of every research prompt; caches key research results on it
+PROMPT_VERSION = hashlib.sha256(
+    "\n".join(
+        f"{entity_type}:{head}{{subject}}{tail}" for entity_type, (head, tail) in sorted(_PROMPTS.items())
+    ).encode("utf-8")
+).hexdigest()[:12]
+
+# Stage 1 keyword lists, matched against the canonical subject
+# ("golden state warriors"). Words that are also common in company names
+# ("heat", "magic", "union", "galaxy") are left to the model.
+_SPORTS_WORDS = frozenset(
+    """
+    fc cf sc afc ac nba nfl mlb nhl mls wnba nwsl ncaa football basketball baseball hockey soccer
+    volleyball lacrosse rugby cricket softball
+    """.split()
+)
+_CLUB_SUFFIXES = frozenset("united athletic albion hotspur wanderers rovers county".split())
+# Team nicknames, matched only after a place name ("Detroit Lions", not "Lions")
+_TEAM_NICKNAMES = frozenset(
+    """
+    hawks celtics hornets bulls cavaliers mavericks nuggets pistons warriors rockets pacers clippers
+    lakers grizzlies bucks timberwolves pelicans knicks 76ers sixers blazers spurs raptors wizards
+    falcons ravens bills panthers bears bengals browns cowboys broncos lions packers texans colts
+    jaguars chiefs raiders chargers rams dolphins vikings patriots jets eagles steelers 49ers niners
+    seahawks buccaneers bucs titans commanders diamondbacks braves orioles cubs guardians rockies
+    tigers astros dodgers marlins brewers mets yankees athletics phillies pirates padres mariners
+    cardinals rays rangers ducks bruins sabres flames hurricanes blackhawks oilers canadiens
+    predators devils islanders senators flyers penguins sharks kraken canucks capitals sounders
+    timbers earthquakes whitecaps
+    """.split()
+) | {"red sox", "white sox", "blue jays", "trail blazers", "blue jackets", "red wings", "maple leafs",
+     "golden knights", "red bulls"}
+_COMPANY_WORDS = frozenset(
+    """
+    inc incorporated corp corporation co company llc ltd limited plc gmbh ag group holdings brands
+    technologies technology labs systems software bank airlines motors foods beverages pharmaceuticals
+    """.split()
+)
+
+
+def classify_by_keywords(subject: str) -> Optional[str]:
+    """
+    Entity type from naming conventions alone ("Arsenal FC", "Detroit Lions",
+    "Acme Corp"), or None when the name is ambiguous.
+    """
+    tokens = canonicalize_subject(subject).split()
+    if not tokens:
+        return None
+    sports = bool(_SPORTS_WORDS.intersection(tokens)) or tokens[-1] in _CLUB_SUFFIXES or (
+        len(tokens) > 1 and (tokens[-1] in _TEAM_NICKNAMES or " ".join(tokens[-2:]) in _TEAM_NICKNAMES)
+    )
+    company = bool(_COMPANY_WORDS.intersection(tokens)) or bool(re.search(r"\.(com|io|ai)\b", subject.lower()))
+    if sports != company:
+        return "sports_team" if sports else "company"
+    return None
+
+
+class ResearchResult(NamedTuple):
+    profile: Dict[str, Any]
+    entity_type: str
+    # How stage 1 decided: "given", "lookup", "keywords" or "model"
+    classified_by: str
+    # Seconds spent per stage: {"classify": ..., "generate": ...}
+    timings: Dict[str, float]
+
 
 class SportsPartnerResearchAgent:
     """
     Gemini-powered research agent that produces a structured profile for either
     a sports team or a traditional company/brand.
+
+    Research runs in two stages. Stage 1 decides the entity type: from
+    `type_lookup` (e.g. a previously cached profile), then keyword
+    heuristics, and only if both are inconclusive a one-word answer from
+    `classifier_model`. Stage 2 sends just the matching schema to the
+    research model in JSON response mode.
     """
 
     def __init__(
         self,
         model_name: str = "gemini-flash-latest",
+        request_options: Optional[Dict[str, Any]] = None,
+        classifier_model: Optional[str] = None,
+        type_lookup: Optional[Callable[[str], Optional[str]]] = None,
     ) -> None:
         load_dotenv()
         self.api_key = os.getenv("GEMINI_API_KEY")
@@ -25,152 +244,153 @@ class SportsPartnerResearchAgent:
 
         genai.configure(api_key=self.api_key)
         self.model_name = model_name
+        self.classifier_model_name = classifier_model or os.getenv(
+            "RESEARCH_CLASSIFIER_MODEL", "gemini-flash-lite-latest"
+        )
+        # Passed to every generate_content call (e.g. {"timeout": 60})
+        self.request_options = request_options or {}
+        self.type_lookup = type_lookup
+        # Model clients are stateless per request, so one instance each is reused
+        self._model = genai.GenerativeModel(
+            model_name, generation_config={"response_mime_type": "application/json"}
+        )
+        self._classifier = genai.GenerativeModel(
+            self.classifier_model_name, generation_config={"temperature": 0, "max_output_tokens": 5}
+        )
 
     def _profile_schemas(self) -> Dict[str, Dict[str, Any]]:
         """Return the type-specific schemas used to enforce consistent JSON outputs."""
-        return {
-            "sports_team": {
-                "entity_name": "",
-                "entity_type": "sports_team",
-                "overview": "",
-                "founded_year": None,
-                "home_city_or_region": "",
-                "league_or_competition": "",
-                "key_personnel": [
-                    {"name": "", "title": ""},
-                ],
-                "recent_performance": {
-                    "last_season_result": "",
-                    "current_form": "",
-                    "star_players": [
-                        {"name": "", "position": "", "note": ""},
-                    ],
-                },
-                "home_venue": {
-                    "name": "",
-                    "capacity": "",
-                    "attendance_trend": "",
-                },
-                "audience": {
-                    "demographics": [
-                        {"group": "", "percentage": "", "notes": ""},
-                    ],
-                    "top_markets": [],
-                    "social_following": [
-                        {"platform": "", "followers": "", "engagement_notes": ""},
-                    ],
-                    "brand_sentiment": "",
-                },
-                "commercial_profile": {
-                    "primary_sponsors": [],
-                    "recent_deals": [],
-                    "media_rights_notes": "",
-                },
-                "partnership_opportunities": {
-                    "ideal_categories": [],
-                    "activation_ideas": [],
-                    "past_partnerships": [],
-                },
-                "risks": [
-                    {"type": "", "detail": "", "mitigation": ""},
-                ],
-                "data_confidence": {"overall": "medium", "reasoning": ""},
-                "sources": [],
-            },
-            "company": {
-                "entity_name": "",
-                "entity_type": "company",
-                "overview": "",
-                "founded_year": None,
-                "headquarters": "",
-                "industry": "",
-                "key_personnel": [
-                    {"name": "", "title": ""},
-                ],
-                "products_or_services": [],
-                "target_customers": [],
-                "market_position": {
-                    "market_share": "",
-                    "competitive_advantages": [],
-                    "notable_competitors": [],
-                },
-                "financial_highlights": {
-                    "revenue": "",
-                    "valuation_or_market_cap": "",
-                    "funding_or_investors": "",
-                    "recent_growth_notes": "",
-                },
-                "go_to_market": {
-                    "sales_motion": "",
-                    "marketing_channels": [],
-                    "partnerships_or_sponsorships": [],
-                },
-                "partnership_opportunities": {
-                    "ideal_assets": [],
-                    "potential_initiatives": [],
-                    "proof_points": [],
-                },
-                "risks": [
-                    {"type": "", "detail": "", "mitigation": ""},
-                ],
-                "data_confidence": {"overall": "medium", "reasoning": ""},
-                "sources": [],
-            },
-        }
+        return PROFILE_SCHEMAS
 
-    def _build_prompt(self, subject: str) -> str:
-        schemas = self._profile_schemas()
-        sports_schema_json = json.dumps(schemas["sports_team"], indent=2)
-        company_schema_json = json.dumps(schemas["company"], indent=2)
-        return textwrap.dedent(
-            f"""
-            You are a senior strategist building a partnership dossier for either a sports team or a traditional company/brand.
-            Research subject: "{subject}".
-
-            - Decide if the subject is a "sports_team" (club, franchise, collegiate program) or a "company" (brand/business).
-            - Use the matching schema below and set `entity_type` accordingly. Return only ONE JSON object for the chosen schema.
-            - Research recent, verifiable information (use data up to 2024).
-            - Populate every field with concise facts; use null or empty strings when unknown.
-            - For lists, include 3-5 strong, non-generic items.
-            - Return ONLY valid JSON, no markdown fences or prose.
-
-            Sports Team schema:
-            {sports_schema_json}
-
-            Company/Brand schema:
-            {company_schema_json}
-            """
-        ).strip()
+    def _build_prompt(self, subject: str, entity_type: str) -> str:
+        head, tail = _PROMPTS[entity_type]
+        return head + subject + tail
 
     def _extract_json(self, text: str) -> Dict[str, Any]:
         """Extract and parse JSON from the model response."""
-        if not text:
-            raise ValueError("Model returned an empty response.")
+        return parse_json_response(text)
+
+    def classify(self, subject: str) -> Tuple[str, str]:
+        """
+        Stage 1: decide whether the subject is a sports team or a company.
+
+        Returns:
+            (entity_type, how it was decided: "lookup", "keywords" or "model")
+        """
+        if self.type_lookup is not None:
+            try:
+                known = self.type_lookup(subject)
+            except Exception as exc:
+                logger.warning("Entity type lookup failed for %s: %s", subject, exc)
+                known = None
+            if known in PROFILE_SCHEMAS:
+                return known, "lookup"
+
+        entity_type = classify_by_keywords(subject)
+        if entity_type is not None:
+            return entity_type, "keywords"
+
+        response = self._classifier.generate_content(
+            CLASSIFIER_PROMPT.format(subject=subject), request_options=self.request_options
+        )
+        answer = (response.text if hasattr(response, "text") else "").strip().lower()
+        if "sports" in answer:
+            return "sports_team", "model"
+        if "company" not in answer:
+            logger.warning("Unclear entity type %r for %s, researching as a company", answer, subject)
+        return "company", "model"
+
+    def _stage_one(self, subject: str, entity_type: Optional[str]) -> Tuple[str, str, str]:
+        """Validate the inputs and classify the subject: (subject, entity_type, classified_by)"""
+        if not subject or not subject.strip():
+            raise ValueError("Subject must be a non-empty string.")
+        subject = subject.strip()
+        if entity_type is None:
+            return (subject, *self.classify(subject))
+        if entity_type not in PROFILE_SCHEMAS:
+            raise ValueError(f"entity_type must be one of {sorted(PROFILE_SCHEMAS)}.")
+        return subject, entity_type, "given"
 
-        fenced_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", text, re.S)
-        if fenced_match:
-            text = fenced_match.group(1)
+    def run(self, subject: str, entity_type: Optional[str] = None) -> ResearchResult:
+        """
+        Run both research stages and return the profile with per-stage timings.
+        Pass `entity_type` to skip stage 1.
+        """
+        started = time.perf_counter()
+        subject, entity_type, classified_by = self._stage_one(subject, entity_type)
+        classified = time.perf_counter()
+
+        response = self._model.generate_content(
+            self._build_prompt(subject, entity_type), request_options=self.request_options
+        )
+        profile = self._extract_json(response.text if hasattr(response, "text") else "")
+        profile["entity_type"] = entity_type
+        finished = time.perf_counter()
+
+        timings = {"classify": round(classified - started, 4), "generate": round(finished - classified, 4)}
+        logger.info(
+            "Researched %s as %s (%s): classify %.3fs, generate %.3fs",
+            subject, entity_type, classified_by, timings["classify"], timings["generate"],
+        )
+        return ResearchResult(profile, entity_type, classified_by, timings)
+
+    def stream(self, subject: str, entity_type: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        `run` with streamed generation. Yields:
+            ("classified", {"entity_type", "classified_by"}) after stage 1
+            ("section", {"name", "value"}) as each top-level profile field closes
+            ("complete", {"profile", "entity_type", "classified_by", "timings"})
+        Timings add "first_section", the seconds from the generation request
+        to the first section.
+        """
+        started = time.perf_counter()
+        subject, entity_type, classified_by = self._stage_one(subject, entity_type)
+        classified = time.perf_counter()
+        yield "classified", {"entity_type": entity_type, "classified_by": classified_by}
 
-        brace_match = re.search(r"(\{.*\})", text, re.S)
-        candidate = brace_match.group(1) if brace_match else text
+        parser = IncrementalJSONParser(emit=lambda path: len(path) == 1)
+        first_section = None
+        response = self._model.generate_content(
+            self._build_prompt(subject, entity_type), stream=True, request_options=self.request_options
+        )
+        for chunk in response:
+            for (name,), value in parser.feed(_chunk_text(chunk)):
+                if name == "entity_type":
+                    continue  # already decided in stage 1
+                if first_section is None:
+                    first_section = time.perf_counter()
+                yield "section", {"name": name, "value": value}
+            if parser.done:
+                break
+        profile = parser.result()
+        profile["entity_type"] = entity_type
+        finished = time.perf_counter()
 
-        try:
-            return json.loads(candidate)
-        except json.JSONDecodeError as exc:
-            raise ValueError(f"Failed to parse model JSON: {exc}") from exc
+        timings = {
+            "classify": round(classified - started, 4),
+            "first_section": round((first_section or finished) - classified, 4),
+            "generate": round(finished - classified, 4),
+        }
+        logger.info(
+            "Streamed research for %s as %s (%s): classify %.3fs, first section %.3fs, generate %.3fs",
+            subject, entity_type, classified_by, timings["classify"], timings["first_section"], timings["generate"],
+        )
+        yield "complete", {
+            "profile": profile, "entity_type": entity_type, "classified_by": classified_by, "timings": timings
+        }
 
-    def research(self, subject: str) -> Dict[str, Any]:
+    def research(self, subject: str, entity_type: Optional[str] = None) -> Dict[str, Any]:
         """
         Run Gemini research on the subject (sports team or brand) and
         return a structured profile as a Python dict.
         """
-        if not subject or not subject.strip():
-            raise ValueError("Subject must be a non-empty string.")
-
-        prompt = self._build_prompt(subject.strip())
-        model = genai.GenerativeModel(self.model_name)
-        response = model.generate_content(prompt)
-        text = response.text if hasattr(response, 'text') else ""
+        return self.run(subject, entity_type).profile
 
-        return self._extract_json(text)
 
+def _chunk_text(chunk: Any) -> str:
+    # Chunks without text parts (e.g. the final one carrying only the finish
+    # reason) raise on .text
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
@@ -0,0 +1,98 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResearchBatchRunner:
+    """
+    Researches many subjects at once on one pool shared by every batch in the
+    process, so concurrent batches together never run more than
+    `max_concurrency` profiles. Subjects with the same canonical key ("GSW",
+    "Golden State Warriors") are researched once.
+    """
+
+    def __init__(
+        self,
+        research: Callable[..., Tuple[Dict[str, Any], Dict[str, Any]]],
+        key: Callable[[str], str],
+        max_concurrency: int = 8,
+        max_items: int = 200,
+    ):
+        self._research = research
+        self._key = key
+        self.max_items = max_items
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="research-batch")
+
+    def run(self, subjects: List[Any], refresh: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Research `subjects` and yield one result per entry as it finishes,
+        then a summary. Invalid entries are yielded first. If the consumer
+        stops iterating (client disconnected), subjects that have not started
+        are cancelled.
+        """
+        started = time.monotonic()
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        succeeded = failed = 0
+
+        for index, subject in enumerate(subjects):
+            item: Dict[str, Any] = {"index": index, "subject": subject}
+            key = self._key(subject.strip()) if isinstance(subject, str) else ""
+            if not key:
+                failed += 1
+                yield {**item, "success": False, "error": "Each subject must be a non-empty string"}
+                continue
+            item["subject"] = subject.strip()
+            if key in groups:
+                item["duplicate_of"] = groups[key][0]["index"]
+            else:
+                groups[key] = []
+            groups[key].append(item)
+
+        futures = {
+            self._executor.submit(self._research, items[0]["subject"], refresh=refresh): key
+            for key, items in groups.items()
+        }
+        try:
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    profile, cache = future.result()
+                    outcome = {"success": True, "profile": profile, "cache": cache}
+                except Exception as exc:
+                    logger.warning("Batch research failed for %s: %s", groups[key][0]["subject"], exc)
+                    outcome = {"success": False, "error": str(exc)}
+                for item in groups[key]:
+                    if outcome["success"]:
+                        succeeded += 1
+                    else:
+                        failed += 1
+                    yield {**item, "subject_key": key, **outcome}
+        finally:
+            for future in futures:
+                future.cancel()
+
+        yield {
+            "summary": {
+                "total": len(subjects),
+                "unique": len(groups),
+                "succeeded": succeeded,
+                "failed": failed,
+                "elapsed_seconds": round(time.monotonic() - started, 2),
+            }
+        }
+
+
+def create_research_batches(
+    research: Callable[..., Tuple[Dict[str, Any], Dict[str, Any]]], key: Callable[[str], str]
+) -> ResearchBatchRunner:
+    """Runner configured from RESEARCH_BATCH_CONCURRENCY and RESEARCH_BATCH_MAX_ITEMS"""
+    return ResearchBatchRunner(
+        research,
+        key,
+        max_concurrency=int(os.getenv("RESEARCH_BATCH_CONCURRENCY", "8")),
+        max_items=int(os.getenv("RESEARCH_BATCH_MAX_ITEMS", "200")),
+    )
@@ -1,11 +1,14 @@
+import json
 import os
 from typing import Optional
 
 from dotenv import load_dotenv
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 
-from research_agent import SportsPartnerResearchAgent
+from profile_cache import CachedResearch, create_profile_cache
+from research_batch import ResearchBatchRunner, create_research_batches
+from research_agent import PROMPT_VERSION, SportsPartnerResearchAgent
 
 # Load environment (expects GEMINI_API_KEY and optional HOST/PORT)
 load_dotenv()
@@ -14,22 +17,51 @@ app = Flask(__name__)
 CORS(app)
 
 _agent: Optional[SportsPartnerResearchAgent] = None
+_research: Optional[CachedResearch] = None
+_batches: Optional[ResearchBatchRunner] = None
 
 
 def get_agent() -> SportsPartnerResearchAgent:
     """Lazy-init the research agent so we fail fast on missing API key."""
     global _agent
     if _agent is None:
-        _agent = SportsPartnerResearchAgent()
+        _agent = SportsPartnerResearchAgent(type_lookup=_known_entity_type)
     return _agent
 
 
+def _known_entity_type(subject: str) -> Optional[str]:
+    cache = get_research().cache
+    return cache.entity_type(subject) if cache is not None else None
+
+
+def get_research() -> CachedResearch:
+    """Research behind the persistent profile cache."""
+    global _research
+    if _research is None:
+        _research = CachedResearch(
+            lambda subject: get_agent().research(subject),
+            create_profile_cache(),
+            PROMPT_VERSION,
+            refresh_workers=int(os.getenv("RESEARCH_REFRESH_WORKERS", "2")),
+            stream=lambda subject: get_agent().stream(subject),
+        )
+    return _research
+
+
+def get_batches() -> ResearchBatchRunner:
+    """Batch runner over the cached research, sharing one bounded pool."""
+    global _batches
+    if _batches is None:
+        _batches = create_research_batches(get_research().research, get_research().subject_key)
+    return _batches
+
+
 @app.route("/research", methods=["POST"])
 def research():
     """
     POST /research
-    Body: { "subject": "Golden State Warriors" }
-    Returns: { "subject": "...", "profile": { ...schema... } }
+    Body: { "subject": "Golden State Warriors", "refresh": false }
+    Returns: { "subject": "...", "profile": { ...schema... }, "cache": { "status", "age_seconds", "subject_key" } }
     """
     payload = request.get_json(silent=True) or {}
     subject = (payload.get("subject") or "").strip()
@@ -38,12 +70,74 @@ def research():
         return jsonify({"error": "subject is required"}), 400
 
     try:
-        profile = get_agent().research(subject)
-        return jsonify({"subject": subject, "profile": profile})
+        profile, cache = get_research().research(subject, refresh=bool(payload.get("refresh")))
+        return jsonify({"subject": subject, "profile": profile, "prompt_version": PROMPT_VERSION, "cache": cache})
     except Exception as exc:  # pragma: no cover - error path
         return jsonify({"error": str(exc)}), 500
 
 
+@app.route("/research/stream", methods=["POST"])
+def research_stream():
+    """
+    POST /research/stream
+    Body: { "subject": "Golden State Warriors", "refresh": false }
+    Server-Sent Events: "classified" (when generating), one "section" per
+    top-level profile field as it closes, then "complete" (the /research body)
+    or "error".
+    """
+    payload = request.get_json(silent=True) or {}
+    subject = (payload.get("subject") or "").strip()
+
+    if not subject:
+        return jsonify({"error": "subject is required"}), 400
+
+    def events():
+        try:
+            for event, data in get_research().stream(subject, refresh=bool(payload.get("refresh"))):
+                if event == "complete":
+                    data = {"subject": subject, "prompt_version": PROMPT_VERSION, **data}
+                yield _sse(event, data)
+        except Exception as exc:  # pragma: no cover - error path
+            yield _sse("error", {"error": str(exc)})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, payload) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.route("/research/batch", methods=["POST"])
+def research_batch():
+    """
+    POST /research/batch
+    Body: { "subjects": ["Golden State Warriors", "GSW", "Nike"], "refresh": false }
+    Streams NDJSON in completion order, one line per subject, then a summary line.
+    """
+    payload = request.get_json(silent=True) or {}
+    subjects = payload.get("subjects")
+
+    if not isinstance(subjects, list) or not subjects:
+        return jsonify({"error": "subjects must be a non-empty list"}), 400
+    batches = get_batches()
+    if len(subjects) > batches.max_items:
+        return jsonify({"error": f"Batch too large (maximum {batches.max_items} subjects)"}), 400
+
+    def lines():
+        for result in batches.run(subjects, refresh=bool(payload.get("refresh"))):
+            yield json.dumps(result) + "\n"
+
+    return Response(
+        stream_with_context(lines()),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "5001"))
@@ -2,30 +2,42 @@ from flask import Flask
 from flask_cors import CORS
 from flask_socketio import SocketIO
 from dotenv import load_dotenv
+import logging
 import os
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Get allowed origins for CORS
 allowed_origins = os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
 
+# With several workers, room emits go through a shared message queue
+# (e.g. redis://host:6379/0) so any worker can reach any session's room.
+# Clients must be pinned to one worker (sticky sessions), which also keeps
+# per-session turn scheduling and barge-in cancellation process-local.
 socketio = SocketIO(
     cors_allowed_origins=allowed_origins,
     async_mode='threading',
+    message_queue=os.getenv('SOCKETIO_MESSAGE_QUEUE') or None,
     ping_timeout=60,
     ping_interval=25,
     max_http_buffer_size=10000000,  # 10MB - handle large audio payloads
-    logger=True,
-    engineio_logger=True
+    # Per-packet Socket.IO logging is expensive on the audio path; opt in to debug
+    logger=os.getenv('SOCKETIO_LOGGER', 'false').lower() == 'true',
+    engineio_logger=os.getenv('SOCKETIO_LOGGER', 'false').lower() == 'true'
 )
 
 def create_app():
+    from app.logging_config import configure_logging
+    configure_logging()
+    
     app = Flask(__name__)
     
     # Configure CORS for all routes
     # Get allowed origins from environment or use defaults
     allowed_origins = os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
-    print(f"🔒 CORS allowed origins: {allowed_origins}")
+    logger.info("CORS allowed origins: %s", allowed_origins)
     
     CORS(app, resources={
         r"/*": {
@@ -42,13 +54,28 @@ def create_app():
     socketio.init_app(app)
     
     # Register routes
-    from app.routes import voice_routes, feedback_routes, research_routes
+    from app.routes import voice_routes, feedback_routes, research_routes, metrics_routes
     app.register_blueprint(voice_routes.bp)
     app.register_blueprint(feedback_routes.bp)
     app.register_blueprint(research_routes.bp)
+    app.register_blueprint(metrics_routes.bp)
+    
+    # Open provider connections before the first call needs them
+    if os.getenv('PROVIDER_WARMUP', 'true').lower() == 'true':
+        from app.clients.transport import provider_transport
+        provider_transport.warm_in_background()
+    
+    # Expire idle and abandoned voice sessions
+    from app.services.conversation_service import conversation_service
+    conversation_service.start_sweeper(interval=float(os.getenv('SESSION_SWEEP_INTERVAL', '60')))
     
     @app.route('/health', methods=['GET'])
     def health_check():
-        return {'status': 'healthy', 'port': os.getenv('PORT', '8080')}, 200
+        from app.services.prompt_templates import prompt_registry
+        return {
+            'status': 'healthy',
+            'port': os.getenv('PORT', '8080'),
+            'prompt_versions': prompt_registry.versions()
+        }, 200
     
     return app
\ No newline at end of file
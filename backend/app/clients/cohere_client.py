@@ -1,30 +1,22 @@
+import logging
 import os
-import cohere
-from typing import List, Dict
+import time
+from typing import List, Dict, Iterator, Optional
+from app.clients.transport import cohere_request_options, get_cohere_client, provider_transport
+from app.services.cancellation import CancelToken
+from app.services.metrics import TURN_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
 
 class CohereClient:
     def __init__(self):
         self.api_key = os.getenv('COHERE_API_KEY')
-        print(f"🔑 COHERE_API_KEY: {self.api_key[:10] if self.api_key else 'NOT FOUND'}...")
-        
         if not self.api_key:
             raise ValueError("COHERE_API_KEY not found in environment variables")
         
-        try:
-            # Try ClientV2 first (newer API)
-            self.client = cohere.ClientV2(self.api_key)
-            self.use_v2 = True
-            print(f"✅ Cohere ClientV2 initialized")
-        except Exception as e:
-            print(f"⚠️ ClientV2 failed, trying Client v1: {e}")
-            try:
-                # FallbackNo persona data found to v1 API
-                self.client = cohere.Client(self.api_key)
-                self.use_v2 = False
-                print(f"✅ Cohere Client (v1) initialized")
-            except Exception as e2:
-                print(f"❌ Both Cohere clients failed: {e2}")
-                raise
+        # Shared client on the keep-alive pool (ClientV2 with v1 fallback)
+        self.client, self.use_v2 = get_cohere_client()
+        logger.info("Cohere %s initialized", 'ClientV2' if self.use_v2 else 'Client (v1)')
     
     def generate_response(
         self, 
@@ -34,12 +26,11 @@ class CohereClient:
     ) -> str:
         """Generate AI response using Cohere"""
         
-        print("\n" + "="*60)
-        print(f"🤖 COHERE GENERATE_RESPONSE CALLED")
-        print(f"📝 User message: '{user_message}'")
-        print(f"📋 Persona prompt: {persona_prompt[:100]}...")
-        print(f"📚 Chat history length: {len(chat_history) if chat_history else 0}")
-        print("="*60 + "\n")
+        logger.debug(
+            "generate_response: message=%r history=%d",
+            user_message, len(chat_history) if chat_history else 0,
+            extra={'sampled': True}
+        )
         
         try:
             if self.use_v2:
@@ -47,77 +38,183 @@ class CohereClient:
             else:
                 return self._generate_v1(user_message, persona_prompt, chat_history)
         
-        except Exception as e:
-            print("\n" + "!"*60)
-            print(f"❌ CRITICAL ERROR in generate_response:")
-            print(f"Error type: {type(e).__name__}")
-            print(f"Error message: {str(e)}")
-            print("!"*60 + "\n")
-            
-            import traceback
-            traceback.print_exc()
-            
+        except Exception:
+            logger.exception("Cohere generate_response failed")
             return "I'm sorry, could you repeat that?"
     
-    def _generate_v2(self, user_message: str, persona_prompt: str, chat_history: List[Dict[str, str]]):
-        """Generate using Cohere v2 API"""
-        print("📡 Using Cohere API v2...")
-        
-        messages = []
-        messages.append({"role": "system", "content": persona_prompt})
-        
+    def stream_response(
+        self,
+        user_message: str,
+        persona_prompt: str,
+        chat_history: List[Dict[str, str]] = None,
+        cancel_token: Optional[CancelToken] = None
+    ) -> Iterator[str]:
+        """
+        Stream the AI response as text deltas using Cohere's chat stream.
+
+        Yields the fallback reply if the stream fails before producing any text,
+        so callers always have something to speak. Once `cancel_token` is
+        cancelled the stream is closed and nothing more is yielded.
+        """
+        produced = False
+        started = time.perf_counter()
+        try:
+            if self.use_v2:
+                deltas = self._stream_v2(user_message, persona_prompt, chat_history)
+            else:
+                deltas = self._stream_v1(user_message, persona_prompt, chat_history)
+            try:
+                for delta in deltas:
+                    if cancel_token and cancel_token.cancelled:
+                        return
+                    if delta:
+                        if not produced:
+                            TURN_STAGE_SECONDS.observe(time.perf_counter() - started, stage='llm_first_token')
+                        produced = True
+                        yield delta
+                TURN_STAGE_SECONDS.observe(time.perf_counter() - started, stage='llm_complete')
+            finally:
+                # Closing the generator closes the HTTP stream mid-generation
+                deltas.close()
+        except Exception:
+            logger.exception("Cohere stream failed")
+
+        if not produced and not (cancel_token and cancel_token.cancelled):
+            yield "I'm sorry, could you repeat that?"
+
+    def summarize_turns(self, previous_summary: str, turns: List[Dict[str, str]]) -> str:
+        """
+        Fold older call turns into the running summary.
+        
+        Only the previous summary and the newly folded turns are sent, so the
+        cost of each update stays constant as the call grows.
+        """
+        lines = "\n".join(
+            f"{'Sales rep' if turn['role'] == 'USER' else 'You (prospect)'}: {turn['message']}"
+            for turn in turns
+        )
+        prompt = f"""Update the running summary of a sales call from the prospect's point of view.
+
+Current summary:
+{previous_summary or '(none yet)'}
+
+New turns:
+{lines}
+
+Write the updated summary in at most 5 short bullet points. Keep facts the prospect learned, commitments, objections raised and open questions. Return only the bullets."""
+        
+        if self.use_v2:
+            response = provider_transport.call('cohere', lambda timeout: self.client.chat(
+                model="command-a-03-2025",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.2,
+                max_tokens=200,
+                **cohere_request_options(timeout)
+            ))
+            return response.message.content[0].text.strip()
+        
+        response = provider_transport.call('cohere', lambda timeout: self.client.chat(
+            message=prompt,
+            model='command-a-03-2025',
+            temperature=0.2,
+            max_tokens=200,
+            **cohere_request_options(timeout)
+        ))
+        return response.text.strip()
+
+    def _build_messages_v2(self, user_message: str, persona_prompt: str, chat_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        messages = [{"role": "system", "content": persona_prompt}]
+
+        # History arrives already budgeted by ConversationService.get_context
         if chat_history:
-            for turn in chat_history[-5:]:
+            for turn in chat_history:
                 role = "user" if turn["role"] == "USER" else "assistant"
                 messages.append({"role": role, "content": turn["message"]})
-        
+
         messages.append({"role": "user", "content": user_message})
+        return messages
+
+    def _build_history_v1(self, persona_prompt: str, chat_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        # Add persona as a SYSTEM message at the start
+        chat_history_v1 = [{"role": "SYSTEM", "message": persona_prompt}]
+
+        if chat_history:
+            for turn in chat_history:
+                role = "USER" if turn["role"] == "USER" else "CHATBOT"
+                chat_history_v1.append({"role": role, "message": turn["message"]})
+
+        return chat_history_v1
+
+    def _stream_v2(self, user_message: str, persona_prompt: str, chat_history: List[Dict[str, str]]) -> Iterator[str]:
+        """Stream using Cohere v2 API"""
+        stream = self.client.chat_stream(
+            model="command-a-03-2025",
+            messages=self._build_messages_v2(user_message, persona_prompt, chat_history),
+            temperature=0.7,
+            max_tokens=150,
+            **cohere_request_options()
+        )
+        try:
+            for event in stream:
+                if event.type == "content-delta":
+                    yield event.delta.message.content.text
+        finally:
+            stream.close()
+
+    def _stream_v1(self, user_message: str, persona_prompt: str, chat_history: List[Dict[str, str]]) -> Iterator[str]:
+        """Stream using Cohere v1 API (fallback)"""
+        stream = self.client.chat_stream(
+            message=user_message,
+            chat_history=self._build_history_v1(persona_prompt, chat_history),
+            model='command-a-03-2025',
+            temperature=0.7,
+            max_tokens=150,
+            **cohere_request_options()
+        )
+        try:
+            for event in stream:
+                if event.event_type == "text-generation":
+                    yield event.text
+        finally:
+            stream.close()
+
+    def _generate_v2(self, user_message: str, persona_prompt: str, chat_history: List[Dict[str, str]]):
+        """Generate using Cohere v2 API"""
+        messages = self._build_messages_v2(user_message, persona_prompt, chat_history)
         
-        print(f"📨 Sending {len(messages)} messages to Cohere v2")
-        
-        response = self.client.chat(
+        response = provider_transport.call('cohere', lambda timeout: self.client.chat(
             model="command-a-03-2025",
             messages=messages,
             temperature=0.7,
-            max_tokens=150
-        )
+            max_tokens=150,
+            **cohere_request_options(timeout)
+        ))
         
         ai_text = response.message.content[0].text.strip()
-        print(f"✅ Cohere v2 response: '{ai_text}'")
+        logger.debug("Cohere v2 response: %r", ai_text, extra={'sampled': True})
         return ai_text
     
     def _generate_v1(self, user_message: str, persona_prompt: str, chat_history: List[Dict[str, str]]):
         """Generate using Cohere v1 API (fallback)"""
-        print("📡 Using Cohere API v1 (fallback)...")
-        
         # Build chat history for v1 chat API
-        # Add persona as a SYSTEM message at the start
-        chat_history_v1 = [{"role": "SYSTEM", "message": persona_prompt}]
+        chat_history_v1 = self._build_history_v1(persona_prompt, chat_history)
         
-        if chat_history:
-            for turn in chat_history[-5:]:
-                role = "USER" if turn["role"] == "USER" else "CHATBOT"
-                chat_history_v1.append({"role": role, "message": turn["message"]})
-        
-        print(f"📨 Sending chat request to Cohere v1 with {len(chat_history_v1)} history items")
-        
-        response = self.client.chat(
+        response = provider_transport.call('cohere', lambda timeout: self.client.chat(
             message=user_message,
             chat_history=chat_history_v1,
             model='command-a-03-2025',
             temperature=0.7,
-            max_tokens=150
-        )
+            max_tokens=150,
+            **cohere_request_options(timeout)
+        ))
         
         ai_text = response.text.strip()
-        print(f"✅ Cohere v1 response: '{ai_text}'")
+        logger.debug("Cohere v1 response: %r", ai_text, extra={'sampled': True})
         return ai_text
 
 # Singleton instance
-print("🔄 Initializing Cohere client singleton...")
 try:
     cohere_client = CohereClient()
-    print("✅ Cohere client singleton created successfully")
-except Exception as e:
-    print(f"❌ Failed to create Cohere client: {e}")
+except Exception:
+    logger.exception("Failed to create Cohere client")
     raise
\ No newline at end of file
@@ -1,62 +1,111 @@
+import logging
 import os
+import time
 from elevenlabs.client import ElevenLabs
 from elevenlabs import VoiceSettings
+from typing import Optional
+from app.clients.transport import provider_transport
+from app.services.audio_transport import AudioBuffer
+from app.services.cancellation import CancelToken
+from app.services.metrics import TURN_STAGE_SECONDS
+from app.services.tts_cache import cache_key, tts_cache
+
+logger = logging.getLogger(__name__)
 
 class ElevenLabsClient:
     def __init__(self):
         self.api_key = os.getenv('ELEVENLABS_API_KEY')
         self.voice_id = os.getenv('ELEVENLABS_VOICE_ID', '21m00Tcm4TlvDq8ikWAM')
-        self.client = ElevenLabs(api_key=self.api_key)
+        self.model_id = "eleven_turbo_v2_5"
+        self.voice_settings = {
+            'stability': 0.5,
+            'similarity_boost': 0.75,
+            'style': 0.0,
+            'use_speaker_boost': True
+        }
+        # Shared keep-alive pool with connect/read timeouts
+        self.client = ElevenLabs(
+            api_key=self.api_key,
+            httpx_client=provider_transport.http_client('elevenlabs'),
+            timeout=provider_transport.policies['elevenlabs'].read_timeout
+        )
+    
+    def cache_key(self, text: str) -> str:
+        """Cache key for this text under the current voice configuration"""
+        return cache_key(self.voice_id, self.model_id, self.voice_settings, text)
     
-    def text_to_speech(self, text: str) -> bytes:
+    def text_to_speech(self, text: str, cancel_token: Optional[CancelToken] = None) -> bytes:
         """
         Convert text to speech audio
         
         Args:
             text: Text to convert
+            cancel_token: Stops the request (and returns b'') once cancelled
         
         Returns:
             Audio bytes (MP3)
         """
         try:
             if not self.api_key:
-                print("❌ ELEVENLABS_API_KEY not set!")
+                logger.error("ELEVENLABS_API_KEY not set")
+                return b''
+            
+            if cancel_token and cancel_token.cancelled:
                 return b''
             
-            print(f"🎙️ ElevenLabs TTS request:")
-            print(f"   Voice ID: {self.voice_id}")
-            print(f"   Text length: {len(text)} chars")
-            print(f"   Text preview: {text[:100]}...")
+            # Repeated persona phrases are served from the cache
+            key = self.cache_key(text)
+            cached = tts_cache.get(key)
+            if cached is not None:
+                return cached
             
-            # Use the correct API method
-            audio_generator = self.client.text_to_speech.convert(
-                voice_id=self.voice_id,
-                text=text,
-                model_id="eleven_turbo_v2_5",
-                voice_settings=VoiceSettings(
-                    stability=0.5,
-                    similarity_boost=0.75,
-                    style=0.0,
-                    use_speaker_boost=True
-                )
+            logger.debug(
+                "ElevenLabs TTS request: voice=%s chars=%d",
+                self.voice_id, len(text),
+                extra={'sampled': True}
             )
             
-            # Collect audio chunks
-            audio_data = b''
-            chunk_count = 0
-            for chunk in audio_generator:
-                if chunk:
-                    audio_data += chunk
-                    chunk_count += 1
+            buffer = provider_transport.call('elevenlabs', lambda timeout: self._synthesize(text, cancel_token, timeout))
+            if buffer is None:
+                return b''
             
-            print(f"✅ ElevenLabs TTS success: {len(audio_data)} bytes in {chunk_count} chunks")
+            logger.debug(
+                "ElevenLabs TTS success: %d bytes in %d chunks",
+                len(buffer), buffer.chunk_count,
+                extra={'sampled': True}
+            )
+            audio_data = buffer.getvalue()
+            tts_cache.put(key, audio_data)
             return audio_data
         
-        except Exception as e:
-            print(f"❌ ElevenLabs TTS error: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("ElevenLabs TTS failed")
             return b''
 
+    def _synthesize(self, text: str, cancel_token: Optional[CancelToken], timeout: float) -> Optional[AudioBuffer]:
+        """One TTS attempt; returns None if the turn was cancelled mid-stream"""
+        # Use the correct API method
+        audio_generator = self.client.text_to_speech.convert(
+            voice_id=self.voice_id,
+            text=text,
+            model_id=self.model_id,
+            voice_settings=VoiceSettings(**self.voice_settings),
+            request_options={'timeout_in_seconds': timeout}
+        )
+        
+        # Collect audio chunks without re-copying on every append
+        started = time.perf_counter()
+        buffer = AudioBuffer()
+        for chunk in audio_generator:
+            if cancel_token and cancel_token.cancelled:
+                # Stop reading so the HTTP stream is dropped mid-synthesis
+                audio_generator.close()
+                return None
+            if not buffer.chunk_count:
+                TURN_STAGE_SECONDS.observe(time.perf_counter() - started, stage='tts_first_byte')
+            buffer.append(chunk)
+        TURN_STAGE_SECONDS.observe(time.perf_counter() - started, stage='tts_complete')
+        return buffer
+
 # Singleton instance
 elevenlabs_client = ElevenLabsClient()
\ No newline at end of file
@@ -0,0 +1,319 @@
+"""
+Provider Transport
+Shared connection pools, deadlines, retries and request hedging for the
+Cohere, ElevenLabs and Gemini clients
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Optional, TypeVar
+
+import httpx
+
+from app.services.metrics import PROVIDER_CALL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# gRPC / google-api-core errors raised by the Gemini SDK
+RETRYABLE_GOOGLE_ERRORS = {'DeadlineExceeded', 'ServiceUnavailable', 'ResourceExhausted', 'InternalServerError'}
+
+
+class ProviderPolicy:
+    """Per-provider timeouts, retry budget and hedging settings"""
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        connect_timeout: float,
+        read_timeout: float,
+        deadline: float,
+        max_retries: int,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        hedge: bool = False,
+        hedge_min_delay: float = 1.0
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+
+    @classmethod
+    def from_env(cls, name: str, base_url: str, read_timeout: float, deadline: float) -> 'ProviderPolicy':
+        prefix = name.upper()
+        return cls(
+            name=name,
+            base_url=base_url,
+            connect_timeout=float(os.getenv(f'{prefix}_CONNECT_TIMEOUT', '5')),
+            read_timeout=float(os.getenv(f'{prefix}_READ_TIMEOUT', str(read_timeout))),
+            deadline=float(os.getenv(f'{prefix}_DEADLINE', str(deadline))),
+            max_retries=int(os.getenv(f'{prefix}_MAX_RETRIES', '2')),
+            hedge=os.getenv(f'{prefix}_HEDGE', 'false').lower() == 'true'
+        )
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < 20:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a provider call cannot finish within its deadline"""
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)):
+        return True
+    status = getattr(error, 'status_code', None)
+    if status in RETRYABLE_STATUS:
+        return True
+    return type(error).__name__ in RETRYABLE_GOOGLE_ERRORS
+
+
+class ProviderTransport:
+    """
+    One keep-alive pool and retry policy per provider.
+
+    SDK clients are built on top of the shared `httpx.Client`, so every call
+    (including streams) reuses warm TLS connections. Non-streaming calls go
+    through `call`, which adds the deadline, jittered exponential backoff and
+    optional hedging once a call runs past the provider's observed p95.
+    """
+
+    def __init__(self, policies: Dict[str, ProviderPolicy]):
+        self.policies = policies
+        self._http: Dict[str, httpx.Client] = {}
+        self._latency = {name: LatencyTracker() for name in policies}
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('PROVIDER_HEDGE_WORKERS', '8')),
+            thread_name_prefix='hedge'
+        )
+        self._lock = threading.Lock()
+
+    def http_client(self, provider: str) -> httpx.Client:
+        """Shared keep-alive httpx client for the provider"""
+        with self._lock:
+            client = self._http.get(provider)
+            if client is None:
+                policy = self.policies[provider]
+                client = httpx.Client(
+                    timeout=httpx.Timeout(policy.read_timeout, connect=policy.connect_timeout),
+                    limits=httpx.Limits(
+                        max_connections=int(os.getenv('PROVIDER_MAX_CONNECTIONS', '50')),
+                        max_keepalive_connections=int(os.getenv('PROVIDER_MAX_KEEPALIVE', '20')),
+                        keepalive_expiry=float(os.getenv('PROVIDER_KEEPALIVE_EXPIRY', '120'))
+                    )
+                )
+                self._http[provider] = client
+            return client
+
+    def call(self, provider: str, fn: Callable[[float], T], hedge: Optional[bool] = None) -> T:
+        """
+        Run an idempotent provider call with retries inside the provider's deadline.
+
+        `fn` is called with the timeout for that attempt: the provider's read
+        timeout, cut down to whatever is left of the deadline. Pass it on as
+        the client's request timeout so one slow attempt can't overrun.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before a successful attempt
+        """
+        policy = self.policies[provider]
+        hedge = policy.hedge if hedge is None else hedge
+        call_started = time.monotonic()
+        deadline = call_started + policy.deadline
+        attempt = 0
+
+        while True:
+            started = time.monotonic()
+            try:
+                if hedge:
+                    result = self._hedged(provider, fn, deadline)
+                else:
+                    result = fn(self._attempt_timeout(provider, deadline))
+                self._latency[provider].record(time.monotonic() - started)
+                PROVIDER_CALL_SECONDS.observe(time.monotonic() - call_started, provider=provider, outcome='ok')
+                return result
+            except DeadlineExceeded:
+                PROVIDER_CALL_SECONDS.observe(time.monotonic() - call_started, provider=provider, outcome='deadline')
+                raise
+            except Exception as e:
+                if attempt >= policy.max_retries or not is_retryable(e):
+                    PROVIDER_CALL_SECONDS.observe(time.monotonic() - call_started, provider=provider, outcome='error')
+                    raise
+                # Full jitter keeps concurrent retries from synchronizing
+                delay = random.uniform(0, min(policy.backoff_max, policy.backoff_base * (2 ** attempt)))
+                if time.monotonic() + delay >= deadline:
+                    PROVIDER_CALL_SECONDS.observe(time.monotonic() - call_started, provider=provider, outcome='deadline')
+                    raise DeadlineExceeded(f"{provider} call exceeded {policy.deadline}s deadline") from e
+                logger.warning("%s call failed (%s), retrying in %.2fs", provider, type(e).__name__, delay)
+                time.sleep(delay)
+                attempt += 1
+
+    def _attempt_timeout(self, provider: str, deadline: float) -> float:
+        """
+        Raises:
+            DeadlineExceeded: If nothing is left of the deadline
+        """
+        policy = self.policies[provider]
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{provider} call exceeded {policy.deadline}s deadline")
+        return min(policy.read_timeout, remaining)
+
+    def _hedged(self, provider: str, fn: Callable[[float], T], deadline: float) -> T:
+        """Send a second identical request if the first runs past the p95 latency"""
+        policy = self.policies[provider]
+        p95 = self._latency[provider].quantile(0.95)
+        hedge_after = max(policy.hedge_min_delay, p95) if p95 else None
+
+        first = self._hedge_executor.submit(fn, self._attempt_timeout(provider, deadline))
+        futures = {first}
+        if hedge_after is not None:
+            done, _ = wait(futures, timeout=min(hedge_after, max(0.0, deadline - time.monotonic())))
+            if not done and deadline > time.monotonic():
+                futures.add(self._hedge_executor.submit(fn, self._attempt_timeout(provider, deadline)))
+
+        while futures:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"{provider} call exceeded {policy.deadline}s deadline")
+            done, futures = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The losing request finishes in the background and is ignored
+                    return future.result()
+                if not futures:
+                    raise future.exception()
+        raise DeadlineExceeded(f"{provider} call exceeded {policy.deadline}s deadline")
+
+    def latency_p95(self, provider: str) -> Optional[float]:
+        return self._latency[provider].quantile(0.95)
+
+    def warm(self) -> None:
+        """Open a keep-alive connection to each HTTP provider ahead of the first request"""
+        for name, policy in self.policies.items():
+            if not policy.base_url:
+                continue
+            try:
+                self.http_client(name).head(policy.base_url)
+            except Exception as e:
+                logger.warning("Could not warm %s connection: %s", name, e)
+
+    def warm_in_background(self) -> None:
+        threading.Thread(target=self.warm, name='provider-warmup', daemon=True).start()
+
+
+# Singleton instance
+provider_transport = ProviderTransport({
+    'cohere': ProviderPolicy.from_env('cohere', 'https://api.cohere.com', read_timeout=30, deadline=45),
+    'elevenlabs': ProviderPolicy.from_env('elevenlabs', 'https://api.elevenlabs.io', read_timeout=20, deadline=30),
+    # Gemini goes through google-api-core, so only the policy (not the pool) applies
+    'gemini': ProviderPolicy.from_env('gemini', '', read_timeout=60, deadline=90),
+})
+
+
+_cohere_lock = threading.Lock()
+_cohere = None
+_cohere_request_options = False
+
+
+def get_cohere_client():
+    """
+    Shared Cohere client on the keep-alive pool, built once per process.
+
+    Returns:
+        (client, use_v2) tuple
+    """
+    global _cohere, _cohere_request_options
+    with _cohere_lock:
+        if _cohere is None:
+            import cohere
+
+            api_key = os.getenv('COHERE_API_KEY')
+            if not api_key:
+                raise ValueError("COHERE_API_KEY not configured")
+            options = {
+                'httpx_client': provider_transport.http_client('cohere'),
+                'timeout': provider_transport.policies['cohere'].read_timeout
+            }
+            if hasattr(cohere, 'ClientV2'):
+                _cohere = (_build_cohere_client(cohere.ClientV2, api_key, options), True)
+            else:
+                # SDKs without the v2 API
+                _cohere = (_build_cohere_client(cohere.Client, api_key, options), False)
+            try:
+                # Fern-generated (v5+) SDKs take request_options on every call
+                import cohere.core.request_options  # noqa: F401
+                _cohere_request_options = True
+            except ImportError:
+                _cohere_request_options = False
+        return _cohere
+
+
+def cohere_request_options(timeout: Optional[float] = None) -> Dict:
+    """
+    Keyword arguments for one Cohere call: the request timeout and SDK
+    retries turned off, since retries are handled by ProviderTransport.call.
+    Empty for SDKs without per-request options (pre-v5).
+    """
+    get_cohere_client()
+    if not _cohere_request_options:
+        return {}
+    options = {'max_retries': 0}
+    if timeout is not None:
+        options['timeout_in_seconds'] = timeout
+    return {'request_options': options}
+
+
+def _build_cohere_client(client_class, api_key: str, options: Dict):
+    """
+    Construct the client with as many transport options as this SDK version
+    accepts: constructor-level max_retries only exists in some releases
+    (cohere_request_options turns SDK retries off per call either way), and
+    pre-v5 clients take neither httpx_client nor timeout.
+    """
+    attempts = ({'max_retries': 0, **options}, options, {})
+    for kwargs in attempts:
+        try:
+            return client_class(api_key, **kwargs)
+        except TypeError:
+            if kwargs is attempts[-1]:
+                raise
+            logger.debug("%s rejected %s; retrying with fewer options", client_class.__name__, sorted(kwargs))
+
+
+def gemini_request_options() -> Dict:
+    """Per-call deadline for Gemini generate_content"""
+    return {'timeout': provider_transport.policies['gemini'].read_timeout}
@@ -0,0 +1,69 @@
+"""
+Logging configuration
+Leveled, non-blocking logging with sampling for hot-path messages
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from typing import Optional
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of records logged with `extra={'sampled': True}`.
+
+    Per-turn chatter is marked as sampled; warnings and errors always pass.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not getattr(record, 'sampled', False):
+            return True
+        return random.random() < self.rate
+
+
+def configure_logging() -> None:
+    """
+    Route all logging through a queue so request threads never block on
+    stdout; a single listener thread does the actual writes.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = os.getenv('LOG_LEVEL', 'INFO').upper()
+    sample_rate = float(os.getenv('LOG_SAMPLE_RATE', '0.1'))
+
+    log_queue: "queue.Queue" = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+    queue_handler = _DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Drops records instead of blocking when the log queue is full"""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
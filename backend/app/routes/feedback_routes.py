@@ -3,11 +3,17 @@ Feedback Routes
 API endpoints for generating and retrieving sales call feedback
 """
 
-from flask import Blueprint, request, jsonify
-from app.services.feedback_service import feedback_service
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from app import socketio
+from app.services.feedback_batch import feedback_batches, parse_jsonl
+from app.services.feedback_jobs import COMPLETED, FAILED, FeedbackJob, JobQueueFullError, feedback_jobs
+from app.services.feedback_service import EVALUATION_MODES, EvaluationError, feedback_service
+from app.services.rubric import RubricError, rubric_registry
 import json
+import logging
 
 bp = Blueprint('feedback', __name__)
+logger = logging.getLogger(__name__)
 
 
 @bp.route('/api/feedback/generate', methods=['POST'])
@@ -18,7 +24,9 @@ def generate_feedback():
     Expected payload:
     {
         "transcript": "full call transcript text",
-        "session_id": "optional session identifier"
+        "session_id": "optional session identifier",
+        "mode": "optional: single | parallel | segmented",
+        "rubric": "optional rubric id (see /api/feedback/rubrics)"
     }
     
     Returns:
@@ -48,7 +56,11 @@ def generate_feedback():
         session_id = data.get('session_id', 'unknown')
         
         # Generate feedback using the service
-        feedback_data = feedback_service.generate_feedback(transcript)
+        feedback_data = feedback_service.generate_feedback(
+            transcript,
+            mode=data.get('mode'),
+            rubric=data.get('rubric')
+        )
         
         return jsonify({
             "success": True,
@@ -58,6 +70,14 @@ def generate_feedback():
             "model_used": "command-r-plus"
         }), 200
         
+    except EvaluationError as e:
+        # The provider failed after retries; not a problem with the request
+        logger.warning("Feedback evaluation failed upstream: %s", e)
+        return jsonify({
+            "error": "Feedback model unavailable",
+            "details": str(e)
+        }), 502
+        
     except ValueError as e:
         # Handle validation errors (e.g., transcript too short)
         return jsonify({
@@ -80,10 +100,239 @@ def generate_feedback():
         }), 500
 
 
+@bp.route('/api/feedback/stream', methods=['POST'])
+def stream_feedback():
+    """
+    Generate feedback as a Server-Sent Events stream
+    
+    Same payload as /api/feedback/generate. Events, in order:
+        analytics     measured talk ratio / question stats (immediately)
+        category      {"index": 0, "category": {...}} as each one completes
+        overall, talk_ratio, key_moments
+        complete      {"feedback": {...}} - the same body as /generate's "feedback"
+        error         {"error": "..."} if generation fails mid-stream
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or 'transcript' not in data:
+        return jsonify({
+            "error": "Missing required field: transcript"
+        }), 400
+    
+    transcript = data['transcript']
+    mode = data.get('mode')
+    rubric = data.get('rubric')
+    try:
+        # Validate transcript, mode and rubric up front so bad requests still get a plain 400
+        feedback_service.cache_key(transcript, mode=mode, rubric=rubric)
+    except ValueError as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+    
+    def events():
+        try:
+            for event, payload in feedback_service.stream_feedback(transcript, mode=mode, rubric=rubric):
+                if event == 'complete':
+                    payload = {"feedback": payload}
+                yield _sse(event, payload)
+        except Exception as e:
+            logger.exception("Error streaming feedback")
+            yield _sse('error', {"error": str(e)})
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _sse(event: str, payload) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@bp.route('/api/feedback/batch', methods=['POST'])
+def batch_feedback():
+    """
+    Score many transcripts, streaming results as NDJSON in completion order
+    
+    Accepts either a JSON body:
+    {
+        "transcripts": ["...", {"id": "rep-42", "transcript": "...", "mode": "parallel", "rubric": "..."}],
+        "mode": "optional default mode for every item",
+        "rubric": "optional default rubric for every item"
+    }
+    or a JSONL upload (multipart field "file", or an application/x-ndjson
+    body) with one transcript string or object per line.
+    
+    Streams one line per item:
+        {"index": 0, "id": "rep-42", "success": true, "feedback": {...}}
+        {"index": 3, "success": false, "error": "..."}
+    Identical transcripts are evaluated once; repeats carry "duplicate_of".
+    The last line is {"summary": {"total", "unique", "succeeded", "failed", "elapsed_seconds"}}.
+    """
+    mode = request.args.get('mode')
+    rubric = request.args.get('rubric')
+    upload = request.files.get('file')
+    if upload is not None:
+        entries = parse_jsonl(upload.read().decode('utf-8', errors='replace'))
+        mode = request.form.get('mode', mode)
+        rubric = request.form.get('rubric', rubric)
+    elif request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        entries = parse_jsonl(request.get_data(as_text=True))
+    else:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data.get('transcripts'), list):
+            return jsonify({
+                "error": "Missing required field: transcripts (or upload a JSONL file)"
+            }), 400
+        entries = data['transcripts']
+        mode = data.get('mode', mode)
+        rubric = data.get('rubric', rubric)
+    
+    if not entries:
+        return jsonify({
+            "error": "Batch contains no transcripts"
+        }), 400
+    if len(entries) > feedback_batches.max_items:
+        return jsonify({
+            "error": f"Batch too large (maximum {feedback_batches.max_items} transcripts)"
+        }), 400
+    if mode is not None and mode not in EVALUATION_MODES:
+        return jsonify({
+            "error": f"Unknown evaluation mode: {mode}"
+        }), 400
+    if rubric is not None and rubric not in feedback_service.rubric_ids():
+        return jsonify({
+            "error": f"Unknown rubric: {rubric}"
+        }), 400
+    
+    def lines():
+        for result in feedback_batches.run(entries, mode=mode, rubric=rubric):
+            yield json.dumps(result) + "\n"
+    
+    return Response(
+        stream_with_context(lines()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@bp.route('/api/feedback/jobs', methods=['POST'])
+def create_feedback_job():
+    """
+    Queue feedback generation and return immediately
+    
+    Expected payload:
+    {
+        "transcript": "full call transcript text",
+        "session_id": "optional session identifier",
+        "mode": "optional: single | parallel | segmented",
+        "rubric": "optional rubric id"
+    }
+    
+    Returns (202):
+    {
+        "success": true,
+        "job_id": "...",
+        "status": "queued",
+        "status_url": "/api/feedback/jobs/<job_id>"
+    }
+    
+    When the job finishes, `feedback_ready` is emitted to the session's
+    Socket.IO room with the same body as GET /api/feedback/jobs/<job_id>.
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or 'transcript' not in data:
+        return jsonify({
+            "error": "Missing required field: transcript"
+        }), 400
+    
+    transcript = data['transcript']
+    options = {'mode': data.get('mode'), 'rubric': data.get('rubric')}
+    try:
+        # Validates transcript, mode and rubric before anything is queued
+        feedback_service.cache_key(transcript, **options)
+        job = feedback_jobs.submit(transcript, data.get('session_id'), **options)
+    except ValueError as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+    except JobQueueFullError as e:
+        return jsonify({
+            "error": str(e)
+        }), 503
+    
+    return jsonify({
+        "success": True,
+        "job_id": job.job_id,
+        "status": job.status,
+        "status_url": f"/api/feedback/jobs/{job.job_id}"
+    }), 202
+
+
+@bp.route('/api/feedback/jobs/<job_id>', methods=['GET'])
+def get_feedback_job(job_id):
+    """
+    Poll a feedback job
+    
+    Returns:
+    {
+        "success": true,
+        "job_id": "...",
+        "status": "queued" | "running" | "completed" | "failed",
+        "feedback": {...},   // when completed
+        "error": "..."       // when failed
+    }
+    """
+    job = feedback_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            "error": "Unknown or expired job"
+        }), 404
+    return jsonify(_job_payload(job)), 200
+
+
+def _job_payload(job: FeedbackJob) -> dict:
+    payload = {"success": job.status != FAILED, **job.to_dict()}
+    if job.status == COMPLETED:
+        payload["model_used"] = "command-r-plus"
+    return payload
+
+
+def _notify_feedback_ready(job: FeedbackJob) -> None:
+    """Push the finished job to clients in the session room"""
+    if job.session_id:
+        socketio.emit('feedback_ready', _job_payload(job), to=job.session_id)
+
+
+feedback_jobs.add_listener(_notify_feedback_ready)
+
+
+@bp.route('/api/feedback/rubrics', methods=['GET'])
+def list_rubrics():
+    """
+    Lists the rubrics that can be selected per request
+    
+    Returns:
+    {
+        "success": true,
+        "rubrics": ["sports_partnership", ...],
+        "default": "sports_partnership"
+    }
+    """
+    return jsonify({
+        "success": True,
+        "rubrics": feedback_service.rubric_ids(),
+        "default": rubric_registry.default_id
+    }), 200
+
+
 @bp.route('/api/feedback/rubric', methods=['GET'])
 def get_rubric():
     """
-    Returns the complete rubric for reference
+    Returns the complete rubric for reference (?rubric=<id>, default rubric otherwise)
     
     Returns:
     {
@@ -96,11 +345,15 @@ def get_rubric():
     }
     """
     try:
-        rubric = feedback_service.get_rubric()
+        rubric = feedback_service.get_rubric(request.args.get('rubric'))
         return jsonify({
             "success": True,
             "rubric": rubric
         }), 200
+    except RubricError as e:
+        return jsonify({
+            "error": str(e)
+        }), 404
     except Exception as e:
         # print(f"❌ Error fetching rubric: {e}")
         return jsonify({
@@ -0,0 +1,27 @@
+from flask import Blueprint, Response
+from app.services.conversation_service import conversation_service
+from app.services.feedback_jobs import feedback_jobs
+from app.services.metrics import metrics
+from app.services.tts_cache import tts_cache
+from app.services.turn_scheduler import turn_scheduler
+
+bp = Blueprint('metrics', __name__)
+
+# Point-in-time values are read from the owning service at scrape time
+metrics.gauge('pitchpoint_sessions', 'Live voice sessions in the session store',
+              conversation_service.session_count)
+metrics.gauge('pitchpoint_turn_sessions_active', 'Sessions with a turn currently running',
+              lambda: turn_scheduler.stats()['active_sessions'])
+metrics.gauge('pitchpoint_turns_queued', 'Turns waiting behind a running turn',
+              lambda: turn_scheduler.stats()['queued_turns'])
+metrics.gauge('pitchpoint_feedback_jobs_pending', 'Feedback jobs queued or running',
+              lambda: feedback_jobs.stats()['queued'] + feedback_jobs.stats()['running'])
+metrics.gauge('pitchpoint_tts_cache_hit_rate', 'TTS cache hit rate since start',
+              lambda: tts_cache.stats()['hit_rate'])
+metrics.gauge('pitchpoint_tts_cache_memory_bytes', 'Bytes held by the in-memory TTS cache',
+              lambda: tts_cache.stats()['memory_bytes'])
+
+@bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -1,24 +1,18 @@
-from flask import Blueprint, request, jsonify
-from agent.research_agent import SportsPartnerResearchAgent
-from typing import Optional
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from agent.research_agent import PROMPT_VERSION
+from app.services.research_service import get_batches, get_research
+import json
+import logging
 
 bp = Blueprint('research', __name__)
-
-_agent: Optional[SportsPartnerResearchAgent] = None
-
-def get_agent() -> SportsPartnerResearchAgent:
-    """Lazy-init the research agent so we fail fast on missing API key."""
-    global _agent
-    if _agent is None:
-        _agent = SportsPartnerResearchAgent()
-    return _agent
+logger = logging.getLogger(__name__)
 
 @bp.route('/research', methods=['POST'])
 def research():
     """
     POST /research
-    Body: { "subject": "Golden State Warriors" }
-    Returns: { "subject": "...", "profile": { ...schema... } }
+    Body: { "subject": "Golden State Warriors", "refresh": false }
+    Returns: { "subject": "...", "profile": { ...schema... }, "cache": { "status", "age_seconds", "subject_key" } }
     """
     payload = request.get_json(silent=True) or {}
     subject = (payload.get("subject") or "").strip()
@@ -27,7 +21,73 @@ def research():
         return jsonify({"error": "subject is required"}), 400
 
     try:
-        profile = get_agent().research(subject)
-        return jsonify({"subject": subject, "profile": profile})
+        profile, cache = get_research().research(subject, refresh=bool(payload.get("refresh")))
+        return jsonify({"subject": subject, "profile": profile, "prompt_version": PROMPT_VERSION, "cache": cache})
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
+
+@bp.route('/research/stream', methods=['POST'])
+def research_stream():
+    """
+    POST /research/stream
+    Body: same as /research
+    Server-Sent Events, in order:
+        classified    { "entity_type", "classified_by" } (only when the profile is generated)
+        section       { "name": "overview", "value": ... } as each top-level field of the profile closes
+        complete      same body as /research, plus "entity_type", "classified_by" and
+                      "timings" when the profile was generated
+        error         { "error": "..." } if research fails mid-stream
+    """
+    payload = request.get_json(silent=True) or {}
+    subject = (payload.get("subject") or "").strip()
+
+    if not subject:
+        return jsonify({"error": "subject is required"}), 400
+
+    def events():
+        try:
+            for event, data in get_research().stream(subject, refresh=bool(payload.get("refresh"))):
+                if event == "complete":
+                    data = {"subject": subject, "prompt_version": PROMPT_VERSION, **data}
+                yield _sse(event, data)
+        except Exception as exc:
+            logger.exception("Error streaming research for %s", subject)
+            yield _sse("error", {"error": str(exc)})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _sse(event: str, payload) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@bp.route('/research/batch', methods=['POST'])
+def research_batch():
+    """
+    POST /research/batch
+    Body: { "subjects": ["Golden State Warriors", "GSW", "Nike"], "refresh": false }
+    Streams NDJSON in completion order, one line per subject:
+        { "index": 2, "subject": "Nike", "subject_key": "nike", "success": true, "profile": {...}, "cache": {...} }
+        { "index": 1, "subject": "GSW", ..., "duplicate_of": 0 }
+    then { "summary": { "total", "unique", "succeeded", "failed", "elapsed_seconds" } }
+    """
+    payload = request.get_json(silent=True) or {}
+    subjects = payload.get("subjects")
+
+    if not isinstance(subjects, list) or not subjects:
+        return jsonify({"error": "subjects must be a non-empty list"}), 400
+    batches = get_batches()
+    if len(subjects) > batches.max_items:
+        return jsonify({"error": f"Batch too large (maximum {batches.max_items} subjects)"}), 400
+
+    def lines():
+        for result in batches.run(subjects, refresh=bool(payload.get("refresh"))):
+            yield json.dumps(result) + "\n"
+
+    return Response(
+        stream_with_context(lines()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
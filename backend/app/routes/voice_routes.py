@@ -3,17 +3,31 @@ from flask_socketio import emit, join_room, leave_room
 from app import socketio
 from app.clients.cohere_client import cohere_client
 from app.clients.elevenlabs_client import elevenlabs_client
+from app.services.audio_transport import audio_transport
+from app.services.call_analytics import analyze_turns
+from app.services.cancellation import CancelToken
 from app.services.conversation_service import conversation_service
+from app.services.feedback_jobs import JobQueueFullError, feedback_jobs
+from app.services.live_coaching import live_coaching, render_turns
+from app.services.metrics import TURNS_TOTAL, TurnTimer
+from app.services.research_prefetch import research_prefetch
+from app.services.rubric import RubricError
+from app.services.speech_pipeline import iter_speech_fragments, synthesize_in_order
+from app.services.turn_scheduler import turn_scheduler, QueueFullError
+import logging
+import time
 import uuid
-import base64
 
 bp = Blueprint('voice', __name__)
+logger = logging.getLogger(__name__)
+
+# Socket id -> voice session, so a disconnect can be traced to its session
+_session_by_sid = {}
 
 @bp.route('/api/start-voice-session', methods=['POST'])
 def start_voice_session():
     """Initialize a voice conversation session"""
     try:
-        print("📞 Starting voice session...")
         data = request.json
         session_id = str(uuid.uuid4())
         
@@ -24,42 +38,77 @@ def start_voice_session():
             'company': data.get('company', 'TechCorp'),
             'difficulty': data.get('difficulty', 'professional'),
             'background': data.get('background', 'Experienced professional.'),
-            'company_info': data.get('comapny_background', ''),
+            # "comapny_background" is the field's original (misspelled) name
+            'company_info': data.get('company_background') or data.get('comapny_background', ''),
             'personality': data.get('personality', '')
         }
         
         conversation_service.create_conversation(session_id, persona_data)
         
-        print(f"✅ Session created: {session_id}")
+        # Optional live coaching: coaching_update events during the call and
+        # final feedback assembled from them
+        coaching = data.get('live_coaching', live_coaching.enabled_by_default)
+        if coaching:
+            try:
+                live_coaching.enable(session_id, persona_data['name'], data.get('rubric'))
+            except RubricError as e:
+                conversation_service.end_conversation(session_id)
+                return jsonify({'error': str(e)}), 400
+        
+        # Optional company research in the background; the persona gains the
+        # profile when it lands, and no turn waits for it
+        prefetch = bool(data.get('company')) and data.get('research_company', research_prefetch.enabled_by_default)
+        if prefetch:
+            research_prefetch.start(session_id, data['company'])
+        
+        logger.info("Voice session created: %s", session_id)
         return jsonify({
             'session_id': session_id,
-            'persona': persona_data
+            'persona': persona_data,
+            'live_coaching': bool(coaching),
+            'research_prefetch': bool(prefetch)
         }), 200
     
     except Exception as e:
-        print(f"❌ Error starting session: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error starting voice session")
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/api/sessions/stats', methods=['GET'])
+def session_stats():
+    """Live session count and approximate memory held by the session store"""
+    return jsonify(conversation_service.memory_usage()), 200
+
 @socketio.on('connect')
 def handle_connect():
-    print('🔌 Client connected to WebSocket')
+    logger.debug('Client connected to WebSocket', extra={'sampled': True})
     emit('connection_response', {'status': 'connected'})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     # print('🔌 Client disconnected from WebSocket')
-    pass
+    # Abandoned tabs stop generating and expire on the detached TTL;
+    # a reconnect that re-joins the room keeps the session alive.
+    session_id = _session_by_sid.pop(request.sid, None)
+    if session_id:
+        conversation_service.detach(session_id)
+        # A reconnect negotiates again in join_voice_session
+        audio_transport.forget(session_id)
 
 @socketio.on('join_voice_session')
 def handle_join_session(data):
     """Client joins a voice session room"""
     session_id = data.get('session_id')
     join_room(session_id)
+    _session_by_sid[request.sid] = session_id
+    conversation_service.touch(session_id)
+    # Clients opt in to binary audio frames; anything else keeps base64
+    capabilities = audio_transport.negotiate(session_id, data.get('capabilities'))
     # print(f'✅ Client joined session: {session_id}')
     # print(f'🔗 Client is now in room: {session_id}')
-    emit('joined_session', {'session_id': session_id}, room=session_id)
+    emit('joined_session', {
+        'session_id': session_id,
+        'capabilities': capabilities
+    }, room=session_id)
     # print(f'📡 Sent joined_session confirmation to room: {session_id}')
 
 @socketio.on('user_audio')
@@ -72,75 +121,144 @@ def handle_user_audio(data):
     
     if not user_text or not session_id:
         return
+    received_at = time.perf_counter()
     
+    # Turns run on the bounded scheduler in the order they were spoken.
+    # Barge-in: once accepted, the utterance cancels the turn that is still
+    # generating or speaking, so it stops billing and stops emitting stale
+    # audio. Registering it atomically with the enqueue keeps an older
+    # utterance from cancelling a newer one.
+    cancel_token = CancelToken()
+    try:
+        turn_scheduler.submit(
+            session_id, _process_turn, session_id, user_text, cancel_token, received_at,
+            on_accepted=lambda: conversation_service.begin_turn(session_id, cancel_token)
+        )
+    except QueueFullError as e:
+        # The reply in flight keeps going; only this utterance is rejected
+        TURNS_TOTAL.inc(outcome='rejected')
+        emit('error', {'message': str(e), 'code': 'queue_full'})
+
+def _process_turn(session_id: str, user_text: str, cancel_token: CancelToken, received_at: float):
+    """Generate and speak the AI reply for one user turn (runs on a scheduler worker)"""
+    timer = TurnTimer(received_at)
+    timer.mark('queue_wait')
+    outcome = 'error'
     try:
+        # Budgeted context (rolling summary + recent turns) from before this utterance
+        persona_prompt, chat_history = conversation_service.get_context(session_id)
+        
         # Add user message to conversation
         conversation_service.add_turn(session_id, 'USER', user_text)
+        timer.mark('history_update')
         
         # Emit transcript update
-        emit('transcript_update', {
+        socketio.emit('transcript_update', {
             'speaker': 'user',
             'text': user_text
-        }, room=session_id)
+        }, to=session_id)
         
-        # Get AI response from Cohere
-        persona_prompt = conversation_service.get_persona_prompt(session_id)
-        chat_history = conversation_service.get_history(session_id)
+        if cancel_token.cancelled:
+            # A newer utterance is already queued; it will answer both
+            outcome = 'cancelled'
+            return
         
-        # print("🤖 Generating AI response...")
-        ai_response = cohere_client.generate_response(
+        # Stream the reply: each sentence is sent to TTS as soon as it is
+        # complete and emitted as an ordered ai_audio_chunk.
+        turn_id = uuid.uuid4().hex
+        deltas = cohere_client.stream_response(
             user_message=user_text,
             persona_prompt=persona_prompt,
-            chat_history=chat_history
+            chat_history=chat_history,
+            cancel_token=cancel_token
         )
         
-        # print(f"🤖 AI responded: {ai_response}")
+        def synthesize(text: str) -> bytes:
+            return elevenlabs_client.text_to_speech(text, cancel_token=cancel_token)
+        
+        # Only fragments whose audio was actually sent count as spoken
+        spoken = []
+        chunk_count = 0
+        for seq, text, audio_data in synthesize_in_order(
+            iter_speech_fragments(deltas),
+            synthesize,
+            cancel_token=cancel_token
+        ):
+            chunk_count = seq + 1
+            if not audio_data:
+                # print("❌ No audio data generated - check ElevenLabs API key and credits")
+                continue
+            
+            if not spoken:
+                timer.since_start('time_to_first_audio')
+            with timer.stage('emit'):
+                socketio.emit('ai_audio_chunk', {
+                    'turn_id': turn_id,
+                    'seq': seq,
+                    'audio': audio_transport.encode(session_id, audio_data),
+                    'text': text
+                }, to=session_id)
+            spoken.append(text)
+        
+        ai_response = ' '.join(spoken)
+        
+        if cancel_token.cancelled:
+            # Keep history truthful: record only what the prospect actually said
+            if ai_response:
+                conversation_service.add_turn(session_id, 'ASSISTANT', ai_response)
+                socketio.emit('transcript_update', {
+                    'speaker': 'ai',
+                    'text': ai_response
+                }, to=session_id)
+            socketio.emit('ai_audio_cancelled', {
+                'turn_id': turn_id,
+                'chunks': len(spoken),
+                'text': ai_response
+            }, to=session_id)
+            outcome = 'cancelled'
+            return
         
         # Add AI response to conversation
         conversation_service.add_turn(session_id, 'ASSISTANT', ai_response)
         
+        socketio.emit('ai_audio_end', {
+            'turn_id': turn_id,
+            'chunks': chunk_count,
+            'text': ai_response
+        }, to=session_id)
+        
         # Emit transcript update
-        emit('transcript_update', {
+        socketio.emit('transcript_update', {
             'speaker': 'ai',
             'text': ai_response
-        }, room=session_id)
-        
-        # Convert AI response to speech
-        # print(f"🔊 Converting to speech: '{ai_response[:50]}...'")
-        try:
-            audio_data = elevenlabs_client.text_to_speech(ai_response)
-            # print(f"📊 Audio data size: {len(audio_data) if audio_data else 0} bytes")
-        except Exception as tts_error:
-            # print(f"❌ ElevenLabs TTS error: {tts_error}")
-            import traceback
-            traceback.print_exc()
-            audio_data = b''
-        
-        if audio_data and len(audio_data) > 0:
-            # Send audio back to client (base64 encoded)
-            audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-            # print(f"📤 Sending {len(audio_base64)} bytes of base64 audio to client")
-            # print(f"🎯 Target session_id: {session_id}")
-            # print(f"🎯 Audio payload size: {len(audio_base64)} bytes")
-            # print(f"🎯 Text: {ai_response[:50]}...")
-            
-            # Emit with explicit room targeting
-            emit('ai_audio', {
-                'audio': audio_base64,
-                'text': ai_response
-            }, room=session_id)
-            
-            # print(f"✅ Audio event 'ai_audio' emitted to room: {session_id}")
-            # print(f"✅ Event payload: audio={len(audio_base64)} bytes, text={len(ai_response)} chars")
-        else:
-            # print("❌ No audio data generated - check ElevenLabs API key and credits")
-            pass
+        }, to=session_id)
+        outcome = 'completed'
     
     except Exception as e:
-        # print(f'❌ Error handling user audio: {e}')
-        import traceback
-        traceback.print_exc()
-        emit('error', {'message': str(e)}, room=session_id)
+        logger.exception("Error handling user audio for session %s", session_id)
+        socketio.emit('error', {'message': str(e)}, to=session_id)
+    finally:
+        timer.since_start('turn_total')
+        TURNS_TOTAL.inc(outcome=outcome)
+        conversation_service.finish_turn(session_id, cancel_token)
+        if outcome != 'error':
+            try:
+                live_coaching.on_turn(session_id)
+            except Exception:
+                logger.exception("Could not schedule live coaching for session %s", session_id)
+
+def _emit_coaching_update(session_id: str, update: dict) -> None:
+    socketio.emit('coaching_update', {'session_id': session_id, **update}, to=session_id)
+
+live_coaching.add_listener(_emit_coaching_update)
+
+def _emit_research_status(session_id: str, status: dict) -> None:
+    socketio.emit('research_ready', {'session_id': session_id, **status}, to=session_id)
+
+research_prefetch.add_listener(_emit_research_status)
+
+# Sessions abandoned without end_voice_session drop their transport state too
+conversation_service.add_eviction_listener(audio_transport.forget)
 
 @socketio.on('end_voice_session')
 def handle_end_session(data):
@@ -150,12 +268,41 @@ def handle_end_session(data):
     # print(f"🛑 Ending session: {session_id}")
     # Get final transcript
     transcript = conversation_service.get_transcript(session_id)
+    coaching = live_coaching.snapshot(session_id)
     
     # End conversation
     conversation_service.end_conversation(session_id)
+    audio_transport.forget(session_id)
+    
+    # Send transcript back with measured talk ratio / question stats
+    analytics = analyze_turns(
+        [entry['speaker'] == 'user' for entry in transcript],
+        [entry['text'] for entry in transcript]
+    )
+    payload = {'transcript': transcript, 'analytics': analytics}
     
-    # Send transcript back
-    emit('session_ended', {'transcript': transcript}, room=session_id)
+    # With live coaching most of the call is already scored; finish the
+    # feedback from that state as a job and push it as feedback_ready
+    job = None
+    if coaching and transcript:
+        try:
+            job = feedback_jobs.submit(
+                render_turns(transcript, coaching['prospect']),
+                session_id,
+                run=live_coaching.final_feedback,
+                turns=transcript,
+                state=coaching
+            )
+            payload['feedback_job'] = {
+                'job_id': job.job_id,
+                'status_url': f"/api/feedback/jobs/{job.job_id}"
+            }
+        except JobQueueFullError:
+            logger.warning("Feedback queue full; session %s will need a full evaluation", session_id)
+    emit('session_ended', payload, room=session_id)
     
-    leave_room(session_id)
+    if job is None:
+        # Otherwise the client stays in the room to receive feedback_ready
+        leave_room(session_id)
+    _session_by_sid.pop(request.sid, None)
     # print(f'✅ Session ended: {session_id}')
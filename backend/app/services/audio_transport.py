@@ -0,0 +1,85 @@
+"""
+Audio Transport
+Collects synthesized audio without repeated copies and encodes it for the
+socket according to what each voice session negotiated
+"""
+
+import base64
+import threading
+from typing import Dict, List, Union
+
+# Capability flags a client may send in join_voice_session
+BINARY_AUDIO = 'binary_audio'
+
+
+class AudioBuffer:
+    """
+    Append-only list of audio chunks.
+
+    Chunks are kept as-is and joined exactly once when the audio is read,
+    instead of re-copying the whole payload on every append.
+    """
+
+    __slots__ = ('_chunks', '_size')
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._size = 0
+
+    def append(self, chunk: bytes) -> None:
+        if chunk:
+            self._chunks.append(chunk)
+            self._size += len(chunk)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self._chunks)
+
+    def getvalue(self) -> bytes:
+        """Return the audio as one bytes object (single copy, cached)"""
+        if len(self._chunks) == 1:
+            return self._chunks[0]
+        data = b''.join(self._chunks)
+        self._chunks = [data] if data else []
+        return data
+
+
+class AudioTransport:
+    """Tracks per-session transport capabilities and encodes audio payloads"""
+
+    def __init__(self):
+        self._capabilities: Dict[str, Dict[str, bool]] = {}
+        self._lock = threading.Lock()
+
+    def negotiate(self, session_id: str, capabilities: Dict) -> Dict[str, bool]:
+        """Record what the client supports and return the accepted capabilities"""
+        accepted = {
+            BINARY_AUDIO: bool((capabilities or {}).get(BINARY_AUDIO, False))
+        }
+        with self._lock:
+            self._capabilities[session_id] = accepted
+        return accepted
+
+    def supports_binary(self, session_id: str) -> bool:
+        with self._lock:
+            return self._capabilities.get(session_id, {}).get(BINARY_AUDIO, False)
+
+    def encode(self, session_id: str, audio: bytes) -> Union[bytes, str]:
+        """
+        Binary-capable sessions get raw bytes, which Socket.IO sends as a
+        binary attachment; legacy clients get a base64 string.
+        """
+        if self.supports_binary(session_id):
+            return audio
+        return base64.b64encode(audio).decode('utf-8')
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._capabilities.pop(session_id, None)
+
+
+# Singleton instance
+audio_transport = AudioTransport()
@@ -0,0 +1,210 @@
+"""
+Call Analytics
+Exact talk-ratio, question and turn statistics computed locally from the
+speaker turns, so the LLM is given facts instead of guessing them
+"""
+
+import re
+from typing import Dict, Sequence
+
+import numpy as np
+
+from app.services.transcript import parse_transcript
+
+# Conversational speech runs ~150 words/min; characters track duration a
+# little better than words because long words take longer to say.
+CHARS_PER_SECOND = 14.0
+
+# Question openers that invite an explanation vs. a yes/no or short answer
+OPEN_STARTERS = frozenset({
+    'what', 'how', 'why', 'tell', 'describe', 'walk', 'explain', 'which',
+    'where', 'when', 'who', 'talk', 'share', 'help'
+})
+CLOSED_STARTERS = frozenset({
+    'is', 'are', 'am', 'do', 'does', 'did', 'can', 'could', 'will', 'would',
+    'have', 'has', 'had', 'should', 'shall', 'may', 'might', 'was', 'were',
+    "isn't", "aren't", "don't", "doesn't", "didn't", "can't", "won't",
+    "wouldn't", "haven't", "hasn't"
+})
+# "Tell me about...", "Walk us through..." ask open questions without a "?"
+_IMPERATIVE_QUESTION = re.compile(r"^(?:\W*\w+,?\s+)?(tell|walk|describe|explain|share)\s+(me|us)\b", re.I)
+
+# Turn length buckets (words) for the distribution
+LENGTH_BUCKETS = (10, 25, 50, 100, 200)
+
+_SENTENCE = re.compile(r'[^.!?]*[.!?]+|[^.!?]+$')
+_WORD = re.compile(r"[a-z']+")
+# A turn that trails off with a dash or ellipsis was cut off by the next speaker
+_CUT_OFF = re.compile(r'(--|[-—–]|\.\.\.|…)\s*$')
+
+
+def _question_counts(text: str) -> tuple:
+    """(open, closed) question counts in one turn"""
+    open_count = closed_count = 0
+    for sentence in _SENTENCE.findall(text):
+        sentence = sentence.strip()
+        if not sentence.endswith('?'):
+            if _IMPERATIVE_QUESTION.match(sentence):
+                open_count += 1
+            continue
+        words = _WORD.findall(sentence.lower())
+        # Skip lead-ins like "And", "So, Alex," to find the question word;
+        # tag questions ("Right?") with no opener count as closed
+        for word in words[:4]:
+            if word in OPEN_STARTERS:
+                open_count += 1
+                break
+            if word in CLOSED_STARTERS:
+                closed_count += 1
+                break
+        else:
+            closed_count += 1
+    return open_count, closed_count
+
+
+def analyze_turns(is_rep: Sequence[bool], texts: Sequence[str]) -> Dict:
+    """
+    Statistics for a call given, per turn, whether the rep spoke and what was said.
+
+    Per-turn counts are collected once; every aggregate is then a vectorized
+    reduction over those arrays.
+    """
+    count = len(texts)
+    if count == 0:
+        return _empty_analytics()
+
+    rep = np.fromiter(is_rep, dtype=bool, count=count)
+    words = np.fromiter((len(text.split()) for text in texts), dtype=np.int64, count=count)
+    seconds = np.fromiter((len(text) for text in texts), dtype=np.float64, count=count) / CHARS_PER_SECOND
+    questions = np.array([_question_counts(text) for text in texts], dtype=np.int64).reshape(count, 2)
+    cut_off = np.fromiter((bool(_CUT_OFF.search(text)) for text in texts), dtype=bool, count=count)
+
+    prospect = ~rep
+    rep_words, prospect_words = int(words[rep].sum()), int(words[prospect].sum())
+    rep_seconds, prospect_seconds = float(seconds[rep].sum()), float(seconds[prospect].sum())
+
+    # Monologues: runs of consecutive turns by the same side
+    run_starts = np.flatnonzero(np.concatenate(([True], rep[1:] != rep[:-1])))
+    run_words = np.add.reduceat(words, run_starts)
+    run_seconds = np.add.reduceat(seconds, run_starts)
+    run_is_rep = rep[run_starts]
+
+    # Interruptions: a cut-off turn followed by the other side speaking
+    switches = np.concatenate((rep[1:] != rep[:-1], [False]))
+    interrupted = cut_off & switches
+    rep_questions = questions[rep]
+
+    return {
+        'turns': {
+            'total': count,
+            'rep': int(rep.sum()),
+            'prospect': int(prospect.sum())
+        },
+        'talk_ratio': {
+            'by_words': _ratio(rep_words, prospect_words),
+            'by_time': _ratio(rep_seconds, prospect_seconds),
+            'rep_words': rep_words,
+            'prospect_words': prospect_words,
+            'rep_seconds_estimated': round(rep_seconds, 1),
+            'prospect_seconds_estimated': round(prospect_seconds, 1)
+        },
+        'questions': {
+            'rep_total': int(rep_questions.sum()),
+            'rep_open': int(rep_questions[:, 0].sum()),
+            'rep_closed': int(rep_questions[:, 1].sum()),
+            'prospect_total': int(questions[prospect].sum())
+        },
+        'longest_monologue': {
+            'rep': _longest(run_words, run_seconds, run_is_rep),
+            'prospect': _longest(run_words, run_seconds, ~run_is_rep)
+        },
+        'interruptions': {
+            # Counted against the side that took the floor
+            'by_rep': int((interrupted & prospect).sum()),
+            'by_prospect': int((interrupted & rep).sum())
+        },
+        'turn_length_words': {
+            'rep': _distribution(words[rep]),
+            'prospect': _distribution(words[prospect])
+        }
+    }
+
+
+def analyze_transcript(transcript: str) -> Dict:
+    """Statistics for a "You: ... / Name: ..." transcript"""
+    turns = parse_transcript(transcript)
+    return analyze_turns([turn.is_rep for turn in turns], [turn.text for turn in turns])
+
+
+def render_facts(analytics: Dict) -> str:
+    """Plain-text summary of the analytics for inclusion in prompts"""
+    if not analytics['turns']['total']:
+        return "- No speaker turns could be identified in the transcript"
+    talk = analytics['talk_ratio']
+    questions = analytics['questions']
+    monologue = analytics['longest_monologue']
+    interruptions = analytics['interruptions']
+    return "\n".join([
+        f"- Turns: {analytics['turns']['rep']} by the rep, {analytics['turns']['prospect']} by the prospect",
+        f"- Talk ratio by words: rep {talk['by_words']['rep_percentage']}%, "
+        f"prospect {talk['by_words']['prospect_percentage']}% "
+        f"({talk['rep_words']} vs {talk['prospect_words']} words)",
+        f"- Talk ratio by estimated speaking time: rep {talk['by_time']['rep_percentage']}%, "
+        f"prospect {talk['by_time']['prospect_percentage']}%",
+        f"- Rep questions: {questions['rep_total']} ({questions['rep_open']} open, {questions['rep_closed']} closed); "
+        f"prospect questions: {questions['prospect_total']}",
+        f"- Longest rep monologue: {monologue['rep']['words']} words (~{monologue['rep']['seconds_estimated']}s); "
+        f"longest prospect monologue: {monologue['prospect']['words']} words",
+        f"- Apparent interruptions: {interruptions['by_rep']} by the rep, {interruptions['by_prospect']} by the prospect"
+    ])
+
+
+def _ratio(rep: float, prospect: float) -> Dict[str, float]:
+    total = rep + prospect
+    if not total:
+        return {'rep_percentage': 0.0, 'prospect_percentage': 0.0}
+    rep_percentage = round(100.0 * rep / total, 1)
+    return {'rep_percentage': rep_percentage, 'prospect_percentage': round(100.0 - rep_percentage, 1)}
+
+
+def _longest(run_words: np.ndarray, run_seconds: np.ndarray, mask: np.ndarray) -> Dict:
+    if not mask.any():
+        return {'words': 0, 'seconds_estimated': 0.0}
+    index = int(np.argmax(np.where(mask, run_words, -1)))
+    return {'words': int(run_words[index]), 'seconds_estimated': round(float(run_seconds[index]), 1)}
+
+
+def _distribution(lengths: np.ndarray) -> Dict:
+    if lengths.size == 0:
+        return {'mean': 0.0, 'median': 0.0, 'p90': 0.0, 'max': 0, 'histogram': {}}
+    edges = np.array(LENGTH_BUCKETS)
+    counts = np.bincount(np.searchsorted(edges, lengths, side='left'), minlength=len(edges) + 1)
+    labels = [f"<={edge}" for edge in LENGTH_BUCKETS] + [f">{LENGTH_BUCKETS[-1]}"]
+    return {
+        'mean': round(float(lengths.mean()), 1),
+        'median': float(np.median(lengths)),
+        'p90': round(float(np.percentile(lengths, 90)), 1),
+        'max': int(lengths.max()),
+        'histogram': dict(zip(labels, (int(c) for c in counts)))
+    }
+
+
+def _empty_analytics() -> Dict:
+    return {
+        'turns': {'total': 0, 'rep': 0, 'prospect': 0},
+        'talk_ratio': {
+            'by_words': _ratio(0, 0),
+            'by_time': _ratio(0, 0),
+            'rep_words': 0,
+            'prospect_words': 0,
+            'rep_seconds_estimated': 0.0,
+            'prospect_seconds_estimated': 0.0
+        },
+        'questions': {'rep_total': 0, 'rep_open': 0, 'rep_closed': 0, 'prospect_total': 0},
+        'longest_monologue': {
+            'rep': {'words': 0, 'seconds_estimated': 0.0},
+            'prospect': {'words': 0, 'seconds_estimated': 0.0}
+        },
+        'interruptions': {'by_rep': 0, 'by_prospect': 0},
+        'turn_length_words': {'rep': _distribution(np.zeros(0)), 'prospect': _distribution(np.zeros(0))}
+    }
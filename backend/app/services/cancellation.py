@@ -0,0 +1,27 @@
+"""
+Cancellation
+Cooperative cancellation tokens shared between a turn and its provider calls
+"""
+
+import threading
+
+
+class CancelToken:
+    """
+    Set once a turn has been superseded.
+
+    Provider calls poll `cancelled` between stream events and stop consuming,
+    which closes the underlying HTTP stream and stops further billing.
+    """
+
+    __slots__ = ('_event',)
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
@@ -0,0 +1,152 @@
+"""
+Context Window
+Keeps the persona prompt bounded: recent turns verbatim up to a token budget,
+older turns folded into a rolling summary off the hot path
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Rough per-message overhead for role markers and separators
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English)"""
+    return (len(text) + 3) // 4 + _MESSAGE_OVERHEAD_TOKENS
+
+
+class ContextWindow:
+    """
+    Splits a turn log into the verbatim recent window and the older turns
+    that should be folded into the summary.
+
+    Args:
+        budget_tokens: Max estimated tokens for the verbatim turns
+        min_turns: Always keep at least this many recent turns verbatim
+        max_tokens: Hard ceiling for verbatim turns while the summary lags
+            behind (defaults to three times the budget)
+    """
+
+    def __init__(self, budget_tokens: int = 1500, min_turns: int = 2, max_tokens: Optional[int] = None):
+        self.budget_tokens = budget_tokens
+        self.min_turns = min_turns
+        self.max_tokens = max_tokens or budget_tokens * 3
+
+    def split(self, history: List[Dict], budget_tokens: Optional[int] = None) -> int:
+        """Return the index of the first turn kept verbatim"""
+        budget = budget_tokens or self.budget_tokens
+        used = 0
+        start = len(history)
+        for i in range(len(history) - 1, -1, -1):
+            cost = estimate_tokens(history[i]['message'])
+            kept = len(history) - i - 1
+            if kept >= self.min_turns and used + cost > budget:
+                break
+            used += cost
+            start = i
+        return start
+
+
+class RollingSummarizer:
+    """
+    Folds turns that left the verbatim window into a per-session summary.
+
+    Summaries are updated incrementally (previous summary + newly folded turns)
+    on a small background pool, at most one job per session at a time, so the
+    turn that triggered it never waits. Turns are folded in batches of at
+    least `min_batch` so a long call costs one summary call per few turns.
+    After a failed update the session waits `backoff` seconds, doubling per
+    consecutive failure up to `max_backoff`, before the next attempt.
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[str, List[Dict]], str],
+        max_workers: int = 2,
+        min_batch: int = 4,
+        backoff: float = 5.0,
+        max_backoff: float = 300.0
+    ):
+        self._summarize = summarize
+        self.min_batch = min_batch
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='summarize')
+        self._in_flight: Set[str] = set()
+        self._failures: Dict[str, Tuple[int, float]] = {}  # session -> (consecutive failures, retry at)
+        self._lock = threading.Lock()
+
+    def schedule(
+        self,
+        session_id: str,
+        summary: Optional[Dict],
+        history: List[Dict],
+        fold_until: int,
+        save: Callable[[str, Dict], None]
+    ) -> bool:
+        """Queue a summary update covering history[:fold_until] if it is behind"""
+        summarized = summary['upto'] if summary else 0
+        if fold_until - summarized < self.min_batch:
+            return False
+        with self._lock:
+            if session_id in self._in_flight:
+                return False
+            failures = self._failures.get(session_id)
+            if failures and time.monotonic() < failures[1]:
+                return False
+            self._in_flight.add(session_id)
+
+        previous = summary['text'] if summary else ''
+        turns = history[summarized:fold_until]
+
+        def run():
+            succeeded = False
+            try:
+                text = self._summarize(previous, turns)
+                if text:
+                    save(session_id, {'text': text, 'upto': fold_until})
+                    succeeded = True
+            except Exception:
+                logger.exception("Summary update failed for session %s", session_id)
+            finally:
+                with self._lock:
+                    self._in_flight.discard(session_id)
+                    if succeeded:
+                        self._failures.pop(session_id, None)
+                    else:
+                        count = self._failures.get(session_id, (0, 0.0))[0] + 1
+                        delay = min(self.backoff * 2 ** (count - 1), self.max_backoff)
+                        self._failures[session_id] = (count, time.monotonic() + delay)
+
+        self._executor.submit(run)
+        return True
+
+    def forget(self, session_id: str) -> None:
+        """Drop the failure history of a session that ended"""
+        with self._lock:
+            self._failures.pop(session_id, None)
+
+
+def build_context(
+    window: ContextWindow,
+    history: List[Dict],
+    summary: Optional[Dict]
+) -> Tuple[Optional[str], List[Dict], int]:
+    """
+    Returns (summary text, verbatim turns, index the summary should cover).
+
+    Turns between the summary's coverage and the verbatim window are kept
+    verbatim until the summary catches up, but never past the window's hard
+    `max_tokens` ceiling: if summaries keep failing, the oldest unsummarized
+    turns are dropped from the prompt rather than letting it grow unbounded.
+    """
+    start = window.split(history)
+    summarized = summary['upto'] if summary else 0
+    verbatim_from = max(min(start, summarized), window.split(history, window.max_tokens))
+    return (summary['text'] if summary else None), history[verbatim_from:], start
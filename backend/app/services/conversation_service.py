@@ -1,66 +1,246 @@
-from typing import List, Dict
+import logging
+import os
+import threading
+from typing import Callable, List, Dict, Optional, Tuple
+from app.services.cancellation import CancelToken
+from app.services.context_window import ContextWindow, RollingSummarizer, build_context
+from app.services.prompt_templates import PromptTemplate, prompt_registry
+from app.services.session_store import InMemorySessionStore, SessionStore, create_session_store
+
+logger = logging.getLogger(__name__)
+
+PERSONA_PROMPT = prompt_registry.register(PromptTemplate(
+    'conversation.persona',
+    """You are {name}, {role} at {company}.
+
+Personality: {difficulty}
+Background: {background}{company_context}
+
+Instructions:
+- Keep responses short (1-2 sentences max in a live call)
+- Ask probing questions about the product
+- Raise realistic objections based on your role
+- Stay in character
+- Be natural and conversational""",
+    slots=('name', 'role', 'company', 'difficulty', 'background', 'company_context')
+))
+
+COMPANY_SECTION = prompt_registry.register(PromptTemplate(
+    'conversation.company_section',
+    "\n\nWhat you know about {company} (use it naturally, don't recite it):\n{company_info}",
+    slots=('company', 'company_info')
+))
+
+SUMMARY_SECTION = prompt_registry.register(PromptTemplate(
+    'conversation.summary_section',
+    "\n\nEarlier in this call (summary):\n{summary}",
+    slots=('summary',)
+))
+
+def _summarize_turns(previous_summary: str, turns: List[Dict]) -> str:
+    # Imported lazily so the service does not need a Cohere key at import time
+    from app.clients.cohere_client import cohere_client
+    return cohere_client.summarize_turns(previous_summary, turns)
 
 class ConversationService:
-    def __init__(self):
-        self.conversations = {}  # Store active conversations by session_id
+    def __init__(self, store: Optional[SessionStore] = None, context_window: Optional[ContextWindow] = None):
+        # Active conversations by session_id, bounded by idle TTL and max sessions.
+        # Shared backends let any worker serve any session.
+        self.store = store or InMemorySessionStore()
+        self._turn_tokens: Dict[str, CancelToken] = {}  # Latest turn per session
+        self._turn_lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._eviction_listeners: List[Callable[[str], None]] = []
+        self.context_window = context_window or ContextWindow()
+        self._summarizer = RollingSummarizer(
+            _summarize_turns,
+            min_batch=int(os.getenv('CONTEXT_SUMMARY_BATCH', '4'))
+        )
+        # Sessions pushed out by max_sessions on create() are reported here too
+        self.store.add_eviction_listener(self._on_evicted)
     
     def create_conversation(self, session_id: str, persona_data: Dict) -> None:
         """Initialize a new conversation session"""
-        self.conversations[session_id] = {
-            'persona': persona_data,
-            'history': [],
-            'transcript': []
-        }
+        self.store.create(session_id, persona_data)
     
     def add_turn(self, session_id: str, role: str, message: str) -> None:
         """Add a conversation turn"""
-        if session_id in self.conversations:
-            self.conversations[session_id]['history'].append({
-                'role': role,
-                'message': message
-            })
-            self.conversations[session_id]['transcript'].append({
-                'speaker': 'user' if role == 'USER' else 'ai',
-                'text': message,
-                'timestamp': len(self.conversations[session_id]['transcript'])
-            })
+        self.store.append_turn(session_id, role, message)
     
     def get_history(self, session_id: str) -> List[Dict]:
         """Get conversation history"""
-        if session_id in self.conversations:
-            return self.conversations[session_id]['history']
+        session = self.store.get(session_id)
+        if session:
+            return [turn.to_history() for turn in session.turns]
         return []
     
     def get_transcript(self, session_id: str) -> List[Dict]:
         """Get formatted transcript"""
-        if session_id in self.conversations:
-            return self.conversations[session_id]['transcript']
+        session = self.store.get(session_id)
+        if session:
+            return [turn.to_transcript(i) for i, turn in enumerate(session.turns)]
         return []
     
+    def update_persona(self, session_id: str, updates: Dict) -> bool:
+        """Merge fields into the persona; later turns pick them up. False if the session is gone"""
+        return self.store.update_persona(session_id, updates)
+    
+    def turn_count(self, session_id: str) -> int:
+        """Number of turns recorded so far"""
+        session = self.store.get(session_id)
+        return len(session.turns) if session else 0
+    
+    def get_state(self, session_id: str, key: str, default=None):
+        """Read one key of the session's free-form state"""
+        session = self.store.get(session_id)
+        if session:
+            return session.state.get(key, default)
+        return default
+    
+    def set_state(self, session_id: str, key: str, value) -> bool:
+        """Write one key of the session's free-form state; False if the session is gone"""
+        return self.store.update_state(session_id, key, value)
+    
+    def touch(self, session_id: str) -> bool:
+        """Mark the session active (e.g. when a client joins its room)"""
+        return self.store.touch(session_id) is not None
+    
+    def detach(self, session_id: str) -> None:
+        """The session's client disconnected; stop its turn and start the shorter TTL"""
+        self.cancel_turn(session_id)
+        self.store.detach(session_id)
+    
+    def session_count(self) -> int:
+        """Number of live sessions"""
+        return self.store.count()
+    
+    def memory_usage(self) -> Dict:
+        """Approximate memory held by live sessions"""
+        return self.store.memory_usage()
+    
+    def add_eviction_listener(self, listener: Callable[[str], None]) -> None:
+        """Called with the session_id of each evicted session (expired or over max_sessions)"""
+        self._eviction_listeners.append(listener)
+    
+    def _on_evicted(self, session_id: str) -> None:
+        self.cancel_turn(session_id)
+        self._summarizer.forget(session_id)
+        for listener in self._eviction_listeners:
+            try:
+                listener(session_id)
+            except Exception:
+                logger.exception("Eviction listener failed for %s", session_id)
+    
+    def start_sweeper(self, interval: float = 60) -> None:
+        """Evict expired sessions in the background every `interval` seconds"""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        
+        def sweep():
+            stop = threading.Event()
+            while not stop.wait(interval):
+                try:
+                    # Evicted sessions are cleaned up through _on_evicted
+                    self.store.evict_expired()
+                except Exception:
+                    logger.exception("Session sweep failed")
+        
+        self._sweeper = threading.Thread(target=sweep, name='session-sweeper', daemon=True)
+        self._sweeper.start()
+    
+    def get_context(self, session_id: str) -> Tuple[str, List[Dict]]:
+        """
+        Get the persona prompt and the chat history to send with the next turn.
+        
+        Recent turns are kept verbatim up to the context window's token budget;
+        older ones are represented by a rolling summary in the persona prompt,
+        which is refreshed in the background when turns leave the window.
+        """
+        session = self.store.get(session_id)
+        if not session:
+            return self.get_persona_prompt(session_id), []
+        
+        history = [turn.to_history() for turn in session.turns]
+        summary = session.state.get('summary')
+        summary_text, recent, fold_until = build_context(self.context_window, history, summary)
+        self._summarizer.schedule(session_id, summary, history, fold_until, self._save_summary)
+        return self._render_persona_prompt(session.persona, summary_text), recent
+    
+    def _save_summary(self, session_id: str, summary: Dict) -> None:
+        self.store.update_state(session_id, 'summary', summary)
+    
     def get_persona_prompt(self, session_id: str) -> str:
         """Get the persona prompt for this conversation"""
-        if session_id in self.conversations:
-            persona = self.conversations[session_id]['persona']
-            return f"""You are {persona['name']}, {persona['role']} at {persona['company']}.
-
-Personality: {persona.get('difficulty', 'professional')}
-Background: {persona.get('background', 'You are a busy professional.')}
-
-Instructions:
-- Keep responses short (1-2 sentences max in a live call)
-- Ask probing questions about the product
-- Raise realistic objections based on your role
-- Stay in character
-- Be natural and conversational"""
+        session = self.store.get(session_id)
+        if session:
+            summary = session.state.get('summary')
+            return self._render_persona_prompt(session.persona, summary['text'] if summary else None)
         return "You are a professional buyer in a sales call."
     
+    def _render_persona_prompt(self, persona: Dict, summary: Optional[str] = None) -> str:
+        # Rep-supplied background first, then the prefetched research profile
+        company_info = '\n'.join(filter(None, (persona.get('company_info'), persona.get('company_profile'))))
+        prompt = PERSONA_PROMPT.render(
+            name=persona['name'],
+            role=persona['role'],
+            company=persona['company'],
+            difficulty=persona.get('difficulty', 'professional'),
+            background=persona.get('background', 'You are a busy professional.'),
+            company_context=COMPANY_SECTION.render(
+                company=persona['company'], company_info=company_info
+            ) if company_info else ''
+        )
+        if summary:
+            prompt += SUMMARY_SECTION.render(summary=summary)
+        return prompt
+    
+    def begin_turn(self, session_id: str, token: Optional[CancelToken] = None) -> CancelToken:
+        """
+        Make `token` (or a new one) the session's latest turn and cancel the
+        one it supersedes.
+        
+        A newer user utterance always wins: the previous turn's provider calls
+        and any audio it has not sent yet are abandoned. Call this only once
+        the new turn has been accepted, so a rejected utterance never kills
+        the reply in flight.
+        """
+        token = token or CancelToken()
+        with self._turn_lock:
+            previous = self._turn_tokens.get(session_id)
+            self._turn_tokens[session_id] = token
+        if previous:
+            previous.cancel()
+        return token
+    
+    def finish_turn(self, session_id: str, token: CancelToken) -> None:
+        """Forget the turn's token if it is still the latest one"""
+        with self._turn_lock:
+            if self._turn_tokens.get(session_id) is token:
+                del self._turn_tokens[session_id]
+    
+    def cancel_turn(self, session_id: str) -> Optional[CancelToken]:
+        """Cancel whatever turn is in flight for the session"""
+        with self._turn_lock:
+            token = self._turn_tokens.pop(session_id, None)
+        if token:
+            token.cancel()
+        return token
+    
     def end_conversation(self, session_id: str) -> Dict:
         """End conversation and return final data"""
-        if session_id in self.conversations:
-            data = self.conversations[session_id]
-            del self.conversations[session_id]
-            return data
+        self.cancel_turn(session_id)
+        self._summarizer.forget(session_id)
+        session = self.store.delete(session_id)
+        if session:
+            return session.to_dict()
         return {}
 
 # Singleton instance
-conversation_service = ConversationService()
\ No newline at end of file
+conversation_service = ConversationService(
+    create_session_store(),
+    ContextWindow(
+        budget_tokens=int(os.getenv('CONTEXT_TOKEN_BUDGET', '1500')),
+        min_turns=int(os.getenv('CONTEXT_MIN_TURNS', '2')),
+        max_tokens=int(os.getenv('CONTEXT_MAX_TOKENS', '0')) or None
+    )
+)
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+Feedback Batches
+Scores many transcripts at once on a bounded pool, deduplicating identical
+transcripts and reporting results in completion order
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple
+
+from app.services.feedback_service import feedback_service
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_BATCH_ITEMS_TOTAL = metrics.counter(
+    'pitchpoint_feedback_batch_items_total',
+    'Batch feedback items by result',
+    labels=('result',)
+)
+
+
+class InvalidEntry(NamedTuple):
+    """Placeholder for an input line that could not be parsed"""
+    error: str
+
+
+def parse_jsonl(text: str) -> List[Any]:
+    """
+    Parse a JSONL upload into batch entries. Malformed lines become
+    InvalidEntry so they are reported per item instead of failing the batch.
+    """
+    entries: List[Any] = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            entries.append(InvalidEntry(f"Line {number}: invalid JSON ({e.msg})"))
+    return entries
+
+
+class FeedbackBatchRunner:
+    """
+    Runs batch items on one pool shared by every batch in the process, so
+    concurrent batches together never exceed `max_concurrency` evaluations
+    against the provider. Items with the same cache key (same normalized
+    transcript, mode and prompt version) are evaluated once.
+    """
+
+    def __init__(
+        self,
+        run: Callable[..., Dict],
+        key: Callable[..., str],
+        max_concurrency: int = 4,
+        max_items: int = 1000
+    ):
+        self._run = run
+        self._key = key
+        self.max_items = max_items
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='feedback-batch')
+
+    def run(self, entries: List[Any], **defaults) -> Iterator[Dict]:
+        """
+        Evaluate `entries` (transcript strings or {"id", "transcript", "mode",
+        "rubric"} objects) and yield one result per entry as it finishes, then
+        a summary. `defaults` are the options for items that don't set them.
+
+        Invalid entries are yielded first. If the consumer stops iterating
+        (client disconnected), evaluations that have not started are cancelled.
+        """
+        started = time.monotonic()
+        groups: Dict[str, List[Dict]] = {}
+        arguments: Dict[str, Dict] = {}
+        succeeded = failed = 0
+
+        for index, entry in enumerate(entries):
+            item = {'index': index}
+            try:
+                transcript, options, item_id = self._unpack(entry, defaults)
+                if item_id is not None:
+                    item['id'] = item_id
+                key = self._key(transcript, **options)
+            except ValueError as e:
+                failed += 1
+                FEEDBACK_BATCH_ITEMS_TOTAL.inc(result='invalid')
+                yield {**item, 'success': False, 'error': str(e)}
+                continue
+            if key in groups:
+                item['duplicate_of'] = groups[key][0]['index']
+            else:
+                groups[key] = []
+                arguments[key] = {'transcript': transcript, 'options': options}
+            groups[key].append(item)
+
+        futures = {
+            self._executor.submit(self._run, args['transcript'], **args['options']): key
+            for key, args in arguments.items()
+        }
+        try:
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    outcome = {'success': True, 'feedback': future.result()}
+                except Exception as e:
+                    logger.warning("Batch feedback item failed: %s", e)
+                    outcome = {'success': False, 'error': str(e)}
+                for item in groups[key]:
+                    if outcome['success']:
+                        succeeded += 1
+                        FEEDBACK_BATCH_ITEMS_TOTAL.inc(result='duplicate' if 'duplicate_of' in item else 'ok')
+                    else:
+                        failed += 1
+                        FEEDBACK_BATCH_ITEMS_TOTAL.inc(result='error')
+                    yield {**item, **outcome}
+        finally:
+            for future in futures:
+                future.cancel()
+
+        yield {
+            'summary': {
+                'total': len(entries),
+                'unique': len(groups),
+                'succeeded': succeeded,
+                'failed': failed,
+                'elapsed_seconds': round(time.monotonic() - started, 2)
+            }
+        }
+
+    def _unpack(self, entry: Any, defaults: Dict):
+        """
+        Raises:
+            ValueError: If the entry is not a transcript or transcript object
+        """
+        if isinstance(entry, InvalidEntry):
+            raise ValueError(entry.error)
+        if isinstance(entry, str):
+            return entry, defaults, None
+        if isinstance(entry, dict) and isinstance(entry.get('transcript'), str):
+            options = {name: entry.get(name) or value for name, value in defaults.items()}
+            return entry['transcript'], options, entry.get('id')
+        raise ValueError("Each item must be a transcript string or an object with a transcript")
+
+
+# Singleton instance
+feedback_batches = FeedbackBatchRunner(
+    feedback_service.generate_feedback,
+    feedback_service.cache_key,
+    max_concurrency=int(os.getenv('FEEDBACK_BATCH_CONCURRENCY', '4')),
+    max_items=int(os.getenv('FEEDBACK_BATCH_MAX_ITEMS', '1000'))
+)
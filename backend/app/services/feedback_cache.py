@@ -0,0 +1,101 @@
+"""
+Feedback Cache
+Persistent, LRU-bounded store of feedback results keyed by transcript content
+and the exact evaluation settings that produced them
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from agent.local_sqlite import ThreadLocalSQLite
+
+
+def normalize_transcript(transcript: str) -> str:
+    """Collapse whitespace so re-submitted copies of a call hash the same"""
+    return ' '.join(transcript.split())
+
+
+def feedback_cache_key(transcript: str, prompt_version: str, model: str, temperature: float, **options: Any) -> str:
+    """
+    Hash of (normalized transcript, prompt version, model, temperature, options).
+
+    The prompt version already covers the rubric text, so a rubric change
+    never serves feedback graded against the old rubric.
+    """
+    transcript_hash = hashlib.sha256(normalize_transcript(transcript).encode('utf-8')).hexdigest()
+    payload = json.dumps(
+        [transcript_hash, prompt_version, model, temperature, options],
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class FeedbackCache:
+    """
+    SQLite-backed result cache, shared by every worker on the host.
+
+    Entries are stored as JSON text and evicted least-recently-used once
+    `max_entries` is exceeded. Access times are only rewritten when they are
+    more than `touch_interval` seconds old, so hot entries don't turn every
+    read into a write.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000, touch_interval: float = 60):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self._db = ThreadLocalSQLite(path)
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS feedback (
+                cache_key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS feedback_last_access ON feedback(last_access);
+        """)
+
+    def _connection(self):
+        return self._db.connection()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached result JSON, or None"""
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT result, last_access FROM feedback WHERE cache_key = ?', (key,)
+        ).fetchone()
+        if not row:
+            return None
+        now = time.time()
+        if now - row[1] > self.touch_interval:
+            conn.execute('UPDATE feedback SET last_access = ? WHERE cache_key = ?', (now, key))
+        return row[0]
+
+    def put(self, key: str, result: str) -> None:
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO feedback (cache_key, result, created_at, last_access) VALUES (?, ?, ?, ?)',
+            (key, result, now, now)
+        )
+        conn.execute(
+            'DELETE FROM feedback WHERE cache_key IN '
+            '(SELECT cache_key FROM feedback ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def stats(self) -> Dict:
+        entries = self._connection().execute('SELECT COUNT(*) FROM feedback').fetchone()[0]
+        return {'entries': entries, 'max_entries': self.max_entries}
+
+
+def create_feedback_cache() -> Optional[FeedbackCache]:
+    """Cache configured from the environment; FEEDBACK_CACHE_PATH='' disables it"""
+    path = os.getenv('FEEDBACK_CACHE_PATH', '.cache/feedback.sqlite3')
+    if not path:
+        return None
+    return FeedbackCache(path, max_entries=int(os.getenv('FEEDBACK_CACHE_MAX_ENTRIES', '5000')))
@@ -0,0 +1,167 @@
+"""
+Feedback Jobs
+Runs feedback evaluations on a bounded background pool so request threads
+return immediately with a job id
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from app.services.feedback_service import feedback_service
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+class JobQueueFullError(Exception):
+    """Raised when too many feedback jobs are already waiting"""
+
+
+class FeedbackJob:
+    __slots__ = ('job_id', 'session_id', 'transcript', 'transcript_length', 'options', 'run', 'status',
+                 'created_at', 'started_at', 'finished_at', 'result', 'error')
+
+    def __init__(self, job_id: str, session_id: Optional[str], transcript: str, options: Optional[Dict] = None,
+                 run: Optional[Callable[..., Dict]] = None):
+        self.job_id = job_id
+        self.session_id = session_id
+        self.transcript = transcript
+        self.transcript_length = len(transcript)
+        self.options = options or {}
+        self.run = run
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    def to_dict(self) -> Dict:
+        data = {
+            'job_id': self.job_id,
+            'session_id': self.session_id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'transcript_length': self.transcript_length
+        }
+        if self.status == COMPLETED:
+            data['feedback'] = self.result
+        elif self.status == FAILED:
+            data['error'] = self.error
+        return data
+
+
+class FeedbackJobManager:
+    """
+    Bounded worker pool plus an in-process job table.
+
+    Finished jobs are kept for `result_ttl` seconds so clients can poll for
+    them, then dropped; listeners are called when a job finishes (used to
+    push `feedback_ready` to the session's Socket.IO room). Job state is
+    per process, so with several workers the poll must reach the worker
+    that accepted the job (the same sticky routing the voice socket needs).
+    """
+
+    def __init__(
+        self,
+        run: Callable[..., Dict],
+        max_workers: int = 4,
+        max_pending: int = 100,
+        result_ttl: float = 3600
+    ):
+        self._run = run
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='feedback')
+        self._jobs: 'OrderedDict[str, FeedbackJob]' = OrderedDict()
+        self._listeners: List[Callable[[FeedbackJob], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[FeedbackJob], None]) -> None:
+        self._listeners.append(listener)
+
+    def submit(self, transcript: str, session_id: Optional[str] = None,
+               run: Optional[Callable[..., Dict]] = None, **options) -> FeedbackJob:
+        """
+        Queue an evaluation and return its job immediately. `options` are
+        passed through to the run function (`run` if given, otherwise the
+        manager's default evaluation).
+
+        Raises:
+            JobQueueFullError: If `max_pending` jobs are already waiting or running
+        """
+        job = FeedbackJob(uuid.uuid4().hex, session_id, transcript, options, run)
+        with self._lock:
+            self._expire()
+            pending = sum(1 for existing in self._jobs.values() if not existing.finished)
+            if pending >= self.max_pending:
+                raise JobQueueFullError("Too many feedback jobs in progress, try again shortly")
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._execute, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[FeedbackJob]:
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, COMPLETED: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def _execute(self, job: FeedbackJob) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = (job.run or self._run)(job.transcript, **job.options)
+            job.status = COMPLETED
+        except Exception as e:
+            logger.exception("Feedback job %s failed", job.job_id)
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            # Finished jobs only hold their result while they wait to be polled
+            job.transcript = ''
+            job.options = {}
+        for listener in self._listeners:
+            try:
+                listener(job)
+            except Exception:
+                logger.exception("Feedback job listener failed for %s", job.job_id)
+
+    def _expire(self) -> None:
+        # Jobs are in creation order; drop finished ones past their TTL
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+# Singleton instance
+feedback_jobs = FeedbackJobManager(
+    feedback_service.generate_feedback,
+    max_workers=int(os.getenv('FEEDBACK_JOB_WORKERS', '4')),
+    max_pending=int(os.getenv('FEEDBACK_JOB_MAX_PENDING', '100')),
+    result_ttl=float(os.getenv('FEEDBACK_JOB_TTL', '3600'))
+)
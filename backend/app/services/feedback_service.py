@@ -3,36 +3,93 @@ Feedback Service
 Handles the business logic for evaluating sales call transcripts
 """
 
-import os
 import json
-import cohere
-from app.constants.rubric import SPORTS_PARTNERSHIP_RUBRIC
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from agent.json_stream import IncrementalJSONParser, parse_json_response
+from app.clients.transport import cohere_request_options, get_cohere_client, provider_transport
+from app.services.call_analytics import analyze_transcript, render_facts
+from app.services.feedback_cache import FeedbackCache, create_feedback_cache, feedback_cache_key
+from app.services.metrics import metrics
+from app.services.prompt_templates import PromptTemplate, prompt_hash, prompt_registry
+from app.services.rubric import Rubric, rubric_registry
+from app.services.single_flight import SingleFlight
+from app.services.transcript import parse_transcript, window_turns
 
+FEEDBACK_MODEL = "command-a-03-2025"
+FEEDBACK_TEMPERATURE = 0.3
+
+# "single": one call grades everything; "parallel": one call per category;
+# "segmented": map-reduce over transcript windows (used automatically for long calls)
+EVALUATION_MODES = ('single', 'parallel', 'segmented')
+DEFAULT_EVALUATION_MODE = os.getenv('FEEDBACK_EVALUATION_MODE', 'single')
+CATEGORY_ATTEMPTS = int(os.getenv('FEEDBACK_CATEGORY_ATTEMPTS', '2'))
+
+# Transcripts longer than this are evaluated segment by segment
+LONG_TRANSCRIPT_CHARS = int(os.getenv('FEEDBACK_LONG_TRANSCRIPT_CHARS', '24000'))
+WINDOW_CHARS = int(os.getenv('FEEDBACK_WINDOW_CHARS', '12000'))
+WINDOW_OVERLAP_TURNS = int(os.getenv('FEEDBACK_WINDOW_OVERLAP_TURNS', '2'))
+
+# Shared by all parallel evaluations; separate from the job pool that waits on it
+_evaluation_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('FEEDBACK_PARALLEL_WORKERS', '16')),
+    thread_name_prefix='feedback-eval'
+)
+
+# Cap on Cohere calls in flight across every evaluation in the process. Jobs,
+# batches and the parallel/segmented fan-out all multiply, so the provider
+# rate limit is enforced here rather than by any one pool size.
+_provider_calls = threading.BoundedSemaphore(int(os.getenv('FEEDBACK_MAX_PROVIDER_CALLS', '8')))
+
+class EvaluationError(Exception):
+    """
+    Raised when the model provider fails (or keeps returning unusable output)
+    after retries; unlike ValueError, not the caller's fault
+    """
 
-class FeedbackService:
-    """Service for generating feedback from call transcripts"""
-    
-    def build_evaluation_prompt(self, transcript: str) -> str:
-        """
-        Constructs a detailed prompt for Cohere to evaluate the transcript
-        """
-        
-        rubric_text = "# EVALUATION RUBRIC\n\n"
-        
-        for category in SPORTS_PARTNERSHIP_RUBRIC["categories"]:
-            rubric_text += f"\n## {category['name']} (Weight: {category['weight'] * 100}%)\n"
-            rubric_text += f"{category['description']}\n\n"
-            rubric_text += "**Criteria:**\n"
-            for criterion in category['criteria']:
-                rubric_text += f"- {criterion}\n"
-            rubric_text += "\n**Scoring Guide:**\n"
-            for level, description in category['evaluation_points'].items():
-                rubric_text += f"- **{level.upper()}**: {description}\n"
-        
-        prompt = f"""You are an expert sports partnership sales coach evaluating a sales call transcript. 
+
+FEEDBACK_REQUESTS_TOTAL = metrics.counter(
+    'pitchpoint_feedback_requests_total',
+    'Feedback requests by cache result (hit, miss, coalesced)',
+    labels=('result',)
+)
+
+
+def render_category_text(category: dict) -> str:
+    """Markdown rendering of one rubric category"""
+    lines = [
+        f"## {category['name']} (Weight: {category['weight'] * 100}%)",
+        f"{category['description']}\n",
+        "**Criteria:**"
+    ]
+    for criterion in category['criteria']:
+        lines.append(f"- {criterion}")
+    lines.append("\n**Scoring Guide:**")
+    for level, description in category['evaluation_points'].items():
+        lines.append(f"- **{level.upper()}**: {description}")
+    return "\n".join(lines)
+
+
+def render_rubric_text(rubric: dict) -> str:
+    """Markdown rendering of the rubric for the evaluation prompt"""
+    sections = "".join(f"\n\n{render_category_text(category)}" for category in rubric["categories"])
+    return f"# EVALUATION RUBRIC\n{sections}\n"
+
+
+EVALUATION_PROMPT = PromptTemplate(
+    'feedback.evaluation',
+    """You are an expert sports partnership sales coach evaluating a sales call transcript. 
 
 {rubric_text}
 
+# CALL STATISTICS
+
+Measured directly from the transcript (exact; use these instead of estimating):
+
+{call_facts}
+
 # CALL TRANSCRIPT TO EVALUATE
 
 {transcript}
@@ -48,71 +105,304 @@ Analyze this sports partnership sales call transcript against the rubric above.
 
 Respond in the following JSON format ONLY (no additional text):
 
-{{
+{
     "categories": [
-        {{
+        {
             "name": "Rapport & Relationship Building",
             "score": 85,
             "evidence": "Specific quotes or observations from the transcript",
             "strengths": ["What they did well with examples"],
             "improvements": ["Specific, actionable recommendations"]
-        }},
+        },
         // ... repeat for all 7 categories
     ],
-    "overall": {{
+    "overall": {
         "weighted_score": 82,
         "grade": "B - Strong",
         "summary": "2-3 sentence overall assessment",
         "top_3_strengths": ["Strength 1", "Strength 2", "Strength 3"],
         "top_3_priorities": ["Priority improvement 1", "Priority 2", "Priority 3"]
-    }},
-    "talk_ratio": {{
+    },
+    "talk_ratio": {
+        "rep_percentage": 45,
+        "prospect_percentage": 55,
+        "analysis": "Brief analysis of whether this ratio is optimal"
+    },
+    "key_moments": [
+        {
+            "timestamp": "approximate location in call",
+            "moment": "Description of what happened",
+            "impact": "Why this was significant (positive or negative)"
+        }
+    ]
+}
+
+Use the measured call statistics for talk_ratio and for any question counts. Be specific, constructive, and provide actionable feedback. Reference actual quotes from the transcript when possible.""",
+    slots=('rubric_text', 'call_facts', 'transcript')
+)
+
+CATEGORY_PROMPT = PromptTemplate(
+    'feedback.category',
+    """You are an expert sports partnership sales coach evaluating one part of a sales call transcript.
+
+# EVALUATION CRITERION
+
+{category_text}
+
+# CALL STATISTICS
+
+Measured directly from the transcript (exact; use these instead of estimating):
+
+{call_facts}
+
+# CALL TRANSCRIPT TO EVALUATE
+
+{transcript}
+
+# YOUR TASK
+
+Evaluate the call ONLY on "{category_name}" using the criterion above:
+
+1. Provide a score from 0-100
+2. Give specific evidence from the transcript that supports your score
+3. Provide 2-3 actionable recommendations for improvement
+4. Highlight what was done well
+
+Respond in the following JSON format ONLY (no additional text):
+
+{
+    "name": "{category_name}",
+    "score": 85,
+    "evidence": "Specific quotes or observations from the transcript",
+    "strengths": ["What they did well with examples"],
+    "improvements": ["Specific, actionable recommendations"]
+}""",
+    slots=('category_text', 'category_name', 'call_facts', 'transcript')
+)
+
+MOMENTS_PROMPT = PromptTemplate(
+    'feedback.moments',
+    """You are an expert sports partnership sales coach reviewing a sales call transcript.
+
+# CALL STATISTICS
+
+Measured directly from the transcript (exact; use these instead of estimating):
+
+{call_facts}
+
+# CALL TRANSCRIPT TO EVALUATE
+
+{transcript}
+
+# YOUR TASK
+
+Identify the moments that shaped this call, estimate how much each side talked, and summarize the call.
+
+Respond in the following JSON format ONLY (no additional text):
+
+{
+    "summary": "2-3 sentence overall assessment",
+    "talk_ratio": {
         "rep_percentage": 45,
         "prospect_percentage": 55,
         "analysis": "Brief analysis of whether this ratio is optimal"
-    }},
+    },
     "key_moments": [
-        {{
+        {
             "timestamp": "approximate location in call",
             "moment": "Description of what happened",
             "impact": "Why this was significant (positive or negative)"
-        }}
+        }
     ]
-}}
+}
+
+Use the measured call statistics for talk_ratio. Reference actual quotes from the transcript when possible.""",
+    slots=('call_facts', 'transcript')
+)
+
+
+WINDOW_PROMPT = PromptTemplate(
+    'feedback.window',
+    """You are an expert sports partnership sales coach taking notes on one segment of a long sales call transcript.
+
+# RUBRIC CATEGORIES
 
-Be specific, constructive, and provide actionable feedback. Reference actual quotes from the transcript when possible."""
+{rubric_outline}
 
-        return prompt
+# CALL SEGMENT {segment_label}
+
+{transcript}
+
+# YOUR TASK
+
+Record what this segment shows about the sales rep for each rubric category it touches. Skip categories the segment says nothing about. Quote the transcript where you can.
+
+Respond in the following JSON format ONLY (no additional text):
+
+{
+    "observations": [
+        {
+            "category": "Discovery & Needs Assessment",
+            "type": "strength",
+            "evidence": "Specific quote or observation from the segment"
+        }
+    ],
+    "key_moments": [
+        {
+            "moment": "Description of what happened",
+            "impact": "Why this was significant (positive or negative)"
+        }
+    ],
+    "summary": "1-2 sentences on what happened in this segment"
+}
+
+Use "strength" or "weakness" for type. Include at most 12 observations and 3 key moments.""",
+    slots=('rubric_outline', 'segment_label', 'transcript')
+)
+
+REDUCE_PROMPT = PromptTemplate(
+    'feedback.reduce',
+    """You are an expert sports partnership sales coach evaluating a long sales call.
+
+{rubric_text}
+
+# CALL STATISTICS
+
+Measured directly from the transcript (exact; use these instead of estimating):
+
+{call_facts}
+
+# CALL NOTES
+
+The call was too long to read in one pass, so it was reviewed in consecutive, slightly overlapping segments. These are the notes from every segment, in call order:
+
+{notes}
+
+# YOUR TASK
+
+Evaluate the whole call against the rubric above using these notes. For each category:
+
+1. Provide a score from 0-100
+2. Give specific evidence from the notes that supports your score
+3. Provide 2-3 actionable recommendations for improvement
+4. Highlight what was done well
+
+""" + EVALUATION_PROMPT.text[EVALUATION_PROMPT.text.index("Respond in the following JSON format"):],
+    slots=('rubric_text', 'call_facts', 'notes')
+)
+
+
+def render_rubric_outline(rubric: dict) -> str:
+    """Category names and descriptions only, for segment note-taking"""
+    return "\n".join(f"- {category['name']}: {category['description']}" for category in rubric["categories"])
+
+
+def register_rubric_prompts(rubric: Rubric) -> None:
+    """
+    Bake the rubric text into the evaluation prompts (once per rubric, and
+    again whenever a rubric file is reloaded)
+    """
+    prefix = rubric.prompt_prefix
+    rubric_text = render_rubric_text(rubric.data)
+    
+    def register(template: PromptTemplate, name: str) -> None:
+        prompt_registry.register(PromptTemplate(f'{prefix}.{name}', template.text, template.slots))
     
-    def calculate_weighted_score(self, category_scores: list) -> float:
+    register(EVALUATION_PROMPT.partial(rubric_text=rubric_text), 'evaluation')
+    for index, category in enumerate(rubric.categories):
+        register(CATEGORY_PROMPT.partial(
+            category_text=render_category_text(category),
+            category_name=category['name']
+        ), f'category.{index}')
+    register(MOMENTS_PROMPT, 'moments')
+    register(WINDOW_PROMPT.partial(rubric_outline=render_rubric_outline(rubric.data)), 'window')
+    register(REDUCE_PROMPT.partial(rubric_text=rubric_text), 'reduce')
+
+
+def _prompt(rubric: Rubric, name: str) -> PromptTemplate:
+    return prompt_registry.get(f'{rubric.prompt_prefix}.{name}')
+
+
+rubric_registry.add_listener(register_rubric_prompts)
+
+
+class FeedbackService:
+    """Service for generating feedback from call transcripts"""
+    
+    def __init__(self, cache: Optional[FeedbackCache] = None):
+        # Results keyed by transcript + prompt version + model settings
+        self.cache = cache
+        # Identical requests in flight share one provider call
+        self._in_flight = SingleFlight()
+    
+    @property
+    def prompt_version(self) -> str:
+        """Version hash of the evaluation prompt currently in use"""
+        return self.prompt_version_for(DEFAULT_EVALUATION_MODE)
+    
+    def build_evaluation_prompt(self, transcript: str, rubric: Optional[str] = None) -> str:
         """
-        Calculates overall weighted score based on rubric weights
+        Constructs a detailed prompt for Cohere to evaluate the transcript
         """
-        total_score = 0
-        for i, category in enumerate(SPORTS_PARTNERSHIP_RUBRIC["categories"]):
-            category_score = category_scores[i]["score"]
-            weight = category["weight"]
-            total_score += category_score * weight
-        
-        return round(total_score, 1)
+        return _prompt(rubric_registry.get(rubric), 'evaluation').render(
+            call_facts=render_facts(analyze_transcript(transcript)),
+            transcript=transcript
+        )
+    
+    def calculate_weighted_score(self, category_scores: list, rubric: Optional[str] = None) -> float:
+        """
+        Calculates overall weighted score based on rubric weights, matching
+        categories by name
+        """
+        return rubric_registry.get(rubric).weighted_score(category_scores)
     
-    def get_grade_from_score(self, score: float) -> dict:
+    def get_grade_from_score(self, score: float, rubric: Optional[str] = None) -> dict:
         """
         Returns grade information based on overall score
         """
-        for range_str, grade_info in SPORTS_PARTNERSHIP_RUBRIC["overall_scoring"].items():
-            min_score, max_score = map(int, range_str.split('-'))
-            if min_score <= score <= max_score:
-                return grade_info
+        return rubric_registry.get(rubric).grade_for(score)
+    
+    def validate_transcript(self, transcript: str) -> None:
+        """
+        Raises:
+            ValueError: If transcript is too short to evaluate
+        """
+        if len(transcript.strip()) < 50:
+            raise ValueError("Transcript too short to evaluate (minimum 50 characters)")
+    
+    def prompt_version_for(self, mode: str, rubric: Optional[Rubric] = None) -> str:
+        """Version hash covering every prompt the evaluation mode sends"""
+        rubric = rubric or rubric_registry.get()
+        if mode == 'parallel':
+            versions = [template.version for template in self._parallel_templates(rubric)]
+            return prompt_hash(':'.join(versions))
+        if mode == 'segmented':
+            versions = [_prompt(rubric, name).version for name in ('window', 'reduce')]
+            return prompt_hash(':'.join(versions))
+        return _prompt(rubric, 'evaluation').version
+    
+    def cache_key(self, transcript: str, mode: Optional[str] = None, rubric: Optional[str] = None) -> str:
+        """
+        Key identifying the evaluation a request would run (also used to
+        dedupe batch items)
         
-        return SPORTS_PARTNERSHIP_RUBRIC["overall_scoring"]["0-59"]
+        Raises:
+            ValueError: If transcript is too short, or mode or rubric is unknown
+        """
+        return self._prepare(transcript, mode, rubric)[2]
     
-    def generate_feedback(self, transcript: str) -> dict:
+    def generate_feedback(self, transcript: str, mode: Optional[str] = None, rubric: Optional[str] = None) -> dict:
         """
         Generate comprehensive feedback for a call transcript
         
         Args:
             transcript: Full text of the sales call
+            mode: "single" (one call for the whole rubric), "parallel"
+                  (one concurrent call per category) or "segmented"
+                  (map-reduce over windows); defaults to
+                  FEEDBACK_EVALUATION_MODE. Transcripts longer than
+                  FEEDBACK_LONG_TRANSCRIPT_CHARS are always segmented.
+            rubric: Rubric id; defaults to RUBRIC_DEFAULT
             
         Returns:
             Dictionary containing feedback data
@@ -121,94 +411,487 @@ Be specific, constructive, and provide actionable feedback. Reference actual quo
             ValueError: If transcript is too short or invalid
             Exception: If AI generation fails
         """
-        if len(transcript.strip()) < 50:
-            raise ValueError("Transcript too short to evaluate (minimum 50 characters)")
+        mode, prompt_version, key, rubric = self._prepare(transcript, mode, rubric)
         
-        # Initialize Cohere client
-        api_key = os.getenv('COHERE_API_KEY')
-        if not api_key:
-            raise ValueError("COHERE_API_KEY not configured")
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                FEEDBACK_REQUESTS_TOTAL.inc(result='hit')
+                return json.loads(cached)
         
-        try:
-            # Try ClientV2 first (newer API)
-            client = cohere.ClientV2(api_key)
-            use_v2 = True
-        except Exception:
-            # Fallback to v1 API
-            client = cohere.Client(api_key)
-            use_v2 = False
-        
-        # Build evaluation prompt
-        prompt = self.build_evaluation_prompt(transcript)
-        
-        # Call Cohere API
+        def evaluate() -> str:
+            # Talk ratio, questions and turn stats are measured, not generated
+            analytics = analyze_transcript(transcript)
+            facts = render_facts(analytics)
+            if mode == 'parallel':
+                feedback_data = self._evaluate_parallel(transcript, facts, rubric)
+            elif mode == 'segmented':
+                feedback_data = self._evaluate_segmented(transcript, facts, rubric)
+            else:
+                feedback_data = self._evaluate(_prompt(rubric, 'evaluation').render(
+                    call_facts=facts,
+                    transcript=transcript
+                ), rubric)
+            self._apply_analytics(feedback_data, analytics)
+            feedback_data["prompt_version"] = prompt_version
+            result = json.dumps(feedback_data)
+            if self.cache:
+                self.cache.put(key, result)
+            return result
+        
+        # Each caller decodes its own copy of the shared JSON result
+        result, shared = self._in_flight.do(key, evaluate)
+        FEEDBACK_REQUESTS_TOTAL.inc(result='coalesced' if shared else 'miss')
+        return json.loads(result)
+    
+    def stream_feedback(self, transcript: str, mode: Optional[str] = None,
+                        rubric: Optional[str] = None) -> Iterator[Tuple[str, dict]]:
+        """
+        Generate feedback as a sequence of (event, data) sections
+        
+        Yields "analytics" first (measured locally, instant). In single mode the
+        model's output is parsed as it streams, so each "category"
+        ({"index", "category"}), "talk_ratio" and "key_moments" are yielded
+        as soon as they close, and "overall" once the categories are in (its
+        score and grade are computed from them). Other modes, cache hits and
+        requests joining an identical one in flight yield the same sections
+        once the result is ready. Always ends with "complete" carrying the
+        full, validated feedback.
+        
+        Raises:
+            ValueError: If transcript is too short, mode or rubric is unknown
+                        or the model output can't be parsed
+        """
+        mode, prompt_version, key, rubric = self._prepare(transcript, mode, rubric)
+        analytics = analyze_transcript(transcript)
+        yield "analytics", analytics
+        
+        cached = self.cache.get(key) if self.cache else None
+        if cached is not None:
+            FEEDBACK_REQUESTS_TOTAL.inc(result='hit')
+            feedback_data = json.loads(cached)
+        elif mode == 'single':
+            # Joins generate_feedback's single-flight, so a streamed and a
+            # plain request for the same transcript share one model call
+            call, leader = self._in_flight.join(key)
+            if not leader:
+                FEEDBACK_REQUESTS_TOTAL.inc(result='coalesced')
+                feedback_data = json.loads(self._in_flight.wait(call))
+            else:
+                FEEDBACK_REQUESTS_TOTAL.inc(result='miss')
+                try:
+                    feedback_data = yield from self._stream_single(transcript, analytics, prompt_version, key, rubric)
+                except GeneratorExit:
+                    # The client went away; waiters get an error rather than hanging
+                    self._in_flight.finish(key, call, error=EvaluationError("Streamed evaluation was abandoned"))
+                    raise
+                except BaseException as e:
+                    self._in_flight.finish(key, call, error=e)
+                    raise
+                self._in_flight.finish(key, call, result=json.dumps(feedback_data))
+                yield "complete", feedback_data
+                return
+        else:
+            # Parallel and segmented results are only aggregated at the end
+            feedback_data = self.generate_feedback(transcript, mode, rubric.id)
+        
+        for index, category in enumerate(feedback_data.get("categories", [])):
+            yield "category", {"index": index, "category": category}
+        for section in ("overall", "talk_ratio", "key_moments"):
+            if section in feedback_data:
+                yield section, feedback_data[section]
+        yield "complete", feedback_data
+    
+    def _stream_single(self, transcript: str, analytics: dict, prompt_version: str, key: str, rubric: Rubric):
+        """Stream the single-call evaluation, yielding sections; returns the full feedback"""
+        prompt = _prompt(rubric, 'evaluation').render(
+            call_facts=render_facts(analytics),
+            transcript=transcript
+        )
+        parser = IncrementalJSONParser(emit=_is_feedback_section)
+        # "overall" waits until the categories array has closed, so its score
+        # and grade are the locally computed ones "complete" will carry
+        categories = model_overall = None
+        overall_sent = False
+        for delta in self._chat_stream(prompt):
+            for path, value in parser.feed(delta):
+                if path == ("categories",):
+                    categories = value if isinstance(value, list) else []
+                elif path[0] == "categories":
+                    yield "category", {"index": path[1], "category": value}
+                elif path[0] == "overall":
+                    model_overall = value
+                elif path[0] == "talk_ratio" and isinstance(value, dict) and analytics["turns"]["total"]:
+                    yield "talk_ratio", {**value, **analytics["talk_ratio"]["by_words"]}
+                else:
+                    yield path[0], value
+                if categories is not None and model_overall is not None:
+                    yield "overall", self._overall_section(model_overall, categories, rubric)
+                    model_overall = None
+                    overall_sent = True
+            if parser.done:
+                # Anything after the root object is ignored, so stop paying for it
+                break
+        
+        feedback_data = self._complete_evaluation(parser.result(), rubric)
+        if not overall_sent:
+            # The model left the section out; the computed one is still sent
+            yield "overall", feedback_data["overall"]
+        self._apply_analytics(feedback_data, analytics)
+        feedback_data["prompt_version"] = prompt_version
+        if self.cache:
+            self.cache.put(key, json.dumps(feedback_data))
+        return feedback_data
+    
+    def complete_json(self, prompt: str) -> dict:
+        """
+        One Cohere call with the feedback model settings, parsed as JSON
+        
+        Raises:
+            ValueError: If the response holds no valid JSON object
+        """
+        return self._parse_json(self._chat(prompt))
+    
+    def build_feedback(self, category_results: List[dict], moments: dict, analytics: dict,
+                       rubric: Optional[str] = None) -> dict:
+        """
+        Assemble feedback from category results scored elsewhere (e.g. live
+        coaching), with the same overall section and analytics as a full evaluation
+        
+        Raises:
+            ValueError: If a category has no usable score or the rubric is unknown
+        """
+        rubric = rubric_registry.get(rubric)
+        categories = [self._normalize_category(result["name"], result) for result in category_results]
+        # Rubric order, whatever order the results arrived in
+        categories.sort(key=lambda category: rubric.index(category["name"]))
+        feedback_data = self._aggregate(categories, moments, rubric)
+        missing = rubric.missing_categories(categories)
+        if missing:
+            feedback_data["overall"]["unscored_categories"] = missing
+        self._apply_analytics(feedback_data, analytics)
+        return feedback_data
+    
+    def _prepare(self, transcript: str, mode: Optional[str], rubric: Optional[str] = None) -> Tuple[str, str, str, Rubric]:
+        """
+        Validate the request and resolve (mode, prompt version, cache key, rubric)
+        
+        Raises:
+            ValueError: If transcript is too short, or mode or rubric is unknown
+        """
+        self.validate_transcript(transcript)
+        rubric = rubric_registry.get(rubric)
+        mode = mode or DEFAULT_EVALUATION_MODE
+        if mode not in EVALUATION_MODES:
+            raise ValueError(f"Unknown evaluation mode: {mode}")
+        if len(transcript) > LONG_TRANSCRIPT_CHARS:
+            mode = 'segmented'
+        
+        prompt_version = self.prompt_version_for(mode, rubric)
+        # Weights and grade ranges aren't all in the prompt text, so the rubric version is keyed too
+        key = feedback_cache_key(
+            transcript, prompt_version, FEEDBACK_MODEL, FEEDBACK_TEMPERATURE,
+            mode=mode, rubric=rubric.id, rubric_version=rubric.version
+        )
+        return mode, prompt_version, key, rubric
+    
+    def _chat_stream(self, prompt: str) -> Iterator[str]:
+        """Stream one Cohere chat response as text deltas"""
+        client, use_v2 = get_cohere_client()
+        
+        with _provider_calls:
+            yield from self._stream_deltas(client, use_v2, prompt)
+    
+    def _stream_deltas(self, client, use_v2: bool, prompt: str) -> Iterator[str]:
         if use_v2:
-            response = client.chat(
-                model="command-a-03-2025",
+            stream = client.chat_stream(
+                model=FEEDBACK_MODEL,
                 messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
+                temperature=FEEDBACK_TEMPERATURE,
+                **cohere_request_options()
             )
-            response_text = response.message.content[0].text.strip()
+            deltas = (event.delta.message.content.text for event in stream if event.type == "content-delta")
         else:
-            response = client.chat(
+            stream = client.chat_stream(
                 message=prompt,
-                model="command-a-03-2025",
-                temperature=0.3,
+                model=FEEDBACK_MODEL,
+                temperature=FEEDBACK_TEMPERATURE,
+                **cohere_request_options()
             )
-            response_text = response.text.strip()
-        
-        # Robust JSON extraction
+            deltas = (event.text for event in stream if event.event_type == "text-generation")
         try:
-            # Find JSON object using regex
-            import re
-            json_match = re.search(r"\{.*\}", response_text, re.DOTALL)
-            if json_match:
-                response_text = json_match.group(0)
-            
-            feedback_data = json.loads(response_text)
-        except json.JSONDecodeError as e:
-            # print(f"❌ JSON Parsing Error: {e}")
-            # print(f"❌ Raw Response: {response_text}")
-            # Attempt to clean common issues
-            try:
-                # Remove trailing commas (simple regex)
-                cleaned_text = re.sub(r",\s*\}", "}", response_text)
-                cleaned_text = re.sub(r",\s*\]", "]", cleaned_text)
-                feedback_data = json.loads(cleaned_text)
-            except:
-                raise ValueError(f"Failed to parse AI response as JSON: {e}")
+            yield from deltas
+        finally:
+            # Closing early (client gone, root object complete) drops the HTTP stream
+            stream.close()
+    
+    def _chat(self, prompt: str) -> str:
+        """One Cohere chat call through the shared transport"""
+        # Shared Cohere client on the keep-alive pool (built once per process)
+        client, use_v2 = get_cohere_client()
         
+        # Waiting for a slot doesn't count against the transport deadline
+        with _provider_calls:
+            return self._chat_once(client, use_v2, prompt)
+    
+    def _chat_once(self, client, use_v2: bool, prompt: str) -> str:
+        if use_v2:
+            response = provider_transport.call('cohere', lambda timeout: client.chat(
+                model=FEEDBACK_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=FEEDBACK_TEMPERATURE,
+                **cohere_request_options(timeout)
+            ))
+            return response.message.content[0].text.strip()
+        response = provider_transport.call('cohere', lambda timeout: client.chat(
+            message=prompt,
+            model=FEEDBACK_MODEL,
+            temperature=FEEDBACK_TEMPERATURE,
+            **cohere_request_options(timeout)
+        ))
+        return response.text.strip()
+    
+    def _parse_json(self, response_text: str) -> dict:
+        """
+        Parse the JSON object in a model response, ignoring surrounding prose
+        and repairing trailing commas and // comments
+        
+        Raises:
+            ValueError: If no JSON object can be parsed
+        """
+        return parse_json_response(response_text)
+    
+    def _evaluate(self, prompt: str, rubric: Rubric) -> dict:
+        """Run a full-rubric evaluation prompt through Cohere and validate the result"""
+        return self._complete_evaluation(self._parse_json(self._chat(prompt)), rubric)
+    
+    def _complete_evaluation(self, feedback_data: dict, rubric: Rubric) -> dict:
+        """Validate a full-rubric result and fill in anything the model left out"""
         # Validate and enhance response
-        if "categories" not in feedback_data:
+        if not isinstance(feedback_data.get("categories"), list):
             raise ValueError("Invalid response format: missing categories")
         
-        # Calculate weighted score if not present
-        if "overall" not in feedback_data or "weighted_score" not in feedback_data["overall"]:
-            weighted_score = self.calculate_weighted_score(feedback_data["categories"])
-            grade_info = self.get_grade_from_score(weighted_score)
-            
-            if "overall" not in feedback_data:
-                feedback_data["overall"] = {}
-            
-            feedback_data["overall"]["weighted_score"] = weighted_score
-            feedback_data["overall"]["grade"] = grade_info["grade"]
-            if "summary" not in feedback_data["overall"]:
-                feedback_data["overall"]["summary"] = grade_info["description"]
+        feedback_data["overall"] = self._overall_section(feedback_data.get("overall"), feedback_data["categories"], rubric)
+        self._add_rubric_reference(feedback_data, rubric)
+        return feedback_data
+    
+    def _overall_section(self, overall, categories: List[dict], rubric: Rubric) -> dict:
+        """
+        The model's overall section with the score and grade computed from the
+        category scores (matched by name), not taken from the model's arithmetic
+        """
+        overall = dict(overall) if isinstance(overall, dict) else {}
+        weighted_score = rubric.weighted_score(categories)
+        grade_info = rubric.grade_for(weighted_score)
+        overall["weighted_score"] = weighted_score
+        overall["grade"] = grade_info["grade"]
+        if "summary" not in overall:
+            overall["summary"] = grade_info["description"]
+        missing = rubric.missing_categories(categories)
+        if missing:
+            overall["unscored_categories"] = missing
+        return overall
+    
+    def _parallel_templates(self, rubric: Rubric) -> List[PromptTemplate]:
+        return [_prompt(rubric, f'category.{i}') for i in range(len(rubric.categories))] + \
+            [_prompt(rubric, 'moments')]
+    
+    def _evaluate_parallel(self, transcript: str, facts: str, rubric: Rubric) -> dict:
+        """
+        Score each rubric category in its own concurrent call, plus one call
+        for summary, talk ratio and key moments, then aggregate locally.
         
-        # Add rubric reference for frontend
-        feedback_data["rubric_reference"] = {
-            "total_categories": len(SPORTS_PARTNERSHIP_RUBRIC["categories"]),
-            "category_names": [cat["name"] for cat in SPORTS_PARTNERSHIP_RUBRIC["categories"]]
+        Only the calls that fail (transport error or malformed JSON) are
+        retried, up to FEEDBACK_CATEGORY_ATTEMPTS times in total.
+        
+        Raises:
+            EvaluationError: If a category still fails after its retries
+        """
+        categories = rubric.categories
+        templates = self._parallel_templates(rubric)
+        moments_index = len(categories)
+        
+        def run(index: int) -> dict:
+            data = self._parse_json(self._chat(templates[index].render(call_facts=facts, transcript=transcript)))
+            if index == moments_index:
+                return data
+            return self._normalize_category(categories[index]['name'], data)
+        
+        results, errors = self._run_concurrently(run, len(templates))
+        pending = sorted(errors)
+        
+        failed = [i for i in pending if i != moments_index]
+        if failed:
+            names = [categories[i]['name'] for i in failed]
+            raise EvaluationError(f"Failed to evaluate categories {names}: {errors[failed[0]]}") from errors[failed[0]]
+        
+        # Key moments are supplementary; the scores stand without them
+        moments = results.get(moments_index, {})
+        category_results = [results[i] for i in range(len(categories))]
+        return self._aggregate(category_results, moments, rubric)
+    
+    def _run_concurrently(self, run, count: int) -> Tuple[Dict[int, dict], Dict[int, Exception]]:
+        """
+        Run `run(index)` for every index on the evaluation pool, retrying
+        only the ones that raise, up to FEEDBACK_CATEGORY_ATTEMPTS in total.
+        
+        Returns:
+            (results by index, final errors by index)
+        """
+        results: Dict[int, dict] = {}
+        errors: Dict[int, Exception] = {}
+        pending = list(range(count))
+        for _ in range(max(1, CATEGORY_ATTEMPTS)):
+            futures = [(index, _evaluation_executor.submit(run, index)) for index in pending]
+            pending = []
+            for index, future in futures:
+                try:
+                    results[index] = future.result()
+                    errors.pop(index, None)
+                except Exception as e:
+                    errors[index] = e
+                    pending.append(index)
+            if not pending:
+                break
+        return results, errors
+    
+    def _evaluate_segmented(self, transcript: str, facts: str, rubric: Rubric) -> dict:
+        """
+        Map-reduce for long calls: take notes on overlapping windows of
+        turns concurrently, then grade the full rubric from the notes.
+        
+        Cost grows linearly with call length (one window call per
+        ~FEEDBACK_WINDOW_CHARS) plus one reduce call over compact notes.
+        A window whose notes can't be produced is marked as missing rather
+        than failing the call, unless most windows fail.
+        
+        Raises:
+            EvaluationError: If more than half of the windows fail after retries
+        """
+        turns = parse_transcript(transcript)
+        windows = window_turns(turns, WINDOW_CHARS, WINDOW_OVERLAP_TURNS)
+        template = _prompt(rubric, 'window')
+        
+        def run(index: int) -> dict:
+            label = f"{index + 1} of {len(windows)}"
+            text = "\n\n".join(turn.render() for turn in windows[index])
+            return self._parse_json(self._chat(template.render(segment_label=label, transcript=text)))
+        
+        results, errors = self._run_concurrently(run, len(windows))
+        if len(errors) * 2 > len(windows):
+            first = errors[min(errors)]
+            raise EvaluationError(
+                f"Failed to evaluate {len(errors)} of {len(windows)} transcript segments: {first}"
+            ) from first
+        
+        notes = "\n\n".join(
+            self._render_segment_notes(index, results.get(index)) for index in range(len(windows))
+        )
+        feedback_data = self._evaluate(_prompt(rubric, 'reduce').render(call_facts=facts, notes=notes), rubric)
+        feedback_data["segments"] = {"count": len(windows), "failed": len(errors)}
+        return feedback_data
+    
+    def _render_segment_notes(self, index: int, notes: Optional[dict]) -> str:
+        lines = [f"## Segment {index + 1}"]
+        if not notes:
+            lines.append("(notes unavailable for this segment)")
+            return "\n".join(lines)
+        if notes.get("summary"):
+            lines.append(f"Summary: {notes['summary']}")
+        for observation in notes.get("observations") or []:
+            if isinstance(observation, dict):
+                lines.append(
+                    f"- [{observation.get('category', 'General')}] "
+                    f"({observation.get('type', 'note')}) {observation.get('evidence', '')}"
+                )
+        for moment in notes.get("key_moments") or []:
+            if isinstance(moment, dict):
+                lines.append(f"- Key moment: {moment.get('moment', '')} - {moment.get('impact', '')}")
+        return "\n".join(lines)
+    
+    def _normalize_category(self, name: str, data: dict) -> dict:
+        """
+        Raises:
+            ValueError: If the category result has no usable score
+        """
+        try:
+            score = float(data["score"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Invalid score for category {name}")
+        if not 0 <= score <= 100:
+            raise ValueError(f"Score out of range for category {name}: {score}")
+        return {
+            "name": name,
+            "score": score,
+            "evidence": data.get("evidence", ""),
+            "strengths": list(data.get("strengths") or []),
+            "improvements": list(data.get("improvements") or [])
         }
+    
+    def _aggregate(self, category_results: List[dict], moments: dict, rubric: Rubric) -> dict:
+        """Deterministic overall section computed from the category scores"""
+        weighted_score = rubric.weighted_score(category_results)
+        grade_info = rubric.grade_for(weighted_score)
+        
+        # Ties keep rubric order, so identical scores always aggregate the same way
+        best_first = sorted(enumerate(category_results), key=lambda item: (-item[1]["score"], item[0]))
+        worst_first = sorted(enumerate(category_results), key=lambda item: (item[1]["score"], item[0]))
+        top_strengths = [c["strengths"][0] for _, c in best_first if c["strengths"]][:3]
+        top_priorities = [c["improvements"][0] for _, c in worst_first if c["improvements"]][:3]
         
+        feedback_data = {
+            "categories": category_results,
+            "overall": {
+                "weighted_score": weighted_score,
+                "grade": grade_info["grade"],
+                "summary": moments.get("summary") or grade_info["description"],
+                "top_3_strengths": top_strengths,
+                "top_3_priorities": top_priorities
+            },
+            "talk_ratio": moments.get("talk_ratio", {}),
+            "key_moments": moments.get("key_moments", [])
+        }
+        self._add_rubric_reference(feedback_data, rubric)
         return feedback_data
     
-    def get_rubric(self) -> dict:
+    def _apply_analytics(self, feedback_data: dict, analytics: dict) -> None:
+        """Replace model-estimated talk ratio with the measured one and attach the analytics"""
+        talk_ratio = feedback_data.get("talk_ratio")
+        if not isinstance(talk_ratio, dict):
+            talk_ratio = {}
+        if analytics["turns"]["total"]:
+            talk_ratio.update(analytics["talk_ratio"]["by_words"])
+        feedback_data["talk_ratio"] = talk_ratio
+        feedback_data["call_analytics"] = analytics
+    
+    def _add_rubric_reference(self, feedback_data: dict, rubric: Rubric) -> None:
+        # Add rubric reference for frontend
+        feedback_data["rubric_reference"] = {
+            "rubric": rubric.id,
+            "total_categories": len(rubric.categories),
+            "category_names": list(rubric.names)
+        }
+    
+    def get_rubric(self, rubric: Optional[str] = None) -> dict:
         """
         Returns the complete rubric for reference
+        
+        Raises:
+            ValueError: If the rubric id is unknown
         """
-        return SPORTS_PARTNERSHIP_RUBRIC
+        return rubric_registry.get(rubric).data
+    
+    def rubric_ids(self) -> List[str]:
+        """Ids of every loaded rubric"""
+        return rubric_registry.ids()
+
+
+def _is_feedback_section(path: tuple) -> bool:
+    """Parser paths streamed as sections: each categories[i] plus the top-level blocks"""
+    if len(path) == 2:
+        return path[0] == "categories"
+    return len(path) == 1 and path[0] in ("categories", "overall", "talk_ratio", "key_moments")
 
 
 # Create singleton instance
-feedback_service = FeedbackService()
+feedback_service = FeedbackService(create_feedback_cache())
@@ -0,0 +1,338 @@
+"""
+Live Coaching
+Scores a voice session incrementally while it runs: only the turns since the
+last update are evaluated, per-category running state is kept in the
+session, and the final feedback is assembled from that state
+"""
+
+import copy
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from app.services.call_analytics import analyze_turns
+from app.services.conversation_service import conversation_service
+from app.services.feedback_service import feedback_service, render_rubric_outline
+from app.services.metrics import metrics
+from app.services.prompt_templates import PromptTemplate, prompt_registry
+from app.services.rubric import rubric_registry
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = 'coaching'
+
+# Lists carried forward per category, newest last
+MAX_NOTES = 3
+MAX_KEY_MOMENTS = 8
+
+COACHING_UPDATES_TOTAL = metrics.counter(
+    'pitchpoint_coaching_updates_total',
+    'Live coaching evaluations by outcome',
+    labels=('outcome',)
+)
+
+COACHING_PROMPT = prompt_registry.register(PromptTemplate(
+    'coaching.increment',
+    """You are an expert sports partnership sales coach listening to a live sales call. "You" is the sales rep; the other speaker is the prospect.
+
+# RUBRIC CATEGORIES
+{rubric_outline}
+
+# SCORES SO FAR
+{running_state}
+
+# NEW TURNS ({segment_label})
+{transcript}
+
+# TASK
+Score only what these new turns show. Include a category only if the new turns give evidence for it, with a 0-100 score for this stretch of the call. Then give the rep one short tip they can act on in the next minute.
+
+Respond in the following JSON format ONLY (no additional text):
+
+{
+    "categories": [
+        {
+            "name": "Exact rubric category name",
+            "score": 75,
+            "evidence": "Quote or observation from the new turns",
+            "strength": "What the rep did well here, or empty",
+            "improvement": "Specific recommendation, or empty"
+        }
+    ],
+    "key_moments": [
+        {
+            "moment": "What happened",
+            "impact": "Why it matters (positive or negative)"
+        }
+    ],
+    "tip": "One sentence of live coaching"
+}""",
+    slots=('rubric_outline', 'running_state', 'segment_label', 'transcript')
+))
+
+
+def new_coaching_state(rubric: str, prospect: str) -> Dict:
+    return {
+        'enabled': True,
+        'rubric': rubric,
+        'prospect': prospect,
+        'evaluated_turns': 0,
+        'evaluated_at': time.time(),
+        'updates': 0,
+        'categories': {},
+        'key_moments': [],
+        'tip': ''
+    }
+
+
+def render_turns(entries: List[Dict], prospect: str) -> str:
+    """Transcript entries ({"speaker": "user" | "ai", "text"}) as "You: ..." lines"""
+    return "\n\n".join(
+        f"{'You' if entry['speaker'] == 'user' else prospect}: {entry['text']}" for entry in entries
+    )
+
+
+def merge_increment(state: Dict, increment: Dict, rubric, first_turn: int, last_turn: int) -> List[str]:
+    """
+    Fold one increment's results into the running state.
+
+    Each category's score is the mean of the stretches it was observed in;
+    evidence, strengths and improvements keep the latest few entries.
+
+    Returns:
+        Names of the categories this increment scored
+    """
+    scored = []
+    for result in increment.get('categories') or []:
+        if not isinstance(result, dict):
+            continue
+        index = rubric.index(result.get('name'))
+        try:
+            score = float(result['score'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if index is None or not 0 <= score <= 100:
+            continue
+        name = rubric.names[index]
+        running = state['categories'].setdefault(
+            name, {'score': 0.0, 'observations': 0, 'evidence': [], 'strengths': [], 'improvements': []}
+        )
+        running['score'] = round(
+            (running['score'] * running['observations'] + score) / (running['observations'] + 1), 1
+        )
+        running['observations'] += 1
+        for field, key in (('evidence', 'evidence'), ('strength', 'strengths'), ('improvement', 'improvements')):
+            note = result.get(field)
+            if isinstance(note, str) and note.strip() and note not in running[key]:
+                running[key] = (running[key] + [note.strip()])[-MAX_NOTES:]
+        scored.append(name)
+
+    for moment in increment.get('key_moments') or []:
+        if isinstance(moment, dict) and moment.get('moment'):
+            moment = dict(moment, timestamp=f"turns {first_turn + 1}-{last_turn}")
+            state['key_moments'] = (state['key_moments'] + [moment])[-MAX_KEY_MOMENTS:]
+    if isinstance(increment.get('tip'), str):
+        state['tip'] = increment['tip']
+    state['evaluated_turns'] = last_turn
+    state['evaluated_at'] = time.time()
+    state['updates'] += 1
+    return scored
+
+
+class LiveCoach:
+    """
+    Runs incremental evaluations on a small pool, at most one per session at
+    a time. A session is evaluated once `every_turns` new turns have
+    accumulated, or once `interval` seconds have passed with at least
+    `min_turns` new turns (turns only arrive at turn boundaries, so that is
+    where both triggers are checked). Triggers that arrive while an update is
+    running are skipped; the next update covers their turns.
+    """
+
+    def __init__(
+        self,
+        chat: Callable[[str], Dict],
+        every_turns: int = 6,
+        interval: float = 60,
+        min_turns: int = 2,
+        max_workers: int = 4
+    ):
+        self._chat = chat
+        self.every_turns = every_turns
+        self.interval = interval
+        self.min_turns = min_turns
+        self.enabled_by_default = os.getenv('LIVE_COACHING_DEFAULT', 'false').lower() == 'true'
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='coaching')
+        self._running = set()
+        self._listeners: List[Callable[[str, Dict], None]] = []
+        self._lock = threading.Lock()
+
+    def enable(self, session_id: str, prospect: str, rubric: Optional[str] = None) -> None:
+        """
+        Turn on live coaching for a session
+
+        Raises:
+            RubricError: If the rubric id is unknown
+        """
+        rubric_id = rubric_registry.get(rubric).id
+        conversation_service.set_state(session_id, STATE_KEY, new_coaching_state(rubric_id, prospect))
+
+    def snapshot(self, session_id: str) -> Optional[Dict]:
+        """Copy of the session's coaching state, if coaching is on"""
+        state = conversation_service.get_state(session_id, STATE_KEY)
+        if not state or not state.get('enabled'):
+            return None
+        return copy.deepcopy(state)
+
+    def add_listener(self, listener: Callable[[str, Dict], None]) -> None:
+        """Called with (session_id, update) after each successful update"""
+        self._listeners.append(listener)
+
+    def on_turn(self, session_id: str) -> bool:
+        """Schedule an update if the session is due for one; returns whether it was scheduled"""
+        state = conversation_service.get_state(session_id, STATE_KEY)
+        if not state or not state.get('enabled'):
+            return False
+        new_turns = conversation_service.turn_count(session_id) - state['evaluated_turns']
+        due = new_turns >= self.every_turns or (
+            self.interval > 0 and new_turns >= self.min_turns
+            and time.time() - state['evaluated_at'] >= self.interval
+        )
+        if not due:
+            return False
+        with self._lock:
+            if session_id in self._running:
+                return False
+            self._running.add(session_id)
+        self._executor.submit(self._update, session_id)
+        return True
+
+    def _update(self, session_id: str) -> None:
+        try:
+            # In-memory sessions hand out the live state dict; update a copy
+            state = copy.deepcopy(conversation_service.get_state(session_id, STATE_KEY))
+            entries = conversation_service.get_transcript(session_id)
+            if not state or not entries:
+                return
+            update = self.evaluate(state, entries)
+            if update is None:
+                return
+            if not conversation_service.set_state(session_id, STATE_KEY, state):
+                # The session ended while this update was running
+                COACHING_UPDATES_TOTAL.inc(outcome='discarded')
+                return
+            COACHING_UPDATES_TOTAL.inc(outcome='ok')
+            for listener in self._listeners:
+                try:
+                    listener(session_id, update)
+                except Exception:
+                    logger.exception("Coaching listener failed for %s", session_id)
+        except Exception:
+            COACHING_UPDATES_TOTAL.inc(outcome='error')
+            logger.exception("Live coaching update failed for %s", session_id)
+        finally:
+            with self._lock:
+                self._running.discard(session_id)
+
+    def evaluate(self, state: Dict, entries: List[Dict]) -> Optional[Dict]:
+        """
+        Evaluate the turns after `state['evaluated_turns']` and fold them into
+        `state` in place. Returns the update payload, or None if there were no
+        new rep turns.
+        """
+        first_turn, last_turn = state['evaluated_turns'], len(entries)
+        new_entries = entries[first_turn:]
+        if not any(entry['speaker'] == 'user' for entry in new_entries):
+            return None
+        rubric = rubric_registry.get(state['rubric'])
+        prompt = COACHING_PROMPT.render(
+            rubric_outline=render_rubric_outline(rubric.data),
+            running_state=self._render_running_state(state, rubric),
+            segment_label=f"turns {first_turn + 1}-{last_turn}",
+            transcript=render_turns(new_entries, state['prospect'])
+        )
+        scored = merge_increment(state, self._chat(prompt), rubric, first_turn, last_turn)
+        return self._update_payload(state, rubric, scored)
+
+    def _render_running_state(self, state: Dict, rubric) -> str:
+        if not state['categories']:
+            return "- Nothing scored yet (start of call)"
+        lines = []
+        for name in rubric.names:
+            running = state['categories'].get(name)
+            if running:
+                lines.append(f"- {name}: {running['score']} ({running['observations']} observations)")
+            else:
+                lines.append(f"- {name}: not observed yet")
+        return "\n".join(lines)
+
+    def _update_payload(self, state: Dict, rubric, scored: List[str]) -> Dict:
+        categories = [
+            {
+                'name': name,
+                'score': state['categories'][name]['score'] if name in state['categories'] else None,
+                'observations': state['categories'].get(name, {}).get('observations', 0)
+            }
+            for name in rubric.names
+        ]
+        observed = [category for category in categories if category['score'] is not None]
+        weighted_score = rubric.weighted_score(observed) if observed else None
+        return {
+            'turns_evaluated': state['evaluated_turns'],
+            'update': state['updates'],
+            'categories': categories,
+            'updated_categories': scored,
+            'weighted_score': weighted_score,
+            'grade': rubric.grade_for(weighted_score)['grade'] if observed else None,
+            'tip': state['tip']
+        }
+
+    def final_feedback(self, transcript: str, turns: List[Dict], state: Dict) -> Dict:
+        """
+        Feedback for an ended session built from the coaching state, after
+        evaluating whatever turns came in since the last update. Falls back
+        to a full evaluation if nothing was ever scored.
+        """
+        try:
+            self.evaluate(state, turns)
+        except Exception as e:
+            # The turns already scored still make usable feedback
+            logger.warning("Final coaching update failed, using accumulated state: %s", e)
+        if not state['categories']:
+            return feedback_service.generate_feedback(transcript, rubric=state['rubric'])
+
+        category_results = [
+            {
+                'name': name,
+                'score': running['score'],
+                'evidence': ' ... '.join(running['evidence']),
+                'strengths': running['strengths'],
+                'improvements': running['improvements']
+            }
+            for name, running in state['categories'].items()
+        ]
+        analytics = analyze_turns(
+            [entry['speaker'] == 'user' for entry in turns],
+            [entry['text'] for entry in turns]
+        )
+        feedback_data = feedback_service.build_feedback(
+            category_results,
+            {'key_moments': state['key_moments']},
+            analytics,
+            rubric=state['rubric']
+        )
+        feedback_data['live_coaching'] = {'updates': state['updates'], 'turns_evaluated': state['evaluated_turns']}
+        return feedback_data
+
+
+# Singleton instance
+live_coaching = LiveCoach(
+    feedback_service.complete_json,
+    every_turns=int(os.getenv('LIVE_COACHING_EVERY_TURNS', '6')),
+    interval=float(os.getenv('LIVE_COACHING_INTERVAL', '60')),
+    min_turns=int(os.getenv('LIVE_COACHING_MIN_TURNS', '2')),
+    max_workers=int(os.getenv('LIVE_COACHING_WORKERS', '4'))
+)
@@ -0,0 +1,206 @@
+"""
+Metrics
+In-process counters and histograms rendered in Prometheus text format
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets (seconds) covering cache hits through slow LLM generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.label_names, key)} {value}"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Observing is a bisect plus two additions under a
+    lock, so it is cheap enough for the per-turn hot path.
+    """
+
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts incl. +Inf, sum, count)
+        self._series: Dict[LabelValues, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[key] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', le))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, key)} {total}"
+            yield f"{self.name}_count{_format_labels(self.label_names, key)} {count}"
+
+
+class Gauge:
+    """Value read from a callback at scrape time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self._read = read
+
+    def samples(self) -> Iterator[str]:
+        try:
+            yield f"{self.name} {float(self._read())}"
+        except Exception:
+            return
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(name, documentation, read))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+# Singleton registry
+metrics = MetricsRegistry()
+
+TURN_STAGE_SECONDS = metrics.histogram(
+    'pitchpoint_turn_stage_seconds',
+    'Duration of each stage of a voice turn',
+    labels=('stage',)
+)
+PROVIDER_CALL_SECONDS = metrics.histogram(
+    'pitchpoint_provider_call_seconds',
+    'Latency of provider calls, including retries',
+    labels=('provider', 'outcome')
+)
+TURNS_TOTAL = metrics.counter(
+    'pitchpoint_turns_total',
+    'Voice turns by outcome',
+    labels=('outcome',)
+)
+
+
+class TurnTimer:
+    """
+    Records the stages of one voice turn into TURN_STAGE_SECONDS.
+
+    `mark(stage)` records the time since the previous mark; `since_start(stage)`
+    records the time since the turn's event was received.
+    """
+
+    __slots__ = ('received_at', '_last')
+
+    def __init__(self, received_at: Optional[float] = None):
+        self.received_at = received_at if received_at is not None else time.perf_counter()
+        self._last = self.received_at
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        TURN_STAGE_SECONDS.observe(now - self._last, stage=stage)
+        self._last = now
+
+    def since_start(self, stage: str) -> None:
+        TURN_STAGE_SECONDS.observe(time.perf_counter() - self.received_at, stage=stage)
+
+    @contextmanager
+    def stage(self, stage: str):
+        with TURN_STAGE_SECONDS.time(stage=stage):
+            yield
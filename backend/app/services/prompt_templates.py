@@ -0,0 +1,109 @@
+"""
+Prompt Templates
+Prompts compiled once into static text plus named slots, each with a stable
+version hash that caches use as part of their keys
+"""
+
+import hashlib
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from app.services.metrics import metrics
+
+PROMPT_RENDER_SECONDS = metrics.histogram(
+    'pitchpoint_prompt_render_seconds',
+    'Time to fill a compiled prompt template',
+    labels=('template',),
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01)
+)
+
+
+def prompt_hash(text: str) -> str:
+    """Short content hash identifying one exact prompt text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+
+
+class PromptTemplate:
+    """
+    A prompt split into literal segments and `{slot}` placeholders.
+
+    Only the declared slot names are placeholders; every other brace (JSON
+    examples, schemas) is literal text, so nothing needs escaping. Filling
+    the template is a single join over the precompiled segments.
+
+    Args:
+        name: Registry name, e.g. "feedback.evaluation"
+        text: Template text
+        slots: Placeholder names filled at render time
+    """
+
+    def __init__(self, name: str, text: str, slots: Iterable[str] = ()):
+        self.name = name
+        self.text = text
+        self.slots = tuple(slots)
+        self.version = prompt_hash(text)
+        self._segments = self._compile(text, self.slots)
+
+    @staticmethod
+    def _compile(text: str, slots: Tuple[str, ...]) -> List[Tuple[bool, str]]:
+        """Split text into (is_slot, value) segments"""
+        if not slots:
+            return [(False, text)]
+        pattern = re.compile(r'\{(' + '|'.join(re.escape(slot) for slot in slots) + r')\}')
+        segments = []
+        position = 0
+        for match in pattern.finditer(text):
+            segments.append((False, text[position:match.start()]))
+            segments.append((True, match.group(1)))
+            position = match.end()
+        segments.append((False, text[position:]))
+        return segments
+
+    def partial(self, **values: str) -> 'PromptTemplate':
+        """
+        Bake static slot values into a new template (rendered once at load).
+        The new template's version covers the baked-in text.
+        """
+        text = ''.join(values[value] if is_slot and value in values else
+                       ('{' + value + '}' if is_slot else value)
+                       for is_slot, value in self._segments)
+        remaining = [slot for slot in self.slots if slot not in values]
+        return PromptTemplate(self.name, text, remaining)
+
+    def render(self, **values: str) -> str:
+        """Fill the dynamic slots"""
+        started = time.perf_counter()
+        try:
+            return ''.join(str(values[value]) if is_slot else value for is_slot, value in self._segments)
+        except KeyError as e:
+            raise ValueError(f"Missing value for prompt slot {e} in {self.name}") from None
+        finally:
+            PROMPT_RENDER_SECONDS.observe(time.perf_counter() - started, template=self.name)
+
+
+class PromptRegistry:
+    """Named, compiled prompt templates and their versions"""
+
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._lock = threading.Lock()
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        """Add or replace a template (e.g. after a rubric reload)"""
+        with self._lock:
+            self._templates[template.name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        with self._lock:
+            return self._templates[name]
+
+    def versions(self) -> Dict[str, str]:
+        with self._lock:
+            return {name: template.version for name, template in self._templates.items()}
+
+
+# Singleton instance
+prompt_registry = PromptRegistry()
@@ -0,0 +1,146 @@
+"""
+Research Prefetch
+Researches a voice session's prospect company in the background and adds a
+compact profile to the persona once it is ready. Turns never wait for it:
+each turn renders whatever the persona holds at that moment
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.services.conversation_service import conversation_service
+from app.services.metrics import metrics
+from app.services.research_service import get_research
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = 'research'
+
+PENDING = 'pending'
+READY = 'ready'
+FAILED = 'failed'
+
+# Keeps the persona prompt small; the profile is context, not a script
+MAX_PROFILE_CHARS = 1200
+MAX_LIST_ITEMS = 3
+
+RESEARCH_PREFETCH_TOTAL = metrics.counter(
+    'pitchpoint_research_prefetch_total',
+    'Background company research for voice sessions by outcome',
+    labels=('outcome',)
+)
+
+
+def _get(profile: Dict, *keys: str) -> Any:
+    """Nested field of a profile, or None"""
+    value: Any = profile
+    for key in keys:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def _items(values: Any, field: str = '') -> str:
+    """First few entries of a profile list (or one field of each) as "a, b, c\""""
+    if not isinstance(values, list):
+        return ''
+    if field:
+        values = [value.get(field) for value in values if isinstance(value, dict)]
+    return ', '.join(str(value) for value in values[:MAX_LIST_ITEMS] if isinstance(value, (str, int, float)) and value)
+
+
+def compact_profile(profile: Dict) -> str:
+    """
+    A few lines of what the prospect knows about their own organization,
+    taken from a research profile (sports team or company schema)
+    """
+    people = ', '.join(
+        f"{person['name']} ({person['title']})" if person.get('title') else person['name']
+        for person in (_get(profile, 'key_personnel') or [])[:MAX_LIST_ITEMS]
+        if isinstance(person, dict) and person.get('name')
+    )
+    if profile.get('entity_type') == 'sports_team':
+        facts = [
+            ('Overview', _get(profile, 'overview')),
+            ('League', _get(profile, 'league_or_competition')),
+            ('Home', _get(profile, 'home_city_or_region')),
+            ('Venue', _get(profile, 'home_venue', 'name')),
+            ('Current form', _get(profile, 'recent_performance', 'current_form')),
+            ('Key people', people),
+            ('Current sponsors', _items(_get(profile, 'commercial_profile', 'primary_sponsors'))),
+            ('Partnership priorities', _items(_get(profile, 'partnership_opportunities', 'ideal_categories'))),
+        ]
+    else:
+        facts = [
+            ('Overview', _get(profile, 'overview')),
+            ('Industry', _get(profile, 'industry')),
+            ('Headquarters', _get(profile, 'headquarters')),
+            ('Products', _items(_get(profile, 'products_or_services'))),
+            ('Customers', _items(_get(profile, 'target_customers'))),
+            ('Key people', people),
+            ('Competitors', _items(_get(profile, 'market_position', 'notable_competitors'))),
+            ('Current sponsorships', _items(_get(profile, 'go_to_market', 'partnerships_or_sponsorships'))),
+        ]
+    facts.append(('Current concerns', _items(_get(profile, 'risks'), 'detail')))
+    text = '\n'.join(f"- {label}: {value}" for label, value in facts if isinstance(value, str) and value.strip())
+    return text[:MAX_PROFILE_CHARS]
+
+
+class ResearchPrefetcher:
+    """
+    Runs company research for new voice sessions on a small pool. The
+    session's state records the status ("pending", "ready", "failed"); a
+    profile that arrives after the session ended is dropped.
+    """
+
+    def __init__(self, research: Callable[[str], Tuple[Dict, Dict]], max_workers: int = 2):
+        self._research = research
+        self.enabled_by_default = os.getenv('RESEARCH_PREFETCH_DEFAULT', 'false').lower() == 'true'
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='research-prefetch')
+        self._listeners: List[Callable[[str, Dict], None]] = []
+
+    def add_listener(self, listener: Callable[[str, Dict], None]) -> None:
+        """Called with (session_id, status) when a session's research finishes"""
+        self._listeners.append(listener)
+
+    def start(self, session_id: str, company: str) -> None:
+        """Queue research for the session's company and return immediately"""
+        conversation_service.set_state(session_id, STATE_KEY, {'status': PENDING, 'company': company})
+        self._executor.submit(self._run, session_id, company)
+
+    def _run(self, session_id: str, company: str) -> None:
+        try:
+            profile, cache = self._research(company)
+        except Exception as e:
+            logger.warning("Research prefetch failed for %s (%s): %s", session_id, company, e)
+            status = {'status': FAILED, 'company': company, 'error': str(e)}
+            stored = conversation_service.set_state(session_id, STATE_KEY, status)
+        else:
+            status = {
+                'status': READY,
+                'company': company,
+                'entity_type': profile.get('entity_type'),
+                'cache': cache.get('status')
+            }
+            stored = (
+                conversation_service.update_persona(session_id, {'company_profile': compact_profile(profile)})
+                and conversation_service.set_state(session_id, STATE_KEY, status)
+            )
+        if not stored:
+            # The session ended before the research finished
+            RESEARCH_PREFETCH_TOTAL.inc(outcome='discarded')
+            return
+        RESEARCH_PREFETCH_TOTAL.inc(outcome=status['status'])
+        for listener in self._listeners:
+            try:
+                listener(session_id, status)
+            except Exception:
+                logger.exception("Research prefetch listener failed for %s", session_id)
+
+
+# Singleton instance
+research_prefetch = ResearchPrefetcher(
+    lambda company: get_research().research(company),
+    max_workers=int(os.getenv('RESEARCH_PREFETCH_WORKERS', '2'))
+)
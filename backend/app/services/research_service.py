@@ -0,0 +1,88 @@
+"""
+Research Service
+The Gemini research agent behind the persistent profile cache and the
+shared transport policy, created on first use so the app starts without a
+Gemini key
+"""
+
+import os
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from agent.profile_cache import CachedResearch, create_profile_cache
+from agent.research_agent import PROMPT_VERSION, SportsPartnerResearchAgent
+from agent.research_batch import ResearchBatchRunner, create_research_batches
+from app.clients.transport import gemini_request_options, provider_transport
+from app.services.metrics import metrics
+
+RESEARCH_STAGE_SECONDS = metrics.histogram(
+    'pitchpoint_research_stage_seconds',
+    'Duration of each research stage (entity classification, profile generation)',
+    labels=('stage',)
+)
+RESEARCH_CLASSIFICATIONS_TOTAL = metrics.counter(
+    'pitchpoint_research_classifications_total',
+    'Research entity types by how they were decided',
+    labels=('entity_type', 'classified_by')
+)
+
+_agent: Optional[SportsPartnerResearchAgent] = None
+_research: Optional[CachedResearch] = None
+_batches: Optional[ResearchBatchRunner] = None
+
+
+def get_agent() -> SportsPartnerResearchAgent:
+    """Lazy-init the research agent so we fail fast on missing API key."""
+    global _agent
+    if _agent is None:
+        _agent = SportsPartnerResearchAgent(request_options=gemini_request_options(), type_lookup=_known_entity_type)
+    return _agent
+
+
+def _known_entity_type(subject: str) -> Optional[str]:
+    cache = get_research().cache
+    return cache.entity_type(subject) if cache is not None else None
+
+
+def _record(entity_type: str, classified_by: str, timings: Dict[str, float]) -> None:
+    for stage, seconds in timings.items():
+        RESEARCH_STAGE_SECONDS.observe(seconds, stage=stage)
+    RESEARCH_CLASSIFICATIONS_TOTAL.inc(entity_type=entity_type, classified_by=classified_by)
+
+
+def _run_research(subject: str) -> Dict[str, Any]:
+    result = get_agent().run(subject)
+    _record(result.entity_type, result.classified_by, result.timings)
+    return result.profile
+
+
+def _stream_research(subject: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    # Streamed output can't be retried or hedged once sections have been sent,
+    # so this bypasses the transport policy; the agent's request timeout still applies
+    for event, payload in get_agent().stream(subject):
+        if event == 'complete':
+            _record(payload['entity_type'], payload['classified_by'], payload['timings'])
+        yield event, payload
+
+
+def get_research() -> CachedResearch:
+    """Research behind the persistent profile cache"""
+    global _research
+    if _research is None:
+        _research = CachedResearch(
+            # Deadline, retries and optional hedging from the shared transport policy
+            # (the agent makes several Gemini calls, each bounded by its own request timeout)
+            lambda subject: provider_transport.call('gemini', lambda timeout: _run_research(subject)),
+            create_profile_cache(),
+            PROMPT_VERSION,
+            refresh_workers=int(os.getenv('RESEARCH_REFRESH_WORKERS', '2')),
+            stream=_stream_research
+        )
+    return _research
+
+
+def get_batches() -> ResearchBatchRunner:
+    """Batch runner over the cached research, sharing one bounded pool"""
+    global _batches
+    if _batches is None:
+        _batches = create_research_batches(get_research().research, get_research().subject_key)
+    return _batches
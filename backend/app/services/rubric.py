@@ -0,0 +1,280 @@
+"""
+Rubrics
+Evaluation rubrics compiled once into name-indexed weights and a sorted
+grade table, loaded from the built-in constant or from YAML/JSON files
+"""
+
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.constants.rubric import SPORTS_PARTNERSHIP_RUBRIC
+from app.services.prompt_templates import prompt_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RUBRIC_ID = 'sports_partnership'
+RUBRIC_FILE_EXTENSIONS = ('.json', '.yaml', '.yml')
+
+_CATEGORY_FIELDS = ('name', 'weight', 'description', 'criteria', 'evaluation_points')
+
+
+class RubricError(ValueError):
+    """Raised for an invalid rubric definition or an unknown rubric id"""
+
+
+def category_key(name: str) -> str:
+    """Normalized category name, so "Closing and next steps" matches "Closing & Next Steps\""""
+    return ' '.join(name.replace('&', 'and').casefold().split())
+
+
+class Rubric:
+    """
+    A validated rubric.
+
+    Category weights are checked to sum to 1 and indexed by normalized name,
+    so model output is scored by category name rather than position. Grade
+    ranges ("80-89") are parsed once into a sorted table of lower bounds;
+    a score maps to the highest range starting at or below it, so 89.5 is a
+    B rather than falling between ranges.
+    """
+
+    def __init__(self, rubric_id: str, data: Dict):
+        self.id = rubric_id
+        self.data = data
+        try:
+            self.version = prompt_hash(json.dumps(data, sort_keys=True))
+        except (TypeError, ValueError) as e:
+            # e.g. a bare YAML date, which JSON can't represent
+            raise RubricError(f"Rubric {rubric_id}: values must be JSON-compatible ({e})") from e
+        # The built-in rubric keeps the original prompt names
+        self.prompt_prefix = 'feedback' if rubric_id == DEFAULT_RUBRIC_ID else f'feedback.{rubric_id}'
+
+        categories = data.get('categories')
+        if not isinstance(categories, list) or not categories:
+            raise RubricError(f"Rubric {rubric_id}: 'categories' must be a non-empty list")
+        for position, category in enumerate(categories):
+            missing = [field for field in _CATEGORY_FIELDS if field not in category]
+            if missing:
+                raise RubricError(f"Rubric {rubric_id}: category {position} is missing {missing}")
+            if not isinstance(category['weight'], (int, float)) or category['weight'] <= 0:
+                raise RubricError(f"Rubric {rubric_id}: category {category['name']!r} needs a positive weight")
+
+        self.categories: Tuple[Dict, ...] = tuple(categories)
+        self.names: Tuple[str, ...] = tuple(category['name'] for category in categories)
+        self.weights: Tuple[float, ...] = tuple(float(category['weight']) for category in categories)
+        if not math.isclose(sum(self.weights), 1.0, abs_tol=1e-6):
+            raise RubricError(f"Rubric {rubric_id}: category weights sum to {sum(self.weights)}, not 1")
+
+        self._index: Dict[str, int] = {}
+        for position, name in enumerate(self.names):
+            key = category_key(name)
+            if key in self._index:
+                raise RubricError(f"Rubric {rubric_id}: duplicate category {name!r}")
+            self._index[key] = position
+
+        self._grade_floors, self._grades = self._compile_grades(data.get('overall_scoring'))
+
+    def _compile_grades(self, scoring) -> Tuple[List[float], List[Dict]]:
+        if not isinstance(scoring, dict) or not scoring:
+            raise RubricError(f"Rubric {self.id}: 'overall_scoring' must map score ranges to grades")
+        table = []
+        for range_str, grade_info in scoring.items():
+            try:
+                low, high = (float(part) for part in str(range_str).split('-'))
+            except ValueError:
+                raise RubricError(f"Rubric {self.id}: invalid score range {range_str!r}")
+            if low > high or not isinstance(grade_info, dict) or 'grade' not in grade_info:
+                raise RubricError(f"Rubric {self.id}: invalid grade for range {range_str!r}")
+            table.append((low, high, grade_info))
+        table.sort(key=lambda entry: entry[0])
+        for (_, previous_high, _), (low, _, _) in zip(table, table[1:]):
+            if low <= previous_high:
+                raise RubricError(f"Rubric {self.id}: overlapping score ranges around {low}")
+        return [low for low, _, _ in table], [grade_info for _, _, grade_info in table]
+
+    def index(self, name) -> Optional[int]:
+        """Position of the category with this name, or None"""
+        if not isinstance(name, str):
+            return None
+        return self._index.get(category_key(name))
+
+    def weighted_score(self, category_scores: Sequence[Dict]) -> float:
+        """
+        Weighted score of category results matched by name.
+
+        Results without a name fall back to their position. Unknown names and
+        repeated categories are ignored; if categories are missing, the score
+        is weighted over the ones present.
+        """
+        total = 0.0
+        weight_total = 0.0
+        seen = 0  # bitmask of scored categories
+        for position, result in enumerate(category_scores):
+            name = result.get('name')
+            index = self.index(name) if name is not None else (position if position < len(self.weights) else None)
+            if index is None or seen >> index & 1:
+                continue
+            try:
+                score = float(result['score'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            seen |= 1 << index
+            total += score * self.weights[index]
+            weight_total += self.weights[index]
+        return round(total / weight_total, 1) if weight_total else 0.0
+
+    def missing_categories(self, category_scores: Sequence[Dict]) -> List[str]:
+        """Rubric categories with no result in `category_scores`"""
+        present = {self.index(result.get('name')) for result in category_scores}
+        return [name for position, name in enumerate(self.names) if position not in present]
+
+    def grade_for(self, score: float) -> Dict:
+        """Grade info for a score; O(log n) over the compiled ranges"""
+        position = bisect.bisect_right(self._grade_floors, score) - 1
+        return self._grades[max(position, 0)]
+
+
+def load_rubric_file(path: str) -> Rubric:
+    """
+    Load a rubric from a .json, .yaml or .yml file; the file name (without
+    extension) is the rubric id.
+
+    Raises:
+        RubricError: If the file can't be parsed or the rubric is invalid
+    """
+    rubric_id, extension = os.path.splitext(os.path.basename(path))
+    try:
+        with open(path, encoding='utf-8') as f:
+            if extension == '.json':
+                data = json.load(f)
+            else:
+                try:
+                    import yaml
+                except ImportError as e:
+                    raise RubricError("YAML rubrics require the 'PyYAML' package") from e
+                data = yaml.safe_load(f)
+    except (OSError, ValueError) as e:
+        if isinstance(e, RubricError):
+            raise
+        raise RubricError(f"Could not read rubric {path}: {e}") from e
+    if not isinstance(data, dict):
+        raise RubricError(f"Rubric {path} must contain a mapping")
+    return Rubric(rubric_id, data)
+
+
+class RubricRegistry:
+    """
+    Built-in rubrics plus any found in `directory`.
+
+    The directory is rescanned at most every `reload_interval` seconds when a
+    rubric is looked up; changed files are recompiled and listeners (which
+    re-register the rubric's prompts) are called. A file that fails to load
+    is logged and the previous version stays in use.
+    """
+
+    def __init__(self, builtin: Dict[str, Rubric], default_id: str,
+                 directory: Optional[str] = None, reload_interval: float = 5):
+        self.default_id = default_id
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._builtin = dict(builtin)
+        self._rubrics = dict(builtin)
+        self._files: Dict[str, float] = {}  # path -> mtime
+        self._listeners: List[Callable[[Rubric], None]] = []
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def add_listener(self, listener: Callable[[Rubric], None]) -> None:
+        """Call `listener` for every loaded rubric now and on each (re)load"""
+        with self._lock:
+            self._listeners.append(listener)
+            rubrics = list(self._rubrics.values())
+        for rubric in rubrics:
+            listener(rubric)
+
+    def get(self, rubric_id: Optional[str] = None) -> Rubric:
+        """
+        Raises:
+            RubricError: If no rubric has this id
+        """
+        self._maybe_reload()
+        rubric = self._rubrics.get(rubric_id or self.default_id)
+        if rubric is None:
+            raise RubricError(f"Unknown rubric: {rubric_id}")
+        return rubric
+
+    def ids(self) -> List[str]:
+        self._maybe_reload()
+        return sorted(self._rubrics)
+
+    def reload(self) -> None:
+        """Rescan the rubric directory, recompiling files that changed"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            updates = self._scan()
+            listeners = list(self._listeners)
+        # Listeners (prompt registration) run before a rubric is published,
+        # so `get` never returns a rubric whose prompts aren't registered yet
+        for rubric in updates.values():
+            if rubric is None:
+                continue
+            logger.info("Loaded rubric %s (version %s)", rubric.id, rubric.version)
+            for listener in listeners:
+                try:
+                    listener(rubric)
+                except Exception:
+                    logger.exception("Rubric listener failed for %s", rubric.id)
+        with self._lock:
+            for rubric_id, rubric in updates.items():
+                if rubric is None:
+                    self._rubrics.pop(rubric_id, None)
+                else:
+                    self._rubrics[rubric_id] = rubric
+
+    def _maybe_reload(self) -> None:
+        if self.directory and time.monotonic() - self._checked_at >= self.reload_interval:
+            self.reload()
+
+    def _scan(self) -> Dict[str, Optional[Rubric]]:
+        """Rubrics to publish by id (None to remove), from files that changed"""
+        if not self.directory or not os.path.isdir(self.directory):
+            return {}
+        found: Dict[str, float] = {}
+        updates: Dict[str, Optional[Rubric]] = {}
+        for entry in sorted(os.scandir(self.directory), key=lambda entry: entry.name):
+            if not entry.is_file() or not entry.name.endswith(RUBRIC_FILE_EXTENSIONS):
+                continue
+            mtime = entry.stat().st_mtime
+            found[entry.path] = mtime
+            if self._files.get(entry.path) == mtime:
+                continue
+            try:
+                rubric = load_rubric_file(entry.path)
+            except RubricError as e:
+                logger.error("Skipping rubric file %s: %s", entry.path, e)
+                continue
+            updates[rubric.id] = rubric
+
+        # Files that were removed fall back to the built-in rubric (if any)
+        for path in set(self._files) - set(found):
+            rubric_id = os.path.splitext(os.path.basename(path))[0]
+            if rubric_id not in updates:
+                updates[rubric_id] = self._builtin.get(rubric_id)
+        self._files = found
+        return updates
+
+
+# Singleton instance
+rubric_registry = RubricRegistry(
+    {DEFAULT_RUBRIC_ID: Rubric(DEFAULT_RUBRIC_ID, SPORTS_PARTNERSHIP_RUBRIC)},
+    default_id=os.getenv('RUBRIC_DEFAULT', DEFAULT_RUBRIC_ID),
+    directory=os.getenv('RUBRIC_DIR') or None,
+    reload_interval=float(os.getenv('RUBRIC_RELOAD_INTERVAL', '5'))
+)
@@ -0,0 +1,756 @@
+"""
+Session Store
+Bounded storage for live voice sessions with idle-TTL and max-sessions eviction
+
+Backends:
+- memory: process-local (default, single worker)
+- sqlite: WAL-mode database file shared by every worker on one host
+- redis:  any Redis-protocol server, shared across hosts
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from agent.local_sqlite import ThreadLocalSQLite
+
+logger = logging.getLogger(__name__)
+
+
+class Turn:
+    """One utterance in a call; the only per-turn record that is stored"""
+
+    __slots__ = ('role', 'text', 'timestamp')
+
+    def __init__(self, role: str, text: str, timestamp: float):
+        self.role = role
+        self.text = text
+        self.timestamp = timestamp
+
+    def to_history(self) -> Dict:
+        return {'role': self.role, 'message': self.text}
+
+    def to_transcript(self, index: int) -> Dict:
+        return {
+            'speaker': 'user' if self.role == 'USER' else 'ai',
+            'text': self.text,
+            'timestamp': index
+        }
+
+
+class Session:
+    """A voice session: persona, turn log and free-form state"""
+
+    __slots__ = ('session_id', 'persona', 'turns', 'state', 'created_at', 'last_active', 'detached_at')
+
+    def __init__(self, session_id: str, persona: Dict, now: Optional[float] = None):
+        now = now if now is not None else time.time()
+        self.session_id = session_id
+        self.persona = persona
+        self.turns: List[Turn] = []
+        self.state: Dict = {}
+        self.created_at = now
+        self.last_active = now
+        self.detached_at: Optional[float] = None
+
+    @classmethod
+    def from_record(cls, record: Dict, turns: List[Turn]) -> 'Session':
+        session = cls(record['session_id'], record['persona'], record['created_at'])
+        session.turns = turns
+        session.state = record.get('state') or {}
+        session.last_active = record['last_active']
+        session.detached_at = record.get('detached_at')
+        return session
+
+    def to_dict(self) -> Dict:
+        return {
+            'session_id': self.session_id,
+            'persona': self.persona,
+            'history': [turn.to_history() for turn in self.turns],
+            'transcript': [turn.to_transcript(i) for i, turn in enumerate(self.turns)],
+            'state': self.state,
+            'created_at': self.created_at,
+            'last_active': self.last_active
+        }
+
+    def approx_bytes(self) -> int:
+        size = sys.getsizeof(self) + sys.getsizeof(self.turns) + _deep_sizeof(self.persona) + _deep_sizeof(self.state)
+        for turn in self.turns:
+            size += sys.getsizeof(turn) + sys.getsizeof(turn.role) + sys.getsizeof(turn.text)
+        return size
+
+
+def _deep_sizeof(value) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_deep_sizeof(v) for v in value)
+    return size
+
+
+class SessionArchive:
+    """Append-only JSONL archive for sessions evicted from memory"""
+
+    def __init__(self, directory: Optional[str]):
+        self.directory = directory
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, session: Session, reason: str) -> None:
+        if not self.directory:
+            return
+        record = session.to_dict()
+        record['evicted_reason'] = reason
+        record['evicted_at'] = time.time()
+        day = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        path = os.path.join(self.directory, f"sessions-{day}.jsonl")
+        line = json.dumps(record, default=str)
+        with self._lock:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+class SessionStore(ABC):
+    """
+    Interface every session backend implements.
+
+    Sessions returned by `get` are snapshots for shared backends, so all
+    mutations must go through the store's methods. A backend missing any of
+    these methods fails when it is instantiated.
+    """
+
+    def __init__(self):
+        self._eviction_listeners: List[Callable[[str], None]] = []
+
+    def add_eviction_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        Called with the session_id of every session this process evicts,
+        whether it expired or was pushed out by `max_sessions` (not for `delete`)
+        """
+        self._eviction_listeners.append(listener)
+
+    def _notify_evicted(self, session_id: str) -> None:
+        for listener in self._eviction_listeners:
+            try:
+                listener(session_id)
+            except Exception:
+                logger.exception("Eviction listener failed for %s", session_id)
+
+    @abstractmethod
+    def create(self, session_id: str, persona: Dict) -> Session:
+        ...
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Session]:
+        ...
+
+    @abstractmethod
+    def touch(self, session_id: str) -> Optional[Session]:
+        ...
+
+    @abstractmethod
+    def append_turn(self, session_id: str, role: str, text: str) -> bool:
+        ...
+
+    @abstractmethod
+    def update_persona(self, session_id: str, updates: Dict) -> bool:
+        ...
+
+    @abstractmethod
+    def update_state(self, session_id: str, key: str, value) -> bool:
+        ...
+
+    @abstractmethod
+    def detach(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> Optional[Session]:
+        ...
+
+    @abstractmethod
+    def evict_expired(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of live sessions; cheap enough to call on every metrics scrape"""
+        ...
+
+    @abstractmethod
+    def memory_usage(self) -> Dict:
+        ...
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local session store.
+
+    Sessions idle for longer than `idle_ttl` (or `detached_ttl` once their
+    socket has gone away) are evicted, as is the least recently active session
+    whenever `max_sessions` is exceeded. Evicted sessions go to the archive.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = 1800,
+        detached_ttl: float = 300,
+        max_sessions: int = 1000,
+        archive: Optional[SessionArchive] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        super().__init__()
+        self.idle_ttl = idle_ttl
+        self.detached_ttl = detached_ttl
+        self.max_sessions = max_sessions
+        self.archive = archive or SessionArchive(None)
+        self._clock = clock
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.evictions = 0
+
+    def create(self, session_id: str, persona: Dict) -> Session:
+        session = Session(session_id, persona, self._clock())
+        with self._lock:
+            self._sessions[session_id] = session
+            overflow = []
+            while len(self._sessions) > self.max_sessions:
+                _, oldest = self._sessions.popitem(last=False)
+                overflow.append(oldest)
+        self._archive(overflow, 'max_sessions')
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def touch(self, session_id: str) -> Optional[Session]:
+        """Mark the session active and move it to the back of the eviction order"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session:
+                session.last_active = self._clock()
+                session.detached_at = None
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def append_turn(self, session_id: str, role: str, text: str) -> bool:
+        with self._lock:
+            session = self.touch(session_id)
+            if not session:
+                return False
+            session.turns.append(Turn(role, text, self._clock()))
+            return True
+
+    def update_persona(self, session_id: str, updates: Dict) -> bool:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session:
+                return False
+            session.persona = {**session.persona, **updates}
+            return True
+
+    def update_state(self, session_id: str, key: str, value) -> bool:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session:
+                return False
+            session.state[key] = value
+            return True
+
+    def detach(self, session_id: str) -> None:
+        """The session's socket disconnected; it now expires on the shorter TTL"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session and session.detached_at is None:
+                session.detached_at = self._clock()
+
+    def delete(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def evict_expired(self) -> List[str]:
+        """Evict idle and detached sessions; returns the evicted session ids"""
+        now = self._clock()
+        expired = []
+        with self._lock:
+            for session_id, session in list(self._sessions.items()):
+                idle_for = now - session.last_active
+                detached_for = now - session.detached_at if session.detached_at is not None else 0
+                if idle_for > self.idle_ttl:
+                    expired.append((session, 'idle_ttl'))
+                elif detached_for > self.detached_ttl:
+                    expired.append((session, 'detached_ttl'))
+            for session, _ in expired:
+                del self._sessions[session.session_id]
+        for session, reason in expired:
+            self._archive([session], reason)
+        return [session.session_id for session, _ in expired]
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def memory_usage(self) -> Dict:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            'backend': 'memory',
+            'sessions': len(sessions),
+            'turns': sum(len(s.turns) for s in sessions),
+            'approx_bytes': sum(s.approx_bytes() for s in sessions),
+            'max_sessions': self.max_sessions,
+            'evictions': self.evictions
+        }
+
+    def _archive(self, sessions: List[Session], reason: str) -> None:
+        for session in sessions:
+            with self._lock:
+                self.evictions += 1
+            try:
+                self.archive.write(session, reason)
+            except OSError as e:
+                logger.warning("Failed to archive session %s: %s", session.session_id, e)
+            self._notify_evicted(session.session_id)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store backed by a SQLite database in WAL mode.
+
+    Every worker process on the host opens the same file, so a session created
+    by one worker is visible to the others. Connections are per thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        idle_ttl: float = 1800,
+        detached_ttl: float = 300,
+        max_sessions: int = 1000,
+        archive: Optional[SessionArchive] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        super().__init__()
+        self.path = path
+        self.idle_ttl = idle_ttl
+        self.detached_ttl = detached_ttl
+        self.max_sessions = max_sessions
+        self.archive = archive or SessionArchive(None)
+        self._clock = clock
+        self._db = ThreadLocalSQLite(path)
+        # executescript manages its own transaction
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                persona TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT '{}',
+                created_at REAL NOT NULL,
+                last_active REAL NOT NULL,
+                detached_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS sessions_last_active ON sessions(last_active);
+            CREATE TABLE IF NOT EXISTS turns (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                text TEXT NOT NULL,
+                timestamp REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS turns_session ON turns(session_id, id);
+        """)
+
+    def _connection(self):
+        return self._db.connection()
+
+    def _conn(self) -> '_Transaction':
+        return _Transaction(self._connection())
+
+    def create(self, session_id: str, persona: Dict) -> Session:
+        now = self._clock()
+        with self._conn() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO sessions (session_id, persona, state, created_at, last_active) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (session_id, json.dumps(persona), '{}', now, now)
+            )
+            conn.execute('DELETE FROM turns WHERE session_id = ?', (session_id,))
+            overflow = [row[0] for row in conn.execute(
+                'SELECT session_id FROM sessions ORDER BY last_active DESC LIMIT -1 OFFSET ?',
+                (self.max_sessions,)
+            )]
+        for old_id in overflow:
+            self._evict(old_id, 'max_sessions')
+        return Session(session_id, persona, now)
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._conn() as conn:
+            return self._load(conn, session_id)
+
+    def _load(self, conn, session_id: str) -> Optional[Session]:
+        row = conn.execute(
+            'SELECT session_id, persona, state, created_at, last_active, detached_at '
+            'FROM sessions WHERE session_id = ?',
+            (session_id,)
+        ).fetchone()
+        if not row:
+            return None
+        turns = [
+            Turn(role, text, timestamp)
+            for role, text, timestamp in conn.execute(
+                'SELECT role, text, timestamp FROM turns WHERE session_id = ? ORDER BY id',
+                (session_id,)
+            )
+        ]
+        return Session.from_record({
+            'session_id': row[0],
+            'persona': json.loads(row[1]),
+            'state': json.loads(row[2]),
+            'created_at': row[3],
+            'last_active': row[4],
+            'detached_at': row[5]
+        }, turns)
+
+    def touch(self, session_id: str) -> Optional[Session]:
+        with self._conn() as conn:
+            conn.execute(
+                'UPDATE sessions SET last_active = ?, detached_at = NULL WHERE session_id = ?',
+                (self._clock(), session_id)
+            )
+            return self._load(conn, session_id)
+
+    def append_turn(self, session_id: str, role: str, text: str) -> bool:
+        now = self._clock()
+        with self._conn() as conn:
+            updated = conn.execute(
+                'UPDATE sessions SET last_active = ?, detached_at = NULL WHERE session_id = ?',
+                (now, session_id)
+            ).rowcount
+            if not updated:
+                return False
+            conn.execute(
+                'INSERT INTO turns (session_id, role, text, timestamp) VALUES (?, ?, ?, ?)',
+                (session_id, role, text, now)
+            )
+        return True
+
+    def update_persona(self, session_id: str, updates: Dict) -> bool:
+        with self._conn() as conn:
+            row = conn.execute('SELECT persona FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+            if not row:
+                return False
+            persona = {**json.loads(row[0]), **updates}
+            conn.execute('UPDATE sessions SET persona = ? WHERE session_id = ?', (json.dumps(persona), session_id))
+        return True
+
+    def update_state(self, session_id: str, key: str, value) -> bool:
+        with self._conn() as conn:
+            row = conn.execute('SELECT state FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+            if not row:
+                return False
+            state = json.loads(row[0])
+            state[key] = value
+            conn.execute('UPDATE sessions SET state = ? WHERE session_id = ?', (json.dumps(state), session_id))
+        return True
+
+    def detach(self, session_id: str) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                'UPDATE sessions SET detached_at = ? WHERE session_id = ? AND detached_at IS NULL',
+                (self._clock(), session_id)
+            )
+
+    def delete(self, session_id: str) -> Optional[Session]:
+        with self._conn() as conn:
+            session = self._load(conn, session_id)
+            if session:
+                conn.execute('DELETE FROM turns WHERE session_id = ?', (session_id,))
+                conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+        return session
+
+    def evict_expired(self) -> List[str]:
+        now = self._clock()
+        with self._conn() as conn:
+            idle = [row[0] for row in conn.execute(
+                'SELECT session_id FROM sessions WHERE last_active < ?', (now - self.idle_ttl,)
+            )]
+            detached = [row[0] for row in conn.execute(
+                'SELECT session_id FROM sessions WHERE detached_at IS NOT NULL AND detached_at < ? '
+                'AND last_active >= ?',
+                (now - self.detached_ttl, now - self.idle_ttl)
+            )]
+        evicted = []
+        for session_id, reason in [(s, 'idle_ttl') for s in idle] + [(s, 'detached_ttl') for s in detached]:
+            if self._evict(session_id, reason):
+                evicted.append(session_id)
+        return evicted
+
+    def count(self) -> int:
+        with self._conn() as conn:
+            return conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+    def memory_usage(self) -> Dict:
+        with self._conn() as conn:
+            sessions = conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+            turns = conn.execute('SELECT COUNT(*) FROM turns').fetchone()[0]
+        try:
+            db_bytes = os.path.getsize(self.path)
+        except OSError:
+            db_bytes = 0
+        return {
+            'backend': 'sqlite',
+            'sessions': sessions,
+            'turns': turns,
+            'db_bytes': db_bytes,
+            'max_sessions': self.max_sessions
+        }
+
+    def _evict(self, session_id: str, reason: str) -> bool:
+        # Load and delete share one write transaction, so only one worker archives
+        session = self.delete(session_id)
+        if not session:
+            return False
+        try:
+            self.archive.write(session, reason)
+        except OSError as e:
+            logger.warning("Failed to archive session %s: %s", session_id, e)
+        self._notify_evicted(session_id)
+        return True
+
+
+class _Transaction:
+    """`with` wrapper that runs the block in one IMMEDIATE transaction"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Session store for any Redis-protocol server (Redis, Valkey, KeyDB, or a
+    local stand-in), shared by workers across hosts.
+
+    Layout per session: a hash with the session record and a list of turns,
+    plus two sorted sets (by last activity and by detach time) that drive
+    eviction. Keys also carry a Redis TTL as a backstop if no sweeper runs.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        idle_ttl: float = 1800,
+        detached_ttl: float = 300,
+        max_sessions: int = 1000,
+        archive: Optional[SessionArchive] = None,
+        clock: Callable[[], float] = time.time,
+        prefix: str = 'pitchpoint:'
+    ):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("SESSION_BACKEND=redis requires the 'redis' package") from e
+
+        super().__init__()
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.idle_ttl = idle_ttl
+        self.detached_ttl = detached_ttl
+        self.max_sessions = max_sessions
+        self.archive = archive or SessionArchive(None)
+        self._clock = clock
+        self.prefix = prefix
+        self._active_key = f"{prefix}sessions:active"
+        self._detached_key = f"{prefix}sessions:detached"
+
+    def _session_key(self, session_id: str) -> str:
+        return f"{self.prefix}session:{session_id}"
+
+    def _turns_key(self, session_id: str) -> str:
+        return f"{self.prefix}turns:{session_id}"
+
+    def _expire(self, pipe, session_id: str) -> None:
+        backstop = int(self.idle_ttl * 2)
+        pipe.expire(self._session_key(session_id), backstop)
+        pipe.expire(self._turns_key(session_id), backstop)
+
+    def create(self, session_id: str, persona: Dict) -> Session:
+        now = self._clock()
+        pipe = self.redis.pipeline()
+        pipe.delete(self._session_key(session_id), self._turns_key(session_id))
+        pipe.hset(self._session_key(session_id), mapping={
+            'persona': json.dumps(persona),
+            'state': '{}',
+            'created_at': now,
+            'last_active': now
+        })
+        self._expire(pipe, session_id)
+        pipe.zadd(self._active_key, {session_id: now})
+        pipe.execute()
+
+        overflow = self.redis.zcard(self._active_key) - self.max_sessions
+        if overflow > 0:
+            for old_id in self.redis.zrange(self._active_key, 0, overflow - 1):
+                self._evict(old_id, 'max_sessions')
+        return Session(session_id, persona, now)
+
+    def get(self, session_id: str) -> Optional[Session]:
+        pipe = self.redis.pipeline()
+        pipe.hgetall(self._session_key(session_id))
+        pipe.lrange(self._turns_key(session_id), 0, -1)
+        record, raw_turns = pipe.execute()
+        if not record:
+            return None
+        turns = [Turn(*json.loads(raw)) for raw in raw_turns]
+        return Session.from_record({
+            'session_id': session_id,
+            'persona': json.loads(record['persona']),
+            'state': json.loads(record.get('state') or '{}'),
+            'created_at': float(record['created_at']),
+            'last_active': float(record['last_active']),
+            'detached_at': float(record['detached_at']) if record.get('detached_at') else None
+        }, turns)
+
+    def touch(self, session_id: str) -> Optional[Session]:
+        if not self._mark_active(session_id):
+            return None
+        return self.get(session_id)
+
+    def _mark_active(self, session_id: str, turn: Optional[Turn] = None) -> bool:
+        import redis
+
+        key = self._session_key(session_id)
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    # A session that expires or is evicted after the check
+                    # aborts the write instead of leaving a partial hash behind
+                    pipe.watch(key)
+                    if not pipe.exists(key):
+                        return False
+                    now = self._clock()
+                    pipe.multi()
+                    pipe.hset(key, 'last_active', now)
+                    pipe.hdel(key, 'detached_at')
+                    pipe.zadd(self._active_key, {session_id: now})
+                    pipe.zrem(self._detached_key, session_id)
+                    if turn is not None:
+                        # Before the expiry, so the list the first turn creates gets a TTL too
+                        pipe.rpush(self._turns_key(session_id), json.dumps([turn.role, turn.text, turn.timestamp]))
+                    self._expire(pipe, session_id)
+                    pipe.execute()
+                    return True
+                except redis.WatchError:
+                    continue
+
+    def append_turn(self, session_id: str, role: str, text: str) -> bool:
+        return self._mark_active(session_id, Turn(role, text, self._clock()))
+
+    def update_persona(self, session_id: str, updates: Dict) -> bool:
+        return self._update_json_field(session_id, 'persona', lambda persona: {**persona, **updates})
+
+    def update_state(self, session_id: str, key: str, value) -> bool:
+        return self._update_json_field(session_id, 'state', lambda state: {**state, key: value})
+
+    def _update_json_field(self, session_id: str, field: str, update: Callable[[Dict], Dict]) -> bool:
+        import redis
+
+        key = self._session_key(session_id)
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    raw = pipe.hget(key, field)
+                    if raw is None:
+                        return False
+                    pipe.multi()
+                    pipe.hset(key, field, json.dumps(update(json.loads(raw))))
+                    pipe.execute()
+                    return True
+                except redis.WatchError:
+                    continue
+
+    def detach(self, session_id: str) -> None:
+        if not self.redis.exists(self._session_key(session_id)):
+            return
+        now = self._clock()
+        pipe = self.redis.pipeline()
+        pipe.hsetnx(self._session_key(session_id), 'detached_at', now)
+        pipe.zadd(self._detached_key, {session_id: now}, nx=True)
+        pipe.execute()
+
+    def delete(self, session_id: str) -> Optional[Session]:
+        session = self.get(session_id)
+        pipe = self.redis.pipeline()
+        pipe.delete(self._session_key(session_id), self._turns_key(session_id))
+        pipe.zrem(self._active_key, session_id)
+        pipe.zrem(self._detached_key, session_id)
+        removed = pipe.execute()[0]
+        return session if removed else None
+
+    def evict_expired(self) -> List[str]:
+        now = self._clock()
+        idle = self.redis.zrangebyscore(self._active_key, '-inf', now - self.idle_ttl)
+        detached = self.redis.zrangebyscore(self._detached_key, '-inf', now - self.detached_ttl)
+        evicted = []
+        for session_id, reason in [(s, 'idle_ttl') for s in idle] + [(s, 'detached_ttl') for s in detached]:
+            if session_id not in evicted and self._evict(session_id, reason):
+                evicted.append(session_id)
+        return evicted
+
+    def count(self) -> int:
+        return self.redis.zcard(self._active_key)
+
+    def memory_usage(self) -> Dict:
+        return {
+            'backend': 'redis',
+            'sessions': self.redis.zcard(self._active_key),
+            'detached': self.redis.zcard(self._detached_key),
+            'max_sessions': self.max_sessions
+        }
+
+    def _evict(self, session_id: str, reason: str) -> bool:
+        # delete() only returns the session to the worker that removed it
+        session = self.delete(session_id)
+        if not session:
+            return False
+        try:
+            self.archive.write(session, reason)
+        except OSError as e:
+            logger.warning("Failed to archive session %s: %s", session_id, e)
+        self._notify_evicted(session_id)
+        return True
+
+
+def create_session_store() -> SessionStore:
+    """Build the session store selected by SESSION_BACKEND"""
+    backend = os.getenv('SESSION_BACKEND', 'memory').lower()
+    options = {
+        'idle_ttl': float(os.getenv('SESSION_IDLE_TTL', '1800')),
+        'detached_ttl': float(os.getenv('SESSION_DETACHED_TTL', '300')),
+        'max_sessions': int(os.getenv('SESSION_MAX_SESSIONS', '1000')),
+        'archive': SessionArchive(os.getenv('SESSION_ARCHIVE_DIR', '.cache/sessions') or None)
+    }
+
+    if backend == 'sqlite':
+        return SQLiteSessionStore(os.getenv('SESSION_SQLITE_PATH', '.cache/sessions.db'), **options)
+    if backend == 'redis':
+        return RedisSessionStore(os.getenv('SESSION_REDIS_URL', 'redis://localhost:6379/0'), **options)
+    if backend == 'memory':
+        return InMemorySessionStore(**options)
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
@@ -0,0 +1,85 @@
+"""
+Single Flight
+Coalesces concurrent calls for the same key into one execution
+"""
+
+import threading
+from typing import Callable, Dict, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    The first caller for a key runs `fn`; callers that arrive while it is in
+    flight block and receive the same result (or exception). Nothing is kept
+    once the call finishes, so this is deduplication, not caching.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """
+        Returns:
+            (result, shared) - shared is True if another caller ran `fn`
+        """
+        call, leader = self.join(key)
+        if not leader:
+            return self.wait(call), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result=result)
+        return result, False
+
+    def join(self, key: str) -> Tuple[_Call, bool]:
+        """
+        Register a caller for `key` without running anything, for work that
+        can't be wrapped in one function (e.g. a generator)
+
+        Returns:
+            (call, leader) - the leader must `finish` the call; everyone else
+            passes it to `wait`
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            return call, True
+
+    def wait(self, call: _Call) -> T:
+        """Block until the leader finishes; returns its result or raises its exception"""
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def finish(self, key: str, call: _Call, result: T = None, error: BaseException = None) -> None:
+        """Hand the leader's result (or exception) to the waiters and forget the key"""
+        call.result = result
+        call.error = error
+        with self._lock:
+            self._calls.pop(key, None)
+        call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,167 @@
+"""
+Speech Pipeline
+Turns a stream of LLM text deltas into ordered, speakable audio chunks
+"""
+
+import os
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from app.services.cancellation import CancelToken
+
+# Sentence terminators are only trusted once followed by whitespace, so
+# "3.5" or "..." mid-stream never split early.
+_SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s')
+_CLAUSE_END = re.compile(r'[,;:—]\s')
+
+# Abbreviations that end in a period but never end a sentence
+_ABBREVIATIONS = ('mr.', 'mrs.', 'ms.', 'dr.', 'vs.', 'etc.', 'e.g.', 'i.e.', 'st.', 'jr.', 'sr.')
+
+
+class SentenceChunker:
+    """
+    Accumulates streamed text and releases it at sentence or clause boundaries.
+
+    The first fragment is released as early as possible to cut time-to-first-audio;
+    later fragments prefer whole sentences so the voice keeps natural prosody.
+    """
+
+    def __init__(self, first_min_chars: int = 12, min_chars: int = 40, clause_min_chars: int = 80):
+        self.first_min_chars = first_min_chars
+        self.min_chars = min_chars
+        self.clause_min_chars = clause_min_chars
+        self._buffer = ''
+        self._emitted = 0
+
+    def feed(self, text: str) -> List[str]:
+        """Add a text delta and return any fragments that are now complete"""
+        self._buffer += text
+        fragments = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            fragment = self._buffer[:cut].strip()
+            self._buffer = self._buffer[cut:]
+            if fragment:
+                fragments.append(fragment)
+                self._emitted += 1
+        return fragments
+
+    def flush(self) -> Optional[str]:
+        """Return whatever text is left once the stream has ended"""
+        fragment = self._buffer.strip()
+        self._buffer = ''
+        if fragment:
+            self._emitted += 1
+            return fragment
+        return None
+
+    def _find_cut(self) -> Optional[int]:
+        min_chars = self.first_min_chars if self._emitted == 0 else self.min_chars
+
+        for match in _SENTENCE_END.finditer(self._buffer):
+            end = match.end()
+            if end < min_chars:
+                continue
+            if self._buffer[:match.start() + 1].lower().endswith(_ABBREVIATIONS):
+                continue
+            return end
+
+        clause_min = self.first_min_chars if self._emitted == 0 else self.clause_min_chars
+        for match in _CLAUSE_END.finditer(self._buffer):
+            if match.end() >= clause_min:
+                return match.end()
+
+        return None
+
+
+def iter_speech_fragments(deltas: Iterable[str], chunker: Optional[SentenceChunker] = None) -> Iterator[str]:
+    """Re-chunk a stream of text deltas into speakable fragments"""
+    chunker = chunker or SentenceChunker()
+    for delta in deltas:
+        for fragment in chunker.feed(delta):
+            yield fragment
+    tail = chunker.flush()
+    if tail:
+        yield tail
+
+
+# Shared pool for TTS requests so synthesis of fragment N overlaps with
+# generation of fragment N+1.
+_tts_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('TTS_WORKERS', '8')),
+    thread_name_prefix='tts'
+)
+
+_DONE = object()
+
+
+def synthesize_in_order(
+    fragments: Iterable[str],
+    tts: Callable[[str], bytes],
+    cancel_token: Optional[CancelToken] = None
+) -> Iterator[Tuple[int, str, bytes]]:
+    """
+    Synthesize fragments concurrently and yield (seq, text, audio) in order.
+
+    Fragments are pulled from the LLM stream on a background thread, so audio
+    for the first sentence is yielded while later sentences are still generating.
+    Once `cancel_token` is cancelled, or the caller stops iterating, the LLM
+    stream is closed, queued TTS requests are dropped and no further chunks
+    are yielded.
+    """
+    pending: "queue.Queue" = queue.Queue()
+    submitted = []
+    consumer_closed = threading.Event()
+
+    def cancelled() -> bool:
+        return cancel_token is not None and cancel_token.cancelled
+
+    def stopped() -> bool:
+        return consumer_closed.is_set() or cancelled()
+
+    def produce():
+        try:
+            for seq, text in enumerate(fragments):
+                if stopped():
+                    break
+                future = _tts_executor.submit(tts, text)
+                submitted.append(future)
+                if stopped():
+                    # The consumer may have cancelled `submitted` before this one was added
+                    future.cancel()
+                    break
+                pending.put((seq, text, future))
+        except Exception as e:
+            pending.put(e)
+        finally:
+            close = getattr(fragments, 'close', None)
+            if close:
+                close()
+            pending.put(_DONE)
+
+    threading.Thread(target=produce, name='llm-stream', daemon=True).start()
+
+    try:
+        while True:
+            item = pending.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            seq, text, future = item
+            if cancelled():
+                future.cancel()
+                continue
+            audio = future.result()
+            if cancelled():
+                continue
+            yield seq, text, audio
+    finally:
+        consumer_closed.set()
+        for future in submitted:
+            future.cancel()
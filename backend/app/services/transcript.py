@@ -0,0 +1,103 @@
+"""
+Transcript
+Parses call transcripts ("You: ...\n\nAlex Johnson: ...") into speaker turns
+and splits them into overlapping windows for segmented evaluation
+"""
+
+import re
+from typing import List, NamedTuple
+
+# The rep is labelled "You" by the call page; everyone else is the prospect
+REP_SPEAKER = 'You'
+
+_SPEAKER_LINE = re.compile(r'^([^:\n]{1,60}):\s?(.*)$')
+_MAX_NAME_WORDS = 4
+
+
+class TranscriptTurn(NamedTuple):
+    speaker: str
+    text: str
+
+    @property
+    def is_rep(self) -> bool:
+        return self.speaker == REP_SPEAKER
+
+    def render(self) -> str:
+        return f"{self.speaker}: {self.text}" if self.speaker else self.text
+
+
+def parse_transcript(transcript: str) -> List[TranscriptTurn]:
+    """
+    Split a transcript into turns at "Speaker:" lines.
+
+    Lines without a speaker prefix continue the previous turn; text before
+    the first speaker line becomes a turn with an empty speaker.
+    """
+    turns: List[TranscriptTurn] = []
+    speaker = ''
+    lines: List[str] = []
+
+    def flush():
+        text = ' '.join(line.strip() for line in lines if line.strip())
+        if text:
+            turns.append(TranscriptTurn(speaker, text))
+
+    for line in transcript.splitlines():
+        match = _SPEAKER_LINE.match(line)
+        # Names are short; "Here's the thing: ..." is a sentence, not a speaker
+        if match and len(match.group(1).split()) <= _MAX_NAME_WORDS:
+            flush()
+            speaker = match.group(1).strip()
+            lines = [match.group(2)]
+        else:
+            lines.append(line)
+    flush()
+    return turns
+
+
+def split_long_turn(turn: TranscriptTurn, max_chars: int) -> List[TranscriptTurn]:
+    """Break a turn longer than `max_chars` at word boundaries"""
+    if len(turn.text) <= max_chars:
+        return [turn]
+    pieces = []
+    words = turn.text.split()
+    current: List[str] = []
+    size = 0
+    for word in words:
+        if current and size + len(word) + 1 > max_chars:
+            pieces.append(TranscriptTurn(turn.speaker, ' '.join(current)))
+            current, size = [], 0
+        current.append(word)
+        size += len(word) + 1
+    if current:
+        pieces.append(TranscriptTurn(turn.speaker, ' '.join(current)))
+    return pieces
+
+
+def window_turns(turns: List[TranscriptTurn], window_chars: int, overlap_turns: int = 2) -> List[List[TranscriptTurn]]:
+    """
+    Group consecutive turns into windows of at most ~`window_chars`.
+
+    Each window after the first repeats up to `overlap_turns` turns (and at
+    most a quarter of a window) from the end of the previous one, so an
+    exchange that straddles a boundary is seen whole. Every window adds at
+    least one new turn.
+    """
+    turns = [piece for turn in turns for piece in split_long_turn(turn, window_chars)]
+    windows: List[List[TranscriptTurn]] = []
+    start = 0
+    covered = 0  # turns[:covered] are already in some window
+    while covered < len(turns):
+        end = start
+        size = 0
+        while end < len(turns) and (end <= covered or size + len(turns[end].text) <= window_chars):
+            size += len(turns[end].text)
+            end += 1
+        windows.append(turns[start:end])
+        previous_start, covered, start = start, end, end
+        overlap_size = 0
+        while (start > max(end - overlap_turns, previous_start + 1)
+               and overlap_size + len(turns[start - 1].text) <= window_chars // 4):
+            start -= 1
+            overlap_size += len(turns[start].text)
+    return windows
@@ -0,0 +1,285 @@
+"""
+TTS Cache
+Content-addressed audio cache with a byte-bounded in-memory LRU tier and an
+on-disk tier with size-based eviction
+
+Pre-warm common persona phrases from the command line:
+    python -m app.services.tts_cache warm phrases.txt
+    python -m app.services.tts_cache stats
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Fold the variations that do not change the spoken audio"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+def cache_key(voice_id: str, model_id: str, voice_settings: Dict, text: str) -> str:
+    """Stable hash of everything that determines the synthesized audio"""
+    payload = json.dumps(
+        [voice_id, model_id, voice_settings, normalize_text(text)],
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class MemoryLRU:
+    """Thread-safe LRU bounded by total bytes rather than entry count"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: bytes) -> int:
+        """Store a value and return how many entries were evicted"""
+        if len(value) > self.max_bytes:
+            return 0
+        evicted = 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self.size -= len(old)
+                evicted += 1
+        return evicted
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskStore:
+    """
+    One file per entry, sharded by key prefix. Reads refresh the file's mtime,
+    so evicting the oldest mtimes first approximates LRU.
+
+    `size` is this process's running estimate: the directory total at the last
+    scan plus its own writes since. Other processes may share the directory, so
+    the estimate only decides when to rescan (over `max_bytes`, or after
+    writing a tenth of it), and eviction works from the sizes on disk.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Held for the whole scan; writers skip eviction rather than wait on it
+        self._evict_lock = threading.Lock()
+        self._written = 0
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(size for _, _, size in self._scan())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def _scan(self):
+        """Yield (path, mtime, size) for every cached file"""
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.mp3'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_mtime, stat.st_size
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path, None)
+            return data
+        except OSError:
+            return None
+
+    def put(self, key: str, value: bytes) -> int:
+        """Write atomically and return how many files were evicted"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        # Unique per writer, so processes sharing the directory never collide
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self.size += len(value) - replaced
+            self._written += len(value)
+            if self.size <= self.max_bytes and self._written * 10 <= self.max_bytes:
+                return 0
+        if not self._evict_lock.acquire(blocking=False):
+            # Another thread is already scanning
+            return 0
+        try:
+            return self._evict()
+        finally:
+            self._evict_lock.release()
+
+    def _evict(self) -> int:
+        with self._lock:
+            estimate, written = self.size, self._written
+        files = sorted(self._scan(), key=lambda item: item[1])
+        total = sum(size for _, _, size in files)
+        evicted = 0
+        if total > self.max_bytes:
+            # Trim to 90% so eviction does not rescan on every write
+            target = int(self.max_bytes * 0.9)
+            for path, _, size in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    # Evicted by another process sharing the directory
+                    total -= size
+                    continue
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+        with self._lock:
+            # Keep the writes that landed while the directory was scanned
+            self.size = total + (self.size - estimate)
+            self._written -= written
+        return evicted
+
+
+class TTSCache:
+    """Two-tier audio cache: memory LRU in front of a disk store"""
+
+    def __init__(self, memory_bytes: int, disk_dir: Optional[str], disk_bytes: int):
+        self.memory = MemoryLRU(memory_bytes)
+        self.disk = DiskStore(disk_dir, disk_bytes) if disk_dir else None
+        self._counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def get(self, key: str) -> Optional[bytes]:
+        audio = self.memory.get(key)
+        if audio is not None:
+            self._count('memory_hits')
+            return audio
+
+        if self.disk:
+            audio = self.disk.get(key)
+            if audio is not None:
+                self._count('disk_hits')
+                self._count('evictions', self.memory.put(key, audio))
+                return audio
+
+        self._count('misses')
+        return None
+
+    def put(self, key: str, audio: bytes) -> None:
+        if not audio:
+            return
+        evicted = self.memory.put(key, audio)
+        if self.disk:
+            try:
+                evicted += self.disk.put(key, audio)
+            except OSError as e:
+                logger.warning("TTS cache disk write failed: %s", e)
+        self._count('stores')
+        self._count('evictions', evicted)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((lookups - stats['misses']) / lookups, 4) if lookups else 0.0
+        stats['memory_entries'] = len(self.memory)
+        stats['memory_bytes'] = self.memory.size
+        stats['disk_bytes'] = self.disk.size if self.disk else 0
+        return stats
+
+
+# Singleton instance
+tts_cache = TTSCache(
+    memory_bytes=int(os.getenv('TTS_CACHE_MEMORY_MB', '64')) * 1024 * 1024,
+    disk_dir=os.getenv('TTS_CACHE_DIR', '.cache/tts') or None,
+    disk_bytes=int(os.getenv('TTS_CACHE_DISK_MB', '1024')) * 1024 * 1024
+)
+
+
+def _main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Manage the ElevenLabs TTS cache')
+    commands = parser.add_subparsers(dest='command', required=True)
+    warm = commands.add_parser('warm', help='Synthesize and cache one phrase per line')
+    warm.add_argument('phrases', help='Text file with one phrase per line')
+    commands.add_parser('stats', help='Print cache statistics')
+    args = parser.parse_args()
+
+    # Use the importable module's singleton, not this __main__ copy, so the
+    # client and the CLI share counters
+    from app.services.tts_cache import tts_cache as cache
+
+    if args.command == 'warm':
+        from app.clients.elevenlabs_client import elevenlabs_client
+
+        with open(args.phrases, encoding='utf-8') as f:
+            phrases = [line.strip() for line in f if line.strip()]
+        for phrase in phrases:
+            key = elevenlabs_client.cache_key(phrase)
+            if cache.get(key) is not None:
+                print(f"✓ cached  {phrase}")
+                continue
+            audio = elevenlabs_client.text_to_speech(phrase)
+            print(f"{'+ warmed' if audio else '✗ failed'}  {phrase}")
+
+    print(json.dumps(cache.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,105 @@
+"""
+Turn Scheduler
+Runs voice turns on a bounded worker pool with one FIFO queue per session
+"""
+
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a session already has the maximum number of pending turns"""
+
+
+class TurnScheduler:
+    """
+    Per-session ordered work queues drained by a shared, bounded thread pool.
+
+    At most one turn per session runs at a time, so turns are processed in the
+    order they were spoken. Each worker handles a single turn before yielding
+    back to the pool, which keeps busy sessions from starving quiet ones.
+    """
+
+    def __init__(self, max_workers: int = 16, max_queue_depth: int = 3):
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='turn')
+        self._queues: Dict[str, Deque[Tuple[Callable, tuple]]] = {}
+        self._running: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, session_id: str, fn: Callable, *args,
+               on_accepted: Optional[Callable[[], None]] = None) -> int:
+        """
+        Queue a turn for the session.
+
+        `on_accepted` runs under the scheduler lock once the turn is queued,
+        so work tied to acceptance (e.g. superseding the previous turn)
+        happens in the same order as the turns themselves.
+
+        Returns:
+            Number of turns waiting for this session (excluding the one running)
+
+        Raises:
+            QueueFullError: If the session's queue is already at max depth
+        """
+        with self._lock:
+            pending = self._queues.setdefault(session_id, deque())
+            if len(pending) >= self.max_queue_depth:
+                raise QueueFullError(
+                    f"Too many pending turns for this session (max {self.max_queue_depth})"
+                )
+            pending.append((fn, args))
+            depth = len(pending)
+            if on_accepted is not None:
+                on_accepted()
+            if session_id not in self._running:
+                self._running.add(session_id)
+                self._executor.submit(self._run_next, session_id)
+        return depth
+
+    def depth(self, session_id: str) -> int:
+        with self._lock:
+            return len(self._queues.get(session_id, ()))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'active_sessions': len(self._running),
+                'queued_turns': sum(len(q) for q in self._queues.values())
+            }
+
+    def _run_next(self, session_id: str) -> None:
+        with self._lock:
+            pending = self._queues.get(session_id)
+            if not pending:
+                self._queues.pop(session_id, None)
+                self._running.discard(session_id)
+                return
+            fn, args = pending.popleft()
+
+        try:
+            fn(*args)
+        except Exception:
+            logger.exception("Turn failed for session %s", session_id)
+        finally:
+            with self._lock:
+                if self._queues.get(session_id):
+                    self._executor.submit(self._run_next, session_id)
+                else:
+                    self._queues.pop(session_id, None)
+                    self._running.discard(session_id)
+
+
+# Singleton instance
+turn_scheduler = TurnScheduler(
+    max_workers=int(os.getenv('TURN_WORKERS', '16')),
+    max_queue_depth=int(os.getenv('TURN_QUEUE_DEPTH', '3'))
+)
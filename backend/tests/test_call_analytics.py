@@ -0,0 +1,48 @@
+from app.services.call_analytics import analyze_transcript, analyze_turns, render_facts
+
+
+def test_talk_ratio_and_turn_counts():
+    analytics = analyze_turns([True, False, True], ["one two three", "four", "five six seven eight"])
+    assert analytics['turns'] == {'total': 3, 'rep': 2, 'prospect': 1}
+    assert analytics['talk_ratio']['rep_words'] == 7
+    assert analytics['talk_ratio']['prospect_words'] == 1
+    assert analytics['talk_ratio']['by_words'] == {'rep_percentage': 87.5, 'prospect_percentage': 12.5}
+
+
+def test_questions_are_classified_open_or_closed():
+    analytics = analyze_turns(
+        [True, False, True],
+        ["So, what matters most to you? Is budget approved?", "Why do you ask?", "Tell me about your team. Right?"]
+    )
+    assert analytics['questions'] == {'rep_total': 4, 'rep_open': 2, 'rep_closed': 2, 'prospect_total': 1}
+
+
+def test_monologues_merge_consecutive_turns_by_one_side():
+    analytics = analyze_turns([True, True, False], ["a b c", "d e", "f"])
+    assert analytics['longest_monologue']['rep']['words'] == 5
+    assert analytics['longest_monologue']['prospect']['words'] == 1
+
+
+def test_interruptions_count_against_the_side_that_took_the_floor():
+    analytics = analyze_turns([True, False, False, True], ["We were thinking --", "Sorry, quick question", "Go on...", "Sure"])
+    assert analytics['interruptions'] == {'by_rep': 1, 'by_prospect': 1}
+
+
+def test_turn_length_distribution():
+    distribution = analyze_turns([True] * 3, ["word " * 5, "word " * 20, "word " * 300])['turn_length_words']['rep']
+    assert distribution['max'] == 300
+    assert distribution['median'] == 20.0
+    assert distribution['histogram'] == {'<=10': 1, '<=25': 1, '<=50': 0, '<=100': 0, '<=200': 0, '>200': 1}
+
+
+def test_empty_transcript_has_zeroed_analytics():
+    analytics = analyze_transcript("")
+    assert analytics['turns']['total'] == 0
+    assert analytics['talk_ratio']['by_words'] == {'rep_percentage': 0.0, 'prospect_percentage': 0.0}
+    assert render_facts(analytics) == "- No speaker turns could be identified in the transcript"
+
+
+def test_analyze_transcript_uses_speaker_labels():
+    analytics = analyze_transcript("You: How are you?\nAlex Johnson: Fine, thanks.")
+    assert analytics['turns'] == {'total': 2, 'rep': 1, 'prospect': 1}
+    assert "Rep questions: 1 (1 open, 0 closed)" in render_facts(analytics)
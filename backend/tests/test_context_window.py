@@ -0,0 +1,70 @@
+import time
+
+from app.services.context_window import ContextWindow, RollingSummarizer, build_context, estimate_tokens
+
+
+def _history(count, size=40):
+    return [{'role': 'USER' if i % 2 == 0 else 'CHATBOT', 'message': f"{i:03d}" + 'x' * size} for i in range(count)]
+
+
+def test_split_keeps_recent_turns_within_budget():
+    history = _history(20)
+    window = ContextWindow(budget_tokens=estimate_tokens(history[0]['message']) * 5, min_turns=2)
+    assert window.split(history) == 15
+
+
+def test_split_always_keeps_min_turns():
+    history = _history(4, size=4000)
+    assert ContextWindow(budget_tokens=10, min_turns=2).split(history) == 2
+
+
+def test_build_context_keeps_unsummarized_turns_verbatim():
+    history = _history(20)
+    window = ContextWindow(budget_tokens=estimate_tokens(history[0]['message']) * 5, min_turns=2)
+    summary = {'text': 'earlier', 'upto': 12}
+    text, recent, fold_until = build_context(window, history, summary)
+    assert text == 'earlier'
+    assert recent == history[12:]
+    assert fold_until == 15
+
+
+def test_build_context_caps_verbatim_turns_when_summary_lags():
+    history = _history(200)
+    per_turn = estimate_tokens(history[0]['message'])
+    window = ContextWindow(budget_tokens=per_turn * 5, min_turns=2, max_tokens=per_turn * 10)
+    _, recent, fold_until = build_context(window, history, None)
+    assert recent == history[190:]
+    assert fold_until == 195
+
+
+def test_summarizer_backs_off_after_failures():
+    calls = []
+
+    def failing(previous, turns):
+        calls.append(len(turns))
+        raise RuntimeError("provider down")
+
+    summarizer = RollingSummarizer(failing, min_batch=2, backoff=60)
+    history = _history(10)
+    assert summarizer.schedule('s1', None, history, 6, lambda *args: None)
+    deadline = time.monotonic() + 5
+    while 's1' in summarizer._in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert calls == [6]
+    # Within the backoff window nothing is retried
+    assert not summarizer.schedule('s1', None, history, 8, lambda *args: None)
+    summarizer.forget('s1')
+    assert summarizer.schedule('s1', None, history, 8, lambda *args: None)
+
+
+def test_summarizer_saves_incremental_summary():
+    saved = {}
+    summarizer = RollingSummarizer(lambda previous, turns: f"{previous}+{len(turns)}", min_batch=2)
+    history = _history(10)
+    summarizer.schedule('s1', {'text': 'a', 'upto': 2}, history, 6, lambda sid, summary: saved.update({sid: summary}))
+    deadline = time.monotonic() + 5
+    while not saved and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saved == {'s1': {'text': 'a+4', 'upto': 6}}
+    # Below the batch size nothing is scheduled
+    assert not summarizer.schedule('s1', saved['s1'], history, 7, lambda *args: None)
@@ -0,0 +1,35 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services import feedback_service as module
+from app.services.feedback_service import FeedbackService
+
+
+def test_provider_calls_are_capped_across_concurrent_evaluations(monkeypatch):
+    limit = 3
+    monkeypatch.setattr(module, '_provider_calls', threading.BoundedSemaphore(limit))
+    monkeypatch.setattr(module, 'get_cohere_client', lambda: (None, True))
+    lock = threading.Lock()
+    in_flight = peak = 0
+
+    def chat_once(self, client, use_v2, prompt):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return '{}'
+
+    monkeypatch.setattr(FeedbackService, '_chat_once', chat_once)
+    service = FeedbackService()
+    # Several "batch items", each fanning out like a parallel evaluation
+    with ThreadPoolExecutor(max_workers=4) as items:
+        futures = [items.submit(service._run_concurrently, lambda index: service._chat('prompt'), 6)
+                   for _ in range(4)]
+        outcomes = [future.result() for future in futures]
+
+    assert all(len(results) == 6 and not errors for results, errors in outcomes)
+    assert peak == limit
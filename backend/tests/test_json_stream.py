@@ -0,0 +1,53 @@
+import pytest
+
+from agent.json_stream import IncrementalJSONParser, parse_json_response
+
+
+def _feed_in_chunks(parser, text, size):
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return events
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_parser_emits_sections_as_they_close_whatever_the_chunking(size):
+    text = 'Here you go:\n```json\n{"categories": [{"name": "A", "score": 80}, {"name": "B", "score": 70}], "overall": {"summary": "ok"}}\n```'
+    parser = IncrementalJSONParser(emit=lambda path: path[0] == "categories" and len(path) == 2 or path == ("overall",))
+    events = _feed_in_chunks(parser, text, size)
+    assert events == [
+        (("categories", 0), {"name": "A", "score": 80}),
+        (("categories", 1), {"name": "B", "score": 70}),
+        (("overall",), {"summary": "ok"}),
+    ]
+    assert parser.done
+    assert parser.result()["overall"] == {"summary": "ok"}
+
+
+def test_parser_repairs_trailing_commas_and_comments():
+    parser = IncrementalJSONParser()
+    parser.feed('{"items": [1, 2,], // copied from the prompt\n "escaped": "a \\"quoted\\" // not a comment",}')
+    assert parser.result() == {"items": [1, 2], "escaped": 'a "quoted" // not a comment'}
+
+
+def test_parser_ignores_text_after_the_root_object():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": true} trailing {"b": 1}') == [(("a",), True)]
+    assert parser.result() == {"a": True}
+
+
+def test_parser_result_reports_incomplete_output():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": [1, 2')
+    with pytest.raises(ValueError, match="ended before"):
+        parser.result()
+    with pytest.raises(ValueError, match="No JSON object"):
+        IncrementalJSONParser().result()
+
+
+def test_parse_json_response_rejects_empty_and_malformed_text():
+    assert parse_json_response('Sure! {"score": 5,}') == {"score": 5}
+    with pytest.raises(ValueError):
+        parse_json_response("")
+    with pytest.raises(ValueError):
+        parse_json_response('{"score": }')
@@ -0,0 +1,15 @@
+from agent.json_stream import parse_json_response
+from app.services.live_coaching import COACHING_PROMPT
+
+
+def test_coaching_prompt_renders_a_json_example_the_parser_accepts():
+    prompt = COACHING_PROMPT.render(
+        rubric_outline="- Discovery (30%)",
+        running_state="(none yet)",
+        segment_label="turns 1-4",
+        transcript="You: What matters most to you this season?",
+    )
+    assert "{{" not in prompt and "}}" not in prompt
+    example = parse_json_response(prompt[prompt.index("ONLY (no additional text):"):])
+    assert set(example) == {"categories", "key_moments", "tip"}
+    assert example["categories"][0]["score"] == 75
@@ -0,0 +1,75 @@
+import threading
+
+from agent.profile_cache import FRESH, MISS, STALE, CachedResearch, ProfileCache, canonicalize_subject
+
+
+def test_canonicalize_subject_folds_case_accents_and_punctuation():
+    assert canonicalize_subject("The Golden-State  Warriors!") == "the golden state warriors"
+    assert canonicalize_subject("Atlético de Madrid") == "atletico de madrid"
+    assert canonicalize_subject("Procter & Gamble") == "procter and gamble"
+    assert canonicalize_subject("  ") == ""
+
+
+def test_aliases_resolve_to_one_subject_and_persist(tmp_path):
+    path = str(tmp_path / "research.sqlite3")
+    cache = ProfileCache(path)
+    cache.add_aliases({"GSW": "Golden State Warriors", "Dubs": "golden-state warriors"})
+    cache.put("Golden State Warriors", "v1", {"overview": "NBA team"})
+    assert cache.get("gsw", "v1")[0] == {"overview": "NBA team"}
+    assert cache.get("Dubs", "v1")[1] == FRESH
+    assert cache.get("gsw", "v2") is None
+    assert ProfileCache(path).subject_key("GSW") == "golden state warriors"
+
+
+def test_aliases_added_by_another_instance_are_seen_at_once(tmp_path):
+    path = str(tmp_path / "research.sqlite3")
+    reader, writer = ProfileCache(path), ProfileCache(path)
+    assert reader.subject_key("Man Utd") == "man utd"
+    writer.add_aliases({"Man Utd": "Manchester United"})
+    assert reader.subject_key("Man Utd") == "manchester united"
+    assert reader.stats()["aliases"] == 1
+
+
+def test_entries_go_stale_then_expire(tmp_path):
+    cache = ProfileCache(str(tmp_path / "research.sqlite3"), max_stale=3600)
+    cache.put("Acme", "v1", {"entity_type": "company"}, ttl=-1)
+    assert cache.get("acme", "v1")[1] == STALE
+    assert cache.entity_type("ACME") == "company"
+    cache.put("Acme", "v1", {"entity_type": "company"}, ttl=-7200)
+    assert cache.get("acme", "v1") is None
+    assert cache.stats() == {"entries": 1, "fresh": 0, "stale": 1, "aliases": 0}
+
+
+def test_cached_research_serves_hits_and_refreshes_stale_entries(tmp_path):
+    cache = ProfileCache(str(tmp_path / "research.sqlite3"))
+    calls = []
+    refreshed = threading.Event()
+
+    def research(subject):
+        calls.append(subject)
+        if len(calls) > 1:
+            refreshed.set()
+        return {"overview": f"profile {len(calls)}"}
+
+    cached = CachedResearch(research, cache, "v1")
+    profile, info = cached.research("Acme Corp")
+    assert info["status"] == MISS and info["subject_key"] == "acme corp"
+    assert cached.research("ACME corp.")[1]["status"] == FRESH
+    assert calls == ["Acme Corp"]
+
+    cache.put("Acme Corp", "v1", profile, ttl=-1)
+    assert cached.research("acme corp")[1]["status"] == STALE
+    assert refreshed.wait(2)
+    cached._executor.shutdown(wait=True)
+    assert cache.get("acme corp", "v1")[0] == {"overview": "profile 2"}
+
+
+def test_cached_stream_replays_cached_profiles(tmp_path):
+    cached = CachedResearch(lambda subject: {"overview": "x", "entity_type": "company"},
+                            ProfileCache(str(tmp_path / "research.sqlite3")), "v1")
+    first = list(cached.stream("Acme"))
+    second = list(cached.stream("acme"))
+    assert [event for event, _ in second] == ["section", "section", "complete"]
+    assert first[-1][1]["cache"]["status"] == MISS
+    assert second[-1][1]["cache"]["status"] == FRESH
+    assert second[-1][1]["profile"] == first[-1][1]["profile"]
@@ -0,0 +1,110 @@
+import datetime
+import json
+
+import pytest
+
+from app.services.rubric import Rubric, RubricError, RubricRegistry, category_key, load_rubric_file
+
+
+def _category(name, weight):
+    return {'name': name, 'weight': weight, 'description': '', 'criteria': [], 'evaluation_points': []}
+
+
+def _rubric_data(**overrides):
+    data = {
+        'categories': [_category('Rapport & Trust', 0.5), _category('Discovery', 0.3), _category('Closing', 0.2)],
+        'overall_scoring': {
+            '0-69': {'grade': 'C', 'description': 'Keep practicing'},
+            '70-84': {'grade': 'B', 'description': 'Solid'},
+            '85-100': {'grade': 'A', 'description': 'Excellent'},
+        },
+    }
+    data.update(overrides)
+    return data
+
+
+def test_category_key_ignores_case_spacing_and_ampersands():
+    assert category_key('  Rapport & TRUST ') == category_key('rapport and trust')
+
+
+def test_weighted_score_matches_categories_by_name():
+    rubric = Rubric('test', _rubric_data())
+    scores = [{'name': 'closing', 'score': 50}, {'name': 'Rapport and Trust', 'score': 90}, {'name': 'Discovery', 'score': 70}]
+    assert rubric.weighted_score(scores) == 76.0
+
+
+def test_weighted_score_skips_unknown_repeated_and_unscored_categories():
+    rubric = Rubric('test', _rubric_data())
+    scores = [
+        {'name': 'Rapport & Trust', 'score': 80},
+        {'name': 'Rapport & Trust', 'score': 0},
+        {'name': 'Weather', 'score': 0},
+        {'name': 'Discovery', 'score': 'n/a'},
+    ]
+    assert rubric.weighted_score(scores) == 80.0
+    assert rubric.missing_categories(scores) == ['Closing']
+    assert rubric.weighted_score([]) == 0.0
+
+
+def test_grade_for_uses_the_highest_range_starting_at_or_below_the_score():
+    rubric = Rubric('test', _rubric_data())
+    assert rubric.grade_for(84.5)['grade'] == 'B'
+    assert rubric.grade_for(85)['grade'] == 'A'
+    assert rubric.grade_for(-1)['grade'] == 'C'
+
+
+@pytest.mark.parametrize('overrides', [
+    {'categories': []},
+    {'categories': [_category('A', 0.5), _category('B', 0.4)]},
+    {'categories': [_category('A', 0.5), _category('a', 0.5)]},
+    {'overall_scoring': {'0-50': {'grade': 'B'}, '50-100': {'grade': 'A'}}},
+    {'overall_scoring': {'high-low': {'grade': 'A'}}},
+    {'overall_scoring': {'0-100': 'A'}},
+])
+def test_invalid_rubrics_are_rejected(overrides):
+    with pytest.raises(RubricError):
+        Rubric('test', _rubric_data(**overrides))
+
+
+def test_registry_loads_reloads_and_falls_back_to_builtin(tmp_path):
+    builtin = Rubric('default', _rubric_data())
+    registry = RubricRegistry({'default': builtin}, 'default', directory=str(tmp_path), reload_interval=0)
+    loaded = []
+    registry.add_listener(loaded.append)
+    assert loaded == [builtin]
+
+    path = tmp_path / 'default.json'
+    path.write_text(json.dumps(_rubric_data(categories=[_category('Only', 1.0)])))
+    assert registry.get().names == ('Only',)
+    assert loaded[-1].names == ('Only',)
+
+    (tmp_path / 'broken.json').write_text('{not json')
+    assert registry.ids() == ['default']
+
+    path.unlink()
+    assert registry.get() is builtin
+    with pytest.raises(RubricError):
+        registry.get('missing')
+
+
+def test_load_rubric_file_uses_the_file_name_as_id(tmp_path):
+    path = tmp_path / 'enterprise.json'
+    path.write_text(json.dumps(_rubric_data()))
+    rubric = load_rubric_file(str(path))
+    assert rubric.id == 'enterprise'
+    assert rubric.version == Rubric('other', _rubric_data()).version
+
+
+def test_values_json_cannot_encode_are_rejected():
+    with pytest.raises(RubricError):
+        Rubric('test', _rubric_data(updated=datetime.date(2026, 1, 1)))
+
+
+def test_registry_publishes_a_rubric_only_after_its_listeners_ran(tmp_path):
+    registry = RubricRegistry({}, 'custom', directory=str(tmp_path), reload_interval=3600)
+    visible_to_listener = []
+    registry.add_listener(lambda rubric: visible_to_listener.append(rubric.id in registry._rubrics))
+    (tmp_path / 'custom.json').write_text(json.dumps(_rubric_data()))
+    registry.reload()
+    assert visible_to_listener == [False]
+    assert registry.get('custom').id == 'custom'
@@ -0,0 +1,77 @@
+import pytest
+
+from app.services.session_store import InMemorySessionStore, SQLiteSessionStore, SessionStore
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_incomplete_backend_fails_at_instantiation():
+    class PartialStore(SessionStore):
+        def get(self, session_id):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialStore()
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, tmp_path):
+    def make(**options):
+        if request.param == 'sqlite':
+            return SQLiteSessionStore(str(tmp_path / 'sessions.db'), **options)
+        return InMemorySessionStore(**options)
+    return make
+
+
+def test_turns_persona_and_state_round_trip(make_store):
+    store = make_store()
+    store.create('s1', {'name': 'Alex'})
+    assert store.append_turn('s1', 'USER', 'Hello')
+    assert store.update_persona('s1', {'company': 'Acme'})
+    assert store.update_state('s1', 'summary', {'text': 'hi'})
+    session = store.get('s1')
+    assert [turn.text for turn in session.turns] == ['Hello']
+    assert session.persona == {'name': 'Alex', 'company': 'Acme'}
+    assert session.state == {'summary': {'text': 'hi'}}
+    assert not store.append_turn('missing', 'USER', 'Hello')
+    assert store.count() == 1
+
+
+def test_idle_and_detached_sessions_expire(make_store):
+    clock = _Clock()
+    store = make_store(idle_ttl=100, detached_ttl=10, clock=clock)
+    store.create('idle', {})
+    store.create('detached', {})
+    store.create('active', {})
+    clock.now += 50
+    store.detach('detached')
+    store.touch('active')
+    clock.now += 20
+    assert store.evict_expired() == ['detached']
+    clock.now += 40
+    assert store.evict_expired() == ['idle']
+    assert store.count() == 1
+
+
+def test_eviction_listeners_see_ttl_and_max_sessions_evictions(make_store):
+    clock = _Clock()
+    store = make_store(idle_ttl=100, max_sessions=2, clock=clock)
+    evicted = []
+    store.add_eviction_listener(evicted.append)
+    store.add_eviction_listener(lambda session_id: 1 / 0)
+    store.create('first', {})
+    clock.now += 1
+    store.create('second', {})
+    clock.now += 1
+    store.create('third', {})
+    assert evicted == ['first']
+    store.delete('second')
+    clock.now += 200
+    store.evict_expired()
+    assert evicted == ['first', 'third']
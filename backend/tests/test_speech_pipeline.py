@@ -0,0 +1,65 @@
+import threading
+import time
+
+from app.services.cancellation import CancelToken
+from app.services.speech_pipeline import SentenceChunker, iter_speech_fragments, synthesize_in_order
+
+
+def test_chunker_releases_first_fragment_early_and_later_ones_as_sentences():
+    chunker = SentenceChunker(first_min_chars=12, min_chars=40)
+    assert chunker.feed("Hi there. ") == []
+    assert chunker.feed("Thanks for calling today. I") == ["Hi there. Thanks for calling today."]
+    assert chunker.feed(" agree. We can talk pricing. ") == []
+    assert chunker.flush() == "I agree. We can talk pricing."
+    assert chunker.flush() is None
+
+
+def test_chunker_does_not_split_numbers_or_abbreviations():
+    fragments = list(iter_speech_fragments(["Dr. Smith said the ", "deal is 3.5 million. ", "Great news"]))
+    assert fragments == ["Dr. Smith said the deal is 3.5 million.", "Great news"]
+
+
+def test_chunker_falls_back_to_clauses_in_long_sentences():
+    chunker = SentenceChunker(first_min_chars=12, min_chars=40, clause_min_chars=30)
+    chunker.feed("First sentence is here. ")
+    fragments = chunker.feed("and this long clause keeps going on, so we")
+    assert fragments == ["and this long clause keeps going on,"]
+
+
+def test_synthesize_in_order_yields_in_fragment_order():
+    def tts(text):
+        time.sleep(0.05 if text == "a" else 0)
+        return text.upper().encode()
+
+    assert list(synthesize_in_order(["a", "b", "c"], tts)) == [(0, "a", b"A"), (1, "b", b"B"), (2, "c", b"C")]
+
+
+def _endless_fragments(state):
+    try:
+        while True:
+            state["pulled"] += 1
+            time.sleep(0.005)
+            yield f"fragment {state['pulled']}"
+    finally:
+        state["closed"].set()
+
+
+def test_synthesize_in_order_stops_producer_when_consumer_stops():
+    state = {"pulled": 0, "closed": threading.Event()}
+    chunks = synthesize_in_order(_endless_fragments(state), lambda text: b"audio")
+    next(chunks)
+    chunks.close()
+    assert state["closed"].wait(1)
+    pulled = state["pulled"]
+    time.sleep(0.05)
+    assert state["pulled"] == pulled
+
+
+def test_synthesize_in_order_stops_on_cancel():
+    state = {"pulled": 0, "closed": threading.Event()}
+    token = CancelToken()
+    chunks = synthesize_in_order(_endless_fragments(state), lambda text: b"audio", token)
+    next(chunks)
+    token.cancel()
+    assert list(chunks) == []
+    assert state["closed"].wait(1)
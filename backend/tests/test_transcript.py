@@ -0,0 +1,43 @@
+from app.services.transcript import TranscriptTurn, parse_transcript, split_long_turn, window_turns
+
+
+def test_parse_transcript_splits_on_speaker_lines():
+    turns = parse_transcript("Intro line\nYou: Hi Alex,\nthanks for joining.\n\nAlex Johnson: Sure thing.")
+    assert turns == [
+        TranscriptTurn('', 'Intro line'),
+        TranscriptTurn('You', 'Hi Alex, thanks for joining.'),
+        TranscriptTurn('Alex Johnson', 'Sure thing.'),
+    ]
+    assert turns[1].is_rep and not turns[2].is_rep
+
+
+def test_parse_transcript_ignores_colons_in_sentences():
+    turns = parse_transcript("You: Let me say this plainly and clearly: we can help.\nHere is the thing that matters: budget.")
+    assert len(turns) == 1
+    assert turns[0].text.endswith("Here is the thing that matters: budget.")
+
+
+def test_split_long_turn_breaks_at_words():
+    pieces = split_long_turn(TranscriptTurn('You', ' '.join(['word'] * 30)), 20)
+    assert all(len(piece.text) <= 20 for piece in pieces)
+    assert ' '.join(piece.text for piece in pieces) == ' '.join(['word'] * 30)
+    assert {piece.speaker for piece in pieces} == {'You'}
+
+
+def test_window_turns_covers_every_turn_with_bounded_overlap():
+    turns = [TranscriptTurn('You' if i % 2 else 'Alex', f"turn {i} " + 'x' * 40) for i in range(30)]
+    windows = window_turns(turns, window_chars=200, overlap_turns=2)
+    assert windows[0][0] == turns[0]
+    assert windows[-1][-1] == turns[-1]
+    seen = [turn for window in windows for turn in window]
+    assert set(seen) == set(turns)
+    for previous, window in zip(windows, windows[1:]):
+        overlap = [turn for turn in window if turn in previous]
+        assert len(overlap) <= 2
+        # Every window adds at least one new turn
+        assert len(window) > len(overlap)
+
+
+def test_window_turns_single_window_for_short_transcript():
+    turns = parse_transcript("You: Hi\nAlex: Hello")
+    assert window_turns(turns, window_chars=1000) == [turns]
@@ -0,0 +1,79 @@
+import os
+import threading
+
+from app.services.tts_cache import DiskStore, TTSCache, cache_key
+
+
+def _key(text):
+    return cache_key('voice', 'model', {'stability': 0.5}, text)
+
+
+def test_memory_hit(tmp_path):
+    cache = TTSCache(memory_bytes=1024, disk_dir=str(tmp_path), disk_bytes=1024)
+    key = _key('Hello there')
+    cache.put(key, b'audio')
+
+    assert cache.get(key) == b'audio'
+    assert cache.stats()['memory_hits'] == 1
+
+
+def test_disk_hit_is_promoted_to_memory(tmp_path):
+    key = _key('Hello there')
+    TTSCache(memory_bytes=1024, disk_dir=str(tmp_path), disk_bytes=1024).put(key, b'audio')
+    # A fresh process: empty memory tier, same directory
+    cache = TTSCache(memory_bytes=1024, disk_dir=str(tmp_path), disk_bytes=1024)
+
+    assert cache.get(key) == b'audio'
+    assert cache.get(key) == b'audio'
+    stats = cache.stats()
+    assert (stats['disk_hits'], stats['memory_hits']) == (1, 1)
+
+
+def test_disk_eviction_keeps_the_directory_under_its_bound(tmp_path):
+    store = DiskStore(str(tmp_path), max_bytes=1000)
+    keys = [_key(f"phrase {i}") for i in range(12)]
+    for i, key in enumerate(keys):
+        store.put(key, bytes(100))
+        # Distinct mtimes so the oldest entries go first
+        os.utime(store._path(key), (i, i))
+
+    on_disk = sum(size for _, _, size in store._scan())
+    assert on_disk <= 1000
+    assert store.size == on_disk
+    assert store.get(keys[0]) is None
+    assert store.get(keys[-1]) == bytes(100)
+
+
+def test_eviction_counts_files_written_by_other_processes(tmp_path):
+    first = DiskStore(str(tmp_path), max_bytes=1000)
+    second = DiskStore(str(tmp_path), max_bytes=1000)
+    for i in range(8):
+        first.put(_key(f"first {i}"), bytes(100))
+        second.put(_key(f"second {i}"), bytes(100))
+
+    # Neither store passed 1000 bytes on its own writes, but together they did.
+    # Each rescans after writing a tenth of the bound, so the directory can
+    # only overshoot by that much per writer.
+    assert sum(size for _, _, size in first._scan()) <= 1000 + 2 * 100
+
+
+def test_concurrent_writes_of_the_same_key(tmp_path):
+    store = DiskStore(str(tmp_path), max_bytes=10_000)
+    key = _key('Hello there')
+    values = [bytes([i]) * 200 for i in range(8)]
+    start = threading.Barrier(len(values))
+
+    def write(value):
+        start.wait()
+        store.put(key, value)
+
+    threads = [threading.Thread(target=write, args=(value,)) for value in values]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.get(key) in values
+    files = [path for path, _, _ in store._scan()]
+    assert files == [store._path(key)]
+    assert not [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith('.tmp')]
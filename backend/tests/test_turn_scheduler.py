@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from app.services.turn_scheduler import QueueFullError, TurnScheduler
+
+
+def _wait_idle(scheduler, timeout=2):
+    deadline = time.monotonic() + timeout
+    while scheduler.stats()['active_sessions'] and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert scheduler.stats() == {'max_workers': scheduler.max_workers, 'active_sessions': 0, 'queued_turns': 0}
+
+
+def test_turns_run_one_at_a_time_in_order_per_session():
+    scheduler = TurnScheduler(max_workers=4, max_queue_depth=10)
+    order, running, overlaps = [], set(), []
+    lock = threading.Lock()
+
+    def turn(session_id, index):
+        with lock:
+            if session_id in running:
+                overlaps.append(session_id)
+            running.add(session_id)
+        time.sleep(0.01)
+        with lock:
+            running.discard(session_id)
+            order.append((session_id, index))
+
+    for index in range(5):
+        scheduler.submit('a', turn, 'a', index)
+        scheduler.submit('b', turn, 'b', index)
+    _wait_idle(scheduler)
+    assert overlaps == []
+    assert [index for session_id, index in order if session_id == 'a'] == list(range(5))
+    assert [index for session_id, index in order if session_id == 'b'] == list(range(5))
+
+
+def test_submit_rejects_turns_past_the_queue_depth():
+    scheduler = TurnScheduler(max_workers=1, max_queue_depth=2)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking_turn():
+        started.set()
+        release.wait(2)
+
+    scheduler.submit('a', blocking_turn)
+    assert started.wait(1)
+    assert scheduler.submit('a', lambda: None) == 1
+    assert scheduler.submit('a', lambda: None) == 2
+    with pytest.raises(QueueFullError):
+        scheduler.submit('a', lambda: None)
+    # Other sessions have their own queue
+    assert scheduler.submit('b', lambda: None) == 1
+    release.set()
+    _wait_idle(scheduler)
+
+
+def test_failed_turn_does_not_block_the_next_one():
+    scheduler = TurnScheduler(max_workers=1)
+    done = threading.Event()
+    scheduler.submit('a', lambda: 1 / 0)
+    scheduler.submit('a', done.set)
+    assert done.wait(1)
+    _wait_idle(scheduler)
+
+
+def test_on_accepted_runs_in_submission_order_and_only_for_accepted_turns():
+    scheduler = TurnScheduler(max_workers=1, max_queue_depth=1)
+    release = threading.Event()
+    started = threading.Event()
+    accepted = []
+
+    def blocking_turn():
+        started.set()
+        release.wait(2)
+
+    scheduler.submit('a', blocking_turn, on_accepted=lambda: accepted.append(1))
+    assert started.wait(1)
+    scheduler.submit('a', lambda: None, on_accepted=lambda: accepted.append(2))
+    with pytest.raises(QueueFullError):
+        scheduler.submit('a', lambda: None, on_accepted=lambda: accepted.append(3))
+    assert accepted == [1, 2]
+    release.set()
+    _wait_idle(scheduler)
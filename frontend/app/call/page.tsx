@@ -21,6 +21,11 @@ export default function CallPage() {
     )
 }
 
+// Audio arrives as a Socket.IO binary attachment once negotiated, else base64
+type AudioPayload = string | ArrayBuffer
+
+const AUDIO_CAPABILITIES = { binary_audio: true }
+
 function CallContent() {
     const router = useRouter()
     const searchParams = useSearchParams()
@@ -47,7 +52,7 @@ function CallContent() {
     const audioContextRef = useRef<AudioContext | null>(null)
 
     // ✨ NEW: Audio queue management for seamless playback
-    const audioQueueRef = useRef<string[]>([])
+    const audioQueueRef = useRef<AudioPayload[]>([])
     const isPlayingRef = useRef<boolean>(false)
     const currentAudioRef = useRef<HTMLAudioElement | null>(null)
 
@@ -208,7 +213,7 @@ function CallContent() {
     const connectWebSocket = (session_id: string) => {
         if (socketRef.current?.connected) {
             // console.log('⚠️ Socket already connected, joining session...')
-            socketRef.current.emit('join_voice_session', { session_id })
+            socketRef.current.emit('join_voice_session', { session_id, capabilities: AUDIO_CAPABILITIES })
             return
         }
 
@@ -230,7 +235,7 @@ function CallContent() {
             setIsConnected(true)
             setConnectionStatus('Connected')
             setError(null)
-            socket.emit('join_voice_session', { session_id })
+            socket.emit('join_voice_session', { session_id, capabilities: AUDIO_CAPABILITIES })
         })
 
         socket.on('connection_response', (data) => {
@@ -261,6 +266,12 @@ function CallContent() {
             queueAudio(data.audio)
         })
 
+        // Streamed replies arrive sentence by sentence, already in seq order
+        socket.on('ai_audio_chunk', (data: { turn_id: string; seq: number; audio: AudioPayload; text: string }) => {
+            if (!data.audio) return
+            queueAudio(data.audio)
+        })
+
         socket.on('connect_error', (error) => {
             // console.error('❌ WebSocket connection error:', error)
             setError(`Connection failed: ${error.message}`)
@@ -286,9 +297,9 @@ function CallContent() {
     }
 
     // ✨ NEW: Queue audio for sequential playback
-    const queueAudio = (audioBase64: string) => {
+    const queueAudio = (audio: AudioPayload) => {
         // console.log('📥 Adding audio to queue, queue length:', audioQueueRef.current.length + 1)
-        audioQueueRef.current.push(audioBase64)
+        audioQueueRef.current.push(audio)
 
         // Start playing if not already playing
         if (!isPlayingRef.current) {
@@ -305,10 +316,10 @@ function CallContent() {
         }
 
         isPlayingRef.current = true
-        const audioBase64 = audioQueueRef.current.shift()!
+        const audio = audioQueueRef.current.shift()!
 
         try {
-            await playAudioChunk(audioBase64)
+            await playAudioChunk(audio)
         } catch (error) {
             console.error('❌ Error playing audio chunk:', error)
         }
@@ -318,7 +329,7 @@ function CallContent() {
     }
 
     // ✨ COMPLETELY REWRITTEN: Proper audio playback for ElevenLabs
-    const playAudioChunk = async (audioBase64: string): Promise<void> => {
+    const playAudioChunk = async (audioPayload: AudioPayload): Promise<void> => {
         return new Promise(async (resolve, reject) => {
             try {
                 // console.log('🔊 Playing audio chunk...')
@@ -333,16 +344,22 @@ function CallContent() {
                     await audioContextRef.current.resume()
                 }
 
-                // ✨ CRITICAL FIX: Decode base64 properly
-                const binaryString = atob(audioBase64)
-                const bytes = new Uint8Array(binaryString.length)
-                for (let i = 0; i < binaryString.length; i++) {
-                    bytes[i] = binaryString.charCodeAt(i)
+                // Binary frames are used as-is; legacy base64 strings are decoded
+                let audioBuffer: ArrayBuffer
+                if (typeof audioPayload === 'string') {
+                    const binaryString = atob(audioPayload)
+                    const bytes = new Uint8Array(binaryString.length)
+                    for (let i = 0; i < binaryString.length; i++) {
+                        bytes[i] = binaryString.charCodeAt(i)
+                    }
+                    audioBuffer = bytes.buffer
+                } else {
+                    audioBuffer = audioPayload
                 }
 
                 // ✨ CRITICAL: Create blob with proper MIME type
                 // ElevenLabs typically sends MP3, but check your backend
-                const blob = new Blob([bytes.buffer], { type: 'audio/mpeg' })
+                const blob = new Blob([audioBuffer], { type: 'audio/mpeg' })
                 const url = URL.createObjectURL(blob)
 
                 // Create audio element
@@ -422,6 +439,15 @@ function CallContent() {
             initAudioContext()
         }
 
+        // Barge-in: the rep started talking, so stop the prospect mid-sentence.
+        // The backend cancels the in-flight turn when the new utterance arrives.
+        audioQueueRef.current = []
+        if (currentAudioRef.current) {
+            currentAudioRef.current.pause()
+            // Settle the pending playback promise so the queue can restart
+            currentAudioRef.current.dispatchEvent(new Event('ended'))
+        }
+
         const SpeechRecognition = (window as any).webkitSpeechRecognition || (window as any).SpeechRecognition
         const recognition = new SpeechRecognition()
 